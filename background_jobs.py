@@ -0,0 +1,186 @@
+"""公共经济学模拟游戏 - 后台模拟任务
+
+图形界面中较重的计算（从当前局面推演上万局未来、AI 顾问的前瞻建议、重放存档）放到工作线程中执行，
+Tk 主循环保持响应。工作线程只通过线程安全的队列报告进度和结果，
+主线程用 after() 定时取出消息并调用回调，因此回调总是在主线程中执行，可以直接更新界面。
+
+    pool = WorkerPool(root)
+    pool.submit(simulate_futures, engine.snapshot(), [[1, 5]], 10000, group="futures",
+                on_progress=show_progress, on_result=show_result)
+    pool.cancel("futures")                # 玩家改变选择时取消
+
+任务函数的第一个参数是 Job，应在计算中定期调用 job.progress(已完成, 总数)；
+任务被取消后该调用抛出 JobCancelled，任务随即结束。已取消任务的进度和结果不会再回调。
+没有 Tk 根窗口时（脚本或测试中）可以用 wait() 在当前线程中等待并处理回调。
+"""
+import itertools
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+POLL_INTERVAL_MS = 50
+
+# 队列消息类型
+PROGRESS = "progress"
+RESULT = "result"
+ERROR = "error"
+CANCELLED = "cancelled"
+
+
+class JobCancelled(Exception):
+    """任务已被取消（由 Job.progress/check 抛出）"""
+
+
+class Job:
+    """一个后台任务；cancel() 可以在任何线程中调用"""
+
+    def __init__(self, pool, job_id, group, on_result, on_progress, on_error):
+        self.pool = pool
+        self.id = job_id
+        self.group = group
+        self.on_result = on_result
+        self.on_progress = on_progress
+        self.on_error = on_error
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def check(self):
+        """任务已被取消时抛出 JobCancelled"""
+        if self._cancelled.is_set():
+            raise JobCancelled()
+
+    def progress(self, done, total):
+        """（工作线程中）报告进度，同时检查是否已被取消"""
+        self.check()
+        self.pool.messages.put((self, PROGRESS, (done, total)))
+
+
+class WorkerPool:
+    """在工作线程中执行模拟任务，通过队列把进度和结果交回主线程"""
+
+    def __init__(self, root=None, workers=1, poll_interval=POLL_INTERVAL_MS):
+        self.root = root
+        self.poll_interval = poll_interval
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="simulation")
+        self.messages = queue.Queue()
+        self.jobs = {}             # 未结束、未取消的任务：编号 -> Job
+        self._ids = itertools.count(1)
+        self._poll_job = None
+
+    def submit(self, func, *args, group=None, on_result=None, on_progress=None, on_error=None, **kwargs):
+        """提交任务 func(job, *args, **kwargs)；回调在主线程中调用：
+        on_progress(已完成, 总数)、on_result(返回值)、on_error(异常)"""
+        job = Job(self, next(self._ids), group, on_result, on_progress, on_error)
+        self.jobs[job.id] = job
+        self.executor.submit(self._run, job, func, args, kwargs)
+        self._schedule_poll()
+        return job
+
+    def _run(self, job, func, args, kwargs):
+        """（工作线程中）执行任务，把结束状态放入队列"""
+        try:
+            job.check()
+            result = func(job, *args, **kwargs)
+        except JobCancelled:
+            self.messages.put((job, CANCELLED, None))
+        except Exception as e:
+            self.messages.put((job, ERROR, e))
+        else:
+            self.messages.put((job, RESULT, result))
+
+    def cancel(self, group=None):
+        """取消某一组（默认全部）未结束的任务，返回取消的任务数"""
+        cancelled = [job for job in self.jobs.values() if group is None or job.group == group]
+        for job in cancelled:
+            job.cancel()
+            del self.jobs[job.id]
+        return len(cancelled)
+
+    def busy(self, group=None):
+        """是否还有某一组（默认任意）未结束的任务"""
+        return any(group is None or job.group == group for job in self.jobs.values())
+
+    def poll(self):
+        """（主线程中）处理队列中的全部消息，返回处理的消息数"""
+        count = 0
+        while True:
+            try:
+                job, kind, payload = self.messages.get_nowait()
+            except queue.Empty:
+                return count
+            count += 1
+            self._dispatch(job, kind, payload)
+
+    def _dispatch(self, job, kind, payload):
+        if job.cancelled:
+            return
+        if kind == PROGRESS:
+            if job.on_progress is not None:
+                job.on_progress(*payload)
+            return
+        self.jobs.pop(job.id, None)
+        if kind == RESULT and job.on_result is not None:
+            job.on_result(payload)
+        elif kind == ERROR:
+            if job.on_error is None:
+                raise payload
+            job.on_error(payload)
+
+    def _schedule_poll(self):
+        if self.root is not None and self._poll_job is None:
+            self._poll_job = self.root.after(self.poll_interval, self._on_poll)
+
+    def _on_poll(self):
+        """after() 定时回调：处理消息，还有任务未结束时继续轮询"""
+        self._poll_job = None
+        self.poll()
+        if self.jobs:
+            self._schedule_poll()
+
+    def wait(self, timeout=None):
+        """（没有 Tk 主循环时）在当前线程中等待全部任务结束并调用回调；超时返回 False"""
+        while self.jobs:
+            try:
+                job, kind, payload = self.messages.get(timeout=timeout)
+            except queue.Empty:
+                return False
+            self._dispatch(job, kind, payload)
+        self.poll()
+        return True
+
+    def shutdown(self):
+        """取消全部任务并停止工作线程（不等待正在执行的任务）"""
+        self.cancel()
+        if self._poll_job is not None:
+            self.root.after_cancel(self._poll_job)
+            self._poll_job = None
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def simulate_futures(job, snapshot, schedule, n_games, seed=None, block_size=1000, scenario=None):
+    """任务：从快照局面按政策方案推演 n_games 局未来，返回 BatchResult
+
+    每算完 block_size 局报告一次进度，取消后最迟在当前一块算完时结束。
+    """
+    # batch_simulation 在工作线程中才导入；界面启动时不加载 NumPy（history_store 也是按需导入）
+    from batch_simulation import simulate_from
+
+    return simulate_from(snapshot, schedule, n_games, seed=seed, block_size=block_size,
+                         progress=job.progress, scenario=scenario)
+
+
+def advise(job, engine, strategy=None):
+    """任务：为 engine（应为 engine.fork() 分出的独立引擎）的当前回合给出政策建议，返回政策下标列表
+
+    默认使用 strategies.advisor_strategy()（限时的蒙特卡洛前瞻）。
+    """
+    from strategies import advisor_strategy
+
+    job.check()
+    return (advisor_strategy() if strategy is None else strategy).choose(engine)
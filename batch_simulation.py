@@ -0,0 +1,415 @@
+"""公共经济学模拟游戏 - 向量化蒙特卡洛批量模拟
+
+把 N 局游戏的经济指标保存为 (N × 指标数) 的 NumPy 数组，
+政策效果、随机事件、自然变化、噪声和数值范围限制都以数组运算
+一次性作用于所有对局，用于统计固定政策方案的胜率和得分分布。
+
+    from batch_simulation import simulate_schedule
+
+    result = simulate_schedule([[1, 5], [3, 9], [7]] * 4, n_games=100000, seed=42)
+    print(result.win_rate(), result.mean_score())
+
+随机数按 (种子, 回合, 用途) 派生独立的子流（政策效果波动、随机事件、自然噪声），
+同一种子下两种方案在每个回合抽到的事件和噪声完全相同（公共随机数），
+对局按固定大小分块、每块使用由 (种子, 块号) 派生的种子，因此结果与进程数无关。
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from economic_engine import (INDICATOR_INDEX, INDICATOR_GOOD, INDICATOR_NEUTRAL, INDICATOR_BAD,
+                             DEFAULT_SCENARIO, GDP_TREND, GDP_REVERSION, GDP_BOOM, GDP_SLUMP,
+                             UNEMPLOYMENT_BOOM_CHANGE, UNEMPLOYMENT_SLUMP_CHANGE, effect_matrix)
+
+# 对局结果编码：0 表示下完全部回合，1 表示提前胜利，2 起依次对应场景的失败条件
+OUTCOME_FINISHED = 0
+OUTCOME_VICTORY = 1
+OUTCOME_FAILURE_BASE = 2
+
+# 随机数子流编号
+STREAM_EFFECTS = 0
+STREAM_EVENTS = 1
+STREAM_NOISE = 2
+
+# simulate_schedule 的分块大小：每块对局使用独立派生的随机种子
+BLOCK_SIZE = 8192
+# 剩余冷却回合数的类型：(N × 政策数) 的数组每回合都要更新，政策很多时用较小的整数类型
+COOLDOWN_DTYPE = np.int16
+
+
+def _compare(values, op, threshold):
+    """向量化的阈值比较"""
+    return values <= threshold if op == "<=" else values >= threshold
+
+
+def _policy_mask(selection, n_policies):
+    """把政策下标列表转换为布尔掩码"""
+    mask = np.zeros(n_policies, dtype=bool)
+    mask[list(selection)] = True
+    return mask
+
+
+class BatchSimulation:
+    """同时推进 n_games 局游戏的向量化模拟器"""
+
+    def __init__(self, n_games, policies=None, events=None, event_probability=None, seed=None, scenario=None):
+        self.n_games = n_games
+        # 场景（默认场景或 scenarios.load_scenario 加载的场景）；policies、events、event_probability 可单独覆盖
+        self.scenario = DEFAULT_SCENARIO if scenario is None else scenario
+        self.policies = self.scenario.policies if policies is None else policies
+        self.events = self.scenario.events if events is None else events
+        self.event_probability = self.scenario.event_probability if event_probability is None else event_probability
+        self.max_turns = self.scenario.max_turns
+        # 自然变化中GDP增长率回归的长期趋势和速度
+        self.gdp_trend = GDP_TREND
+        self.gdp_reversion = GDP_REVERSION
+        self.seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        self._compile_tables()
+        self.reset()
+
+    def _compile_tables(self):
+        """把政策、事件和范围定义转换为数组"""
+        scenario = self.scenario
+        indicators = scenario.indicators
+        n_indicators = len(indicators)
+
+        self.costs = np.array([p['cost'] for p in self.policies], dtype=np.int64)
+        self.cooldowns = np.array([p['cooldown'] for p in self.policies], dtype=COOLDOWN_DTYPE)
+
+        # 稠密的政策效果矩阵 (政策数 × 指标数)
+        self.effect_matrix = np.array(effect_matrix(self.policies, indicators),
+                                      dtype=np.float64).reshape(-1, n_indicators)
+        # 每个非零效果项带独立的随机波动，因此再展开为稀疏的效果项：(政策下标, 指标下标, 效果值)
+        self.effect_policy, self.effect_indicator = np.nonzero(self.effect_matrix)
+        self.effect_value = self.effect_matrix[self.effect_policy, self.effect_indicator]
+
+        self.event_effects = np.array(effect_matrix(self.events, indicators),
+                                      dtype=np.float64).reshape(-1, n_indicators)
+
+        # 前置条件：(政策下标, 指标下标数组, 上限数组)
+        self.requirements = []
+        for p, policy in enumerate(self.policies):
+            if 'requirements' in policy:
+                items = policy['requirements'].items()
+                self.requirements.append((p,
+                                          np.array([scenario.indicator_index[k] for k, _ in items]),
+                                          np.array([v for _, v in items], dtype=np.float64)))
+
+        self.lower = np.array(scenario.lower_bounds)
+        self.upper = np.array(scenario.upper_bounds)
+        self.initial = np.array(scenario.initial_values)
+        self.good_low, self.good_high, self.bad_low, self.bad_high = (np.array(column)
+                                                                      for column in scenario.thresholds)
+        index = scenario.indicator_index
+        self.objective_conditions = [(index[indicator], op, threshold)
+                                     for indicator, op, threshold in scenario.objective_conditions.values()]
+        self.failure_conditions = [(index[indicator], op, threshold)
+                                   for _, indicator, op, threshold in scenario.failure_conditions]
+        self.score_bonuses = [(index[indicator], op, threshold, bonus)
+                              for indicator, op, threshold, bonus in scenario.score_bonuses]
+
+    def reset(self):
+        """重置所有对局"""
+        n = self.n_games
+        self.turn = 1
+        self.data = np.tile(self.initial, (n, 1))
+        self.budget = np.full(n, self.scenario.initial_budget, dtype=np.int64)
+        self.cooldown_left = np.zeros((n, len(self.policies)), dtype=COOLDOWN_DTYPE)
+        self.active = np.ones(n, dtype=bool)
+        self.outcome = np.full(n, OUTCOME_FINISHED, dtype=np.int8)
+        self.events_fired = np.zeros(n, dtype=np.int64)
+        self.last_event = np.full(n, -1, dtype=np.int64)   # 最近一次实施政策时触发的事件下标，-1 表示没有
+        self._streams = {}
+
+    def reset_games(self, mask):
+        """只把 mask 指定的对局重置为开局状态（回合数和随机数子流不变）"""
+        self.data[mask] = self.initial
+        self.budget[mask] = self.scenario.initial_budget
+        self.cooldown_left[mask] = 0
+        self.active[mask] = True
+        self.outcome[mask] = OUTCOME_FINISHED
+        self.events_fired[mask] = 0
+        self.last_event[mask] = -1
+
+    def start_from(self, snapshot):
+        """所有对局从同一局面（engine.snapshot() 返回的 GameSnapshot）继续"""
+        self.reset()
+        self.turn = snapshot.turn
+        self.data[:] = snapshot.values
+        self.budget[:] = snapshot.budget
+        index = {policy['name']: p for p, policy in enumerate(self.policies)}
+        for name, left in snapshot.cooldowns:
+            self.cooldown_left[:, index[name]] = left
+        self.active[:] = not snapshot.game_over
+
+    def stream(self, which):
+        """当前回合某一用途的随机数发生器，由 (种子, 回合, 用途) 派生"""
+        key = (self.turn, which)
+        if key not in self._streams:
+            # 回合只会前进，之前回合的子流不再需要
+            self._streams = {k: rng for k, rng in self._streams.items() if k[0] == self.turn}
+            seq = np.random.SeedSequence(self.seed_sequence.entropy,
+                                         spawn_key=self.seed_sequence.spawn_key + key)
+            self._streams[key] = np.random.default_rng(seq)
+        return self._streams[key]
+
+    def effect_sums(self, values, items):
+        """把效果项的实际效果 values (N × len(items)) 按指标累加
+
+        返回 (指标下标数组, N × 涉及指标数 的累加值)，只包含这些效果项影响到的指标，
+        政策和指标很多时不必构造 (效果项数 × 指标数) 的稠密散射矩阵。
+        """
+        columns, position = np.unique(self.effect_indicator[items], return_inverse=True)
+        sums = np.zeros((len(values), len(columns)))
+        for j, k in enumerate(position):
+            sums[:, k] += values[:, j]
+        return columns, sums
+
+    def valid_selection(self, selected):
+        """返回每局能否实施给定政策组合 (N,) —— 对应 validate_policies 的检查"""
+        valid = self.active & selected.any(axis=-1)
+        valid &= (selected @ self.costs) <= self.budget
+        valid &= ~(selected & (self.cooldown_left > 0)).any(axis=1)
+        for p, columns, limits in self.requirements:
+            violated = (self.data[:, columns] > limits).any(axis=1)
+            valid &= ~(selected[..., p] & violated)
+        return valid
+
+    def apply_policies(self, selected):
+        """对所有对局实施政策组合
+
+        selected 为 (政策数,) 的布尔掩码（所有对局相同）或 (N × 政策数) 的布尔掩码。
+        无法实施的对局（预算不足、冷却中或前置条件不满足）跳过本次实施，相当于不选政策。
+        返回实际实施了政策的对局掩码。
+        """
+        selected = np.asarray(selected, dtype=bool)
+        valid = self.valid_selection(selected)
+
+        self.budget -= np.where(valid, selected @ self.costs, 0)
+        self.cooldown_left = np.where(selected & valid[:, None], self.cooldowns, self.cooldown_left)
+
+        # 每个效果项独立的±10%波动；总是为全部效果项抽取，使不同方案的同一政策抽到相同的波动
+        spread = self.scenario.effect_noise
+        noise = self.stream(STREAM_EFFECTS).uniform(1.0 - spread, 1.0 + spread,
+                                                   size=(self.n_games, len(self.effect_value)))
+        self._apply_effects(selected, valid, noise)
+
+        self.trigger_random_events(valid)
+        self._check_game_end(valid)
+        return valid
+
+    def _apply_effects(self, selected, valid, noise):
+        """把 valid 对局中选中政策的效果项（乘以各自的波动 noise）累加到指标上"""
+        if selected.ndim == 1:
+            # 所有对局选择相同时只计算选中政策的效果项
+            items = np.flatnonzero(selected[self.effect_policy])
+            columns, delta = self.effect_sums(noise[:, items] * self.effect_value[items], items)
+            self.data[:, columns] += valid[:, None] * delta
+        else:
+            # 各局选择不同时只累加每局实际选中的 (对局, 效果项)
+            games, items = np.nonzero((selected & valid[:, None])[:, self.effect_policy])
+            n_indicators = self.data.shape[1]
+            self.data += np.bincount(games * n_indicators + self.effect_indicator[items],
+                                     weights=noise[games, items] * self.effect_value[items],
+                                     minlength=self.data.size).reshape(self.data.shape)
+
+    def trigger_random_events(self, mask):
+        """在 mask 指定的对局中按概率触发随机事件"""
+        rng = self.stream(STREAM_EVENTS)
+        fired = mask & (rng.random(self.n_games) < self.event_probability)
+        which = rng.integers(len(self.events), size=self.n_games)
+        self.data += fired[:, None] * self.event_effects[which]
+        self.events_fired += fired
+        self.last_event = np.where(fired, which, -1)
+
+    def next_turn(self):
+        """所有仍在进行的对局进入下一回合"""
+        self.advance(self.active)
+        self.turn += 1
+
+        if self.turn > self.max_turns:
+            self.active = np.zeros(self.n_games, dtype=bool)
+
+    def advance(self, mask):
+        """mask 指定的对局完成回合切换：恢复预算、减少冷却、自然变化（不改变 self.turn）"""
+        self.budget = np.where(mask, np.minimum(self.scenario.max_budget,
+                                                self.budget + self.scenario.budget_per_turn), self.budget)
+        # 原地更新：政策很多时 (N × 政策数) 的冷却数组是每回合最大的数组
+        self.cooldown_left -= (self.cooldown_left > 0) & mask[:, None]
+
+        new_data = self.apply_natural_changes(self.data.copy(), self.stream(STREAM_NOISE))
+        np.copyto(self.data, new_data, where=mask[:, None])
+
+    def apply_natural_changes(self, data, rng):
+        """对数组应用自然经济变化并限制范围"""
+        gdp = INDICATOR_INDEX["GDP增长率"]
+        unemployment = INDICATOR_INDEX["失业率"]
+        inflation = INDICATOR_INDEX["通胀率"]
+
+        # GDP增长率向长期趋势回归
+        data[:, gdp] += (self.gdp_trend - data[:, gdp]) * self.gdp_reversion
+
+        # 失业率受GDP增长影响
+        data[:, unemployment] += np.where(data[:, gdp] > GDP_BOOM, UNEMPLOYMENT_BOOM_CHANGE,
+                                          np.where(data[:, gdp] < GDP_SLUMP, UNEMPLOYMENT_SLUMP_CHANGE, 0.0))
+
+        # 通胀率小幅波动和随机噪声
+        data[:, inflation] += rng.uniform(-0.2, 0.2, size=len(data))
+        data += rng.uniform(-0.05, 0.05, size=data.shape)
+
+        return self.clamp_values(data)
+
+    def clamp_values(self, data):
+        """限制数值在合理范围内"""
+        return np.clip(data, self.lower, self.upper, out=data)
+
+    def classify(self, data=None):
+        """所有对局所有指标的好坏状态 (N × 指标数)，取值为 INDICATOR_GOOD/NEUTRAL/BAD"""
+        data = self.data if data is None else data
+        good = (data >= self.good_low) & (data <= self.good_high)
+        bad = (data <= self.bad_low) | (data >= self.bad_high)
+        return np.where(good, INDICATOR_GOOD, np.where(bad, INDICATOR_BAD, INDICATOR_NEUTRAL)).astype(np.int8)
+
+    def objectives_completed(self):
+        """每局已完成目标的布尔矩阵 (N × 目标数)"""
+        return np.column_stack([_compare(self.data[:, k], op, threshold)
+                                for k, op, threshold in self.objective_conditions])
+
+    def _check_game_end(self, mask):
+        """检查 mask 中对局的胜利和失败条件"""
+        victory = mask & (self.objectives_completed().sum(axis=1) >= self.scenario.victory_objectives)
+        self.outcome[victory] = OUTCOME_VICTORY
+        ended = victory
+
+        for k, (column, op, threshold) in enumerate(self.failure_conditions):
+            failed = mask & ~ended & _compare(self.data[:, column], op, threshold)
+            self.outcome[failed] = OUTCOME_FAILURE_BASE + k
+            ended = ended | failed
+
+        self.active &= ~ended
+
+    def final_scores(self):
+        """向量化的 calculate_final_score"""
+        score = self.objectives_completed().sum(axis=1) * self.scenario.objective_score
+        for k, op, threshold, bonus in self.score_bonuses:
+            score += _compare(self.data[:, k], op, threshold) * bonus
+        return score
+
+    def run(self, schedule):
+        """按固定政策方案下完所有对局，返回 BatchResult
+
+        schedule 是每回合的政策下标列表；列表短于总回合数时，其余回合不实施政策。
+        """
+        self.reset()
+        return self.play(schedule)
+
+    def play(self, schedule, until=None):
+        """从当前回合起按政策方案下完所有对局，schedule[0] 为当前回合的政策
+
+        until 为最后一个要下的回合（默认为最后一回合）；提前停止时仍在进行的对局结果为 OUTCOME_FINISHED。
+        """
+        n_policies = len(self.policies)
+        first = self.turn
+        last = self.max_turns if until is None else min(until, self.max_turns)
+        while self.turn <= last:
+            if not self.active.any():
+                break
+            selection = schedule[self.turn - first] if self.turn - first < len(schedule) else None
+            if selection:
+                self.apply_policies(_policy_mask(selection, n_policies))
+            self.next_turn()
+
+        return BatchResult(self.final_scores(), self.outcome.copy(),
+                           self.objectives_completed().sum(axis=1), self.events_fired.copy(),
+                           self.scenario.failure_conditions)
+
+
+class BatchResult:
+    """一批对局的最终结果"""
+
+    def __init__(self, scores, outcomes, completed, events_fired, failure_conditions=None):
+        self.scores = scores
+        self.outcomes = outcomes
+        self.completed = completed
+        self.events_fired = events_fired
+        self.failure_conditions = (DEFAULT_SCENARIO.failure_conditions if failure_conditions is None
+                                   else failure_conditions)
+
+    @classmethod
+    def concatenate(cls, results):
+        """合并多批结果"""
+        return cls(*(np.concatenate([getattr(r, name) for r in results])
+                     for name in ("scores", "outcomes", "completed", "events_fired")),
+                   results[0].failure_conditions)
+
+    def __len__(self):
+        return len(self.scores)
+
+    def win_rate(self):
+        """提前达成胜利条件（完成至少3个目标）的比例"""
+        return float(np.mean(self.outcomes == OUTCOME_VICTORY))
+
+    def mean_score(self):
+        """平均最终得分"""
+        return float(np.mean(self.scores))
+
+    def score_histogram(self):
+        """得分分布：{得分: 对局数}（得分都是5的倍数）"""
+        values, counts = np.unique(self.scores, return_counts=True)
+        return dict(zip(values.tolist(), counts.tolist()))
+
+    def completion_rate(self, required=3):
+        """结束时完成至少 required 个目标的比例"""
+        return float(np.mean(self.completed >= required))
+
+    def failure_breakdown(self):
+        """各失败原因的对局数"""
+        return {name: int(np.sum(self.outcomes == OUTCOME_FAILURE_BASE + k))
+                for k, (name, _, _, _) in enumerate(self.failure_conditions)}
+
+
+def _run_block(size, seed, schedule, kwargs):
+    return BatchSimulation(size, seed=seed, **kwargs).run(schedule)
+
+
+def simulate_schedule(schedule, n_games, seed=None, processes=1, block_size=BLOCK_SIZE, **kwargs):
+    """分块批量模拟固定政策方案
+
+    每块 block_size 局使用由 (seed, 块号) 派生的随机流，内存占用只取决于块大小；
+    processes > 1 时各块分发到进程池，结果与进程数无关、逐位相同。
+    """
+    sizes = [min(block_size, n_games - start) for start in range(0, n_games, block_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    if processes > 1:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            results = list(pool.map(_run_block, sizes, seeds, [schedule] * len(sizes), [kwargs] * len(sizes)))
+    else:
+        results = [_run_block(size, block_seed, schedule, kwargs) for size, block_seed in zip(sizes, seeds)]
+    return BatchResult.concatenate(results)
+
+
+def simulate_from(snapshot, schedule, n_games, seed=None, block_size=BLOCK_SIZE, progress=None, **kwargs):
+    """从某一局面（GameSnapshot）推演 n_games 局未来，schedule[0] 为当前回合的政策
+
+    本回合已经实施过政策时 schedule[0] 应为空列表。
+    每算完一块调用 progress(已完成局数, n_games)，可以在其中抛出异常中止计算。
+    """
+    sizes = [min(block_size, n_games - start) for start in range(0, n_games, block_size)]
+    results = []
+    done = 0
+    for size, block_seed in zip(sizes, np.random.SeedSequence(seed).spawn(len(sizes))):
+        simulation = BatchSimulation(size, seed=block_seed, **kwargs)
+        simulation.start_from(snapshot)
+        results.append(simulation.play(schedule))
+        done += size
+        if progress is not None:
+            progress(done, n_games)
+    return BatchResult.concatenate(results)
+
+
+def compare_schedules(schedule_a, schedule_b, n_games, seed=None, **kwargs):
+    """用公共随机数比较两种方案：同一种子下逐局配对，返回 (平均得分差 b - a, 标准误)"""
+    a = simulate_schedule(schedule_a, n_games, seed=seed, **kwargs)
+    b = simulate_schedule(schedule_b, n_games, seed=seed, **kwargs)
+    diff = b.scores - a.scores
+    return float(diff.mean()), float(diff.std(ddof=1) / np.sqrt(n_games))
@@ -0,0 +1,457 @@
+"""公共经济学模拟游戏 - 性能基准测试
+
+测量项目（名称: 单位, 越高/越低越好）：
+    engine.turns_per_sec            无界面引擎每秒回合数（apply_policies + next_turn）
+    engine.apply_policies_us        单次 apply_policies 耗时
+    engine.next_turn_us             单次 next_turn 耗时（含 apply_natural_changes、clamp_values）
+    engine.natural_changes_us       单次 apply_natural_changes 耗时
+    engine.clamp_values_us          单次 clamp_values 耗时
+    batch.games_per_sec             batch_simulation 每秒模拟对局数
+    rl.steps_per_sec                rl_env.VectorEconomicEnv 每秒环境步数（4096 局，随机动作）
+    strategy.advisor_ms             界面 AI 顾问单次决策的最长耗时（应低于 200 毫秒，各局的中位数）
+    strategy.mcts_ms                MCTSStrategy 单次决策的最长耗时（各局的中位数）
+    export.games_per_sec            history_export.export_schedule 每秒模拟并写出的对局数
+    export.load_ms                  以内存映射打开导出的数据集并读出一项指标的开局值
+    memory.bytes_per_game           一局完整游戏的引擎内存占用
+    startup.import_s                冷启动导入游戏模块
+    startup.dialog_s                冷启动到说明窗口显示
+    gui.update_display_ms           update_display 耗时（隐藏的 Tk 根窗口）
+    gui.update_charts_ms            update_charts 耗时
+    gui.create_policy_widgets_ms    create_policy_widgets 耗时
+    gui.refresh_policy_widgets_ms   refresh_policy_widgets 耗时
+    gui.stress_update_display_ms    大规模场景接近终局时 update_display 耗时
+    gui.stress_refresh_policy_widgets_ms  大规模场景中 refresh_policy_widgets 耗时
+    stress.turn_us_first            大规模场景（500 回合、120 项指标、240 项政策）开头 50 回合的每回合耗时
+    stress.turn_us_last             同一局最后 50 回合的每回合耗时
+    stress.turn_cost_ratio          两者之比：每回合耗时不随历史增长时约为 1
+    stress.batch_turn_ms            大规模场景中 1000 局批量模拟每回合耗时
+    stress.preview_ms               大规模场景中一次结果预估（含抽样）的耗时
+没有图形显示环境时跳过 gui.* 和 startup.dialog_s。gui.* 只用于观察：不写入基准文件，也不参与比较。
+微秒级的 engine.* 单次耗时每轮调用 MICRO_NUMBER 次、取 MICRO_REPEATS 轮的中位数，
+比较时使用更宽的容差 MICRO_TOLERANCE（记录在基准文件的该项中）。
+stress.turn_cost_ratio 超过 STRESS_MAX_RATIO 时即使不与基准比较也以非零状态退出。
+
+结果写成 JSON；指定基准文件时逐项比较，任何一项比基准差超过容差即以非零状态退出。
+
+命令行用法：
+    python benchmarks.py                                   # 运行并打印
+    python benchmarks.py --output bench.json               # 写出结果
+    python benchmarks.py --baseline benchmark_baseline.json  # 与基准比较
+    python benchmarks.py --save-baseline benchmark_baseline.json
+    python benchmarks.py --only stress                     # 只运行部分项目（engine batch rl strategy export memory startup gui stress）
+"""
+import argparse
+import gc
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+from economic_engine import EconomicEngine, PolicyError
+
+GAME_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "economic game.py")
+DEFAULT_TOLERANCE = 0.25
+REPEATS = 5
+# 单次只需几微秒的项目：每轮调用次数、轮数和比较容差
+MICRO_NUMBER = 20000
+MICRO_REPEATS = 15
+MICRO_TOLERANCE = 0.5
+# 只用于观察、不写入基准也不比较的项目前缀
+MEASUREMENT_ONLY = ("gui.",)
+
+# 基准测试使用的固定政策方案
+SCHEDULE = [[1, 5], [3, 9], [7]] * 4
+
+# 压力测试的场景规模 (回合数, 指标数, 政策数)，以及比较开头和结尾的回合数
+STRESS_SIZE = (500, 120, 240)
+STRESS_WINDOW = 50
+STRESS_GAMES = 3
+# 最后 STRESS_WINDOW 回合的每回合耗时不应超过开头的这一倍数
+STRESS_MAX_RATIO = 1.5
+
+
+def metric(value, unit, better, tolerance=None):
+    item = {"value": value, "unit": unit, "better": better}
+    if tolerance is not None:
+        item["tolerance"] = tolerance
+    return item
+
+
+def micro_metric(func):
+    """单次只需几微秒的操作：多次调用取中位数，并记录更宽的比较容差"""
+    func()
+    return metric(median_time(func, MICRO_NUMBER, MICRO_REPEATS) * 1e6, "us", "lower", MICRO_TOLERANCE)
+
+
+def median_time(func, number, repeats=REPEATS):
+    """重复 repeats 轮、每轮调用 number 次，返回单次调用耗时的中位数（秒）"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+    return statistics.median(timings)
+
+
+def play_game(engine):
+    """按 SCHEDULE 下完一局，跳过无法实施的政策"""
+    for turn in range(engine.max_turns):
+        selection = [i for i in SCHEDULE[turn] if engine.is_policy_available(i)]
+        try:
+            engine.validate_policies(selection)
+        except PolicyError:
+            selection = []
+        if engine.step(selection)["result"] is not None:
+            return
+
+
+def bench_engine():
+    results = {}
+
+    def games():
+        turns = 0
+        for seed in range(100):
+            engine = EconomicEngine(seed)
+            play_game(engine)
+            turns += engine.turn - 1
+        return turns
+
+    # 同一种子的对局是确定的，每轮的回合数相同；第一次调用兼作预热
+    turns = games()
+    results["engine.turns_per_sec"] = metric(turns / median_time(games, 1), "turns/s", "higher")
+
+    engine = EconomicEngine(0)
+
+    def apply_once():
+        engine.budget = 100
+        engine.policy_cooldowns.clear()
+        engine.apply_policies([1, 5])
+
+    results["engine.apply_policies_us"] = micro_metric(apply_once)
+
+    def next_once():
+        engine.turn = 1
+        engine.game_over = False
+        engine.next_turn()
+        if engine.data_history.size > 1000:
+            engine.start_history()
+
+    results["engine.next_turn_us"] = metric(median_time(next_once, 2000) * 1e6, "us", "lower")
+    results["engine.natural_changes_us"] = micro_metric(engine.apply_natural_changes)
+    results["engine.clamp_values_us"] = micro_metric(engine.clamp_values)
+    return results
+
+
+def stress_scenario():
+    from scenarios import compile_scenario, synthetic_scenario
+
+    return compile_scenario(synthetic_scenario(*STRESS_SIZE), "stress")
+
+
+def stress_selection(engine):
+    """压力测试每回合的选择：从随回合轮换的起点开始，依次选取可用且买得起的政策"""
+    n_policies = len(engine.policies)
+    start = engine.turn * 37 % n_policies
+    selection = []
+    budget = engine.budget
+    for k in range(8):
+        i = (start + k) % n_policies
+        cost = engine.policies[i]['cost']
+        if engine.is_policy_available(i) and cost <= budget:
+            selection.append(i)
+            budget -= cost
+    return selection
+
+
+def bench_stress():
+    """大规模场景：整局逐回合计时，比较开头和结尾的每回合耗时（不判断胜负，总是下满全部回合）"""
+    from batch_simulation import BatchSimulation
+    from outcome_preview import OutcomePreview
+
+    scenario = stress_scenario()
+    turn_times = []
+    for seed in range(STRESS_GAMES):
+        # 与图形界面相同：保留撤销快照，每回合为结果预估取一次快照
+        engine = EconomicEngine(seed, undo_depth=20, scenario=scenario)
+        times = []
+        while not engine.game_over:
+            selection = stress_selection(engine)
+            start = time.perf_counter()
+            engine.snapshot()
+            if selection:
+                engine.apply_policies(selection)
+            engine.next_turn()
+            times.append(time.perf_counter() - start)
+        turn_times.append(times)
+
+    first = statistics.median(t for times in turn_times for t in times[:STRESS_WINDOW])
+    last = statistics.median(t for times in turn_times for t in times[-STRESS_WINDOW:])
+    results = {
+        "stress.turn_us_first": metric(first * 1e6, "us", "lower"),
+        "stress.turn_us_last": metric(last * 1e6, "us", "lower"),
+        "stress.turn_cost_ratio": metric(last / first, "x", "lower"),
+    }
+
+    batch = BatchSimulation(1000, seed=0, scenario=scenario)
+    schedule = [[(turn * 37 + k) % len(scenario.policies) for k in range(3)] for turn in range(scenario.max_turns)]
+    start = time.perf_counter()
+    batch.play(schedule)
+    results["stress.batch_turn_ms"] = metric((time.perf_counter() - start) / (batch.turn - 1) * 1e3,
+                                             "ms", "lower")
+
+    engine = EconomicEngine(0, scenario=scenario)
+
+    def preview_once():
+        OutcomePreview(engine.snapshot(), scenario=scenario).evaluate(stress_selection(engine))
+
+    preview_once()
+    results["stress.preview_ms"] = metric(median_time(preview_once, 1) * 1e3, "ms", "lower")
+    return results
+
+
+def bench_batch():
+    from batch_simulation import simulate_schedule
+
+    n_games = 20000
+    simulate_schedule(SCHEDULE, 1000, seed=0)
+    elapsed = median_time(lambda: simulate_schedule(SCHEDULE, n_games, seed=0), 1, repeats=3)
+    return {"batch.games_per_sec": metric(n_games / elapsed, "games/s", "higher")}
+
+
+def bench_rl():
+    """向量化强化学习环境的吞吐（随机动作，4096 局）"""
+    import numpy as np
+    from rl_env import VectorEconomicEnv
+
+    env = VectorEconomicEnv(4096, seed=0)
+    env.reset()
+    actions = np.random.default_rng(0).random((20, env.n_envs, env.n_policies)) < 0.12
+
+    def run():
+        for action in actions:
+            env.step(action)
+
+    run()
+    elapsed = median_time(run, 1)
+    return {"rl.steps_per_sec": metric(len(actions) * env.n_envs / elapsed, "steps/s", "higher")}
+
+
+def bench_export():
+    """对局历史的列式导出（写入临时目录）"""
+    import tempfile
+    from history_export import export_schedule, load_histories
+
+    n_games = 20000
+    with tempfile.TemporaryDirectory() as directory:
+        def export():
+            export_schedule(directory, SCHEDULE, n_games, seed=0)
+
+        export()
+        elapsed = median_time(export, 1)
+
+        def load():
+            float(load_histories(directory).indicator("GDP增长率")[:, 0].mean())
+
+        load()
+        load_ms = median_time(load, 20) * 1e3
+    return {"export.games_per_sec": metric(n_games / elapsed, "games/s", "higher"),
+            "export.load_ms": metric(load_ms, "ms", "lower")}
+
+
+def bench_strategy():
+    """AI 策略单次决策的最长耗时（标准场景，取 REPEATS 局中每局最长耗时的中位数）"""
+    from strategies import MCTSStrategy, advisor_strategy, play_game
+
+    def slowest_ms(strategy):
+        return statistics.median(play_game(strategy, seed)[4] for seed in range(1, REPEATS + 1)) * 1e3
+
+    play_game(advisor_strategy(), 0)
+    play_game(MCTSStrategy(), 0)
+    return {"strategy.advisor_ms": metric(slowest_ms(advisor_strategy()), "ms", "lower"),
+            "strategy.mcts_ms": metric(slowest_ms(MCTSStrategy()), "ms", "lower")}
+
+
+def bench_memory():
+    n_games = 200
+    gc.collect()
+    tracemalloc.start()
+    engines = []
+    for seed in range(n_games):
+        engine = EconomicEngine(seed)
+        play_game(engine)
+        engines.append(engine)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"memory.bytes_per_game": metric(current / n_games, "bytes", "lower")}
+
+
+def bench_startup():
+    from startup_budget import measure
+
+    timings = measure()
+    results = {"startup.import_s": metric(timings["import"], "s", "lower")}
+    if "dialog" in timings:
+        results["startup.dialog_s"] = metric(timings["dialog"], "s", "lower")
+    return results
+
+
+def load_game_module():
+    spec = importlib.util.spec_from_file_location("economic_game", GAME_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def bench_gui():
+    """在隐藏的 Tk 根窗口中测量界面刷新耗时；没有图形显示环境时返回空结果"""
+    module = load_game_module()
+    tk = module.tk
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        return {}
+    root.withdraw()
+    try:
+        game = module.EconomicSimulationGame(root)
+        for window in root.winfo_children():
+            if isinstance(window, tk.Toplevel):
+                window.destroy()
+        game.build_charts()
+        root.update()
+
+        # 下几个回合，让图表有数据
+        for _ in range(4):
+            game.engine.step([])
+        results = {
+            "gui.update_display_ms": metric(median_time(game.update_display, 20) * 1e3, "ms", "lower"),
+            "gui.update_charts_ms": metric(median_time(game.update_charts, 20) * 1e3, "ms", "lower"),
+            "gui.refresh_policy_widgets_ms": metric(
+                median_time(game.refresh_policy_widgets, 20) * 1e3, "ms", "lower"),
+        }
+
+        # 在临时框架中重建政策控件，不影响界面上的控件；之后恢复 create_policy_widgets 重新赋值的全部属性
+        saved = ("policy_list", "policy_rows", "policy_first", "policy_vars", "policy_selection", "policy_enabled")
+        original = {name: getattr(game, name) for name in saved}
+
+        def create_once():
+            game.policy_list = tk.Frame(root)
+            game.policy_rows = []
+            game.create_policy_widgets()
+            game.policy_list.destroy()
+
+        results["gui.create_policy_widgets_ms"] = metric(median_time(create_once, 5) * 1e3, "ms", "lower")
+        for name, value in original.items():
+            setattr(game, name, value)
+        root.update()
+
+        # 大规模场景接近终局时的界面刷新
+        game.set_scenario(stress_scenario())
+        root.update()
+        while game.engine.turn < game.engine.max_turns - 10:
+            selection = stress_selection(game.engine)
+            if selection:
+                game.engine.apply_policies(selection)
+            game.engine.next_turn()
+        results["gui.stress_update_display_ms"] = metric(median_time(game.update_display, 20) * 1e3, "ms", "lower")
+        results["gui.stress_refresh_policy_widgets_ms"] = metric(
+            median_time(game.refresh_policy_widgets, 20) * 1e3, "ms", "lower")
+        return results
+    finally:
+        root.destroy()
+
+
+BENCHES = {
+    "engine": bench_engine,
+    "batch": bench_batch,
+    "rl": bench_rl,
+    "strategy": bench_strategy,
+    "export": bench_export,
+    "memory": bench_memory,
+    "startup": bench_startup,
+    "gui": bench_gui,
+    "stress": bench_stress,
+}
+
+
+def run_all(only=None):
+    """运行全部（或 only 中列出的）项目"""
+    results = {}
+    for name, bench in BENCHES.items():
+        if only is None or name in only:
+            results.update(bench())
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "metrics": results,
+    }
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """与基准比较，返回退步的项目说明列表"""
+    regressions = []
+    for name, base in baseline["metrics"].items():
+        current = results["metrics"].get(name)
+        if current is None or name.startswith(MEASUREMENT_ONLY):
+            continue
+        limit = max(tolerance, base.get("tolerance", 0.0))
+        if base["better"] == "higher":
+            worse = current["value"] < base["value"] * (1 - limit)
+        else:
+            worse = current["value"] > base["value"] * (1 + limit)
+        if worse:
+            regressions.append(f"{name}: {current['value']:.4g} {current['unit']}"
+                               f"（基准 {base['value']:.4g}）")
+    return regressions
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="公共经济学模拟游戏性能基准测试")
+    parser.add_argument("--output", help="把结果写入 JSON 文件")
+    parser.add_argument("--baseline", help="与该基准文件比较，退步时以非零状态退出")
+    parser.add_argument("--save-baseline", help="把结果保存为新的基准文件")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="允许的相对退步幅度（默认 0.25）")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHES), help="只运行这些项目")
+    args = parser.parse_args(argv[1:])
+
+    results = run_all(args.only)
+    for name, item in sorted(results["metrics"].items()):
+        print(f"{name:34s} {item['value']:12.4g} {item['unit']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    if args.save_baseline:
+        baseline = dict(results, metrics={name: item for name, item in results["metrics"].items()
+                                          if not name.startswith(MEASUREMENT_ONLY)})
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, ensure_ascii=False, indent=2)
+
+    status = 0
+    ratio = results["metrics"].get("stress.turn_cost_ratio")
+    if ratio is not None:
+        if ratio["value"] > STRESS_MAX_RATIO:
+            print(f"❌ 大规模场景最后 {STRESS_WINDOW} 回合的每回合耗时是开头的 {ratio['value']:.2f} 倍")
+            status = 1
+        else:
+            print(f"✅ 大规模场景每回合耗时不随历史增长（{ratio['value']:.2f} 倍）")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"❌ 性能退步 {regression}")
+        if regressions:
+            return 1
+        print("✅ 所有项目均未低于基准")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -1,31 +1,60 @@
+import os
+import sys
 import tkinter as tk
-from tkinter import ttk, messagebox
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import random
-import math
-
-# 设置中文字体
-try:
-    plt.rcParams["font.family"] = ["SimSun", "DejaVu Sans"]
-except:
-    plt.rcParams["font.family"] = ["DejaVu Sans"]
-plt.rcParams['axes.unicode_minus'] = False
+from collections import deque
+from tkinter import ttk, filedialog
+
+from economic_engine import EconomicEngine, PolicyError, INDICATORS, INDICATOR_GOOD, INDICATOR_BAD
+from snapshots import save_snapshot, load_snapshot
+from background_jobs import WorkerPool, simulate_futures, advise
+from scenarios import load_scenario, ScenarioError
+from selection_solver import selection_solver
+from instrumentation import PhaseStats, instrumented, register_collector
+
+# 可以撤销的政策实施次数
+UNDO_DEPTH = 20
+
+# 通知栏每条消息的显示时间（毫秒）；后面还有排队的消息时减半
+NOTIFICATION_MS = 4000
+# 事件记录面板保留的最多行数
+EVENT_LOG_LIMIT = 200
+# “推演未来”在后台模拟的对局数
+FORECAST_GAMES = 10000
+
+# 趋势图显示的指标（2×2）；目标线取自当前场景中与该指标相关的目标
+CHART_INDICATORS = [
+    ["GDP增长率", "失业率"],
+    ["基尼系数", "碳排放指数"]
+]
+# 以百分比显示的指标
+PERCENT_INDICATORS = ("GDP增长率", "失业率", "通胀率", "财政赤字率")
+# 趋势图横轴最多显示的回合数：更长的对局只显示最近一段，最新数据超出右边界时窗口向后平移半个窗口
+CHART_WINDOW = 60
+# 场景文件所在目录
+SCENARIO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scenario_data")
+
+
+def load_matplotlib():
+    """首次需要图表时才导入 matplotlib（不加载 pyplot），返回 (Figure, FigureCanvasTkAgg)"""
+    import matplotlib
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+    # 设置中文字体
+    matplotlib.rcParams["font.family"] = ["SimSun", "DejaVu Sans"]
+    matplotlib.rcParams['axes.unicode_minus'] = False
+    return Figure, FigureCanvasTkAgg
 
 
 class EconomicSimulationGame:
-    def __init__(self, root):
+    def __init__(self, root, scenario=None):
         self.root = root
-        self.root.title("公共经济学模拟游戏")
 
         # 设置保守的窗口尺寸，确保在大多数屏幕上都能正常显示
         window_width = 1400
         window_height = 900
 
-        # 先设置基本几何，然后获取屏幕信息
-        self.root.geometry(f"{window_width}x{window_height}")
-        self.root.update_idletasks()
-
+        # 获取屏幕信息（不需要先布局窗口）
         screen_width = self.root.winfo_screenwidth()
         screen_height = self.root.winfo_screenheight()
 
@@ -69,44 +98,14 @@ class EconomicSimulationGame:
             'tiny': ("SimSun", 20)  # 四号字体
         }
 
-        # 游戏状态初始化
-        self.turn = 1
-        self.max_turns = 12
-        self.budget = 100
-        self.max_budget = 100
-
-        # 经济指标初始化
-        self.economic_data = {
-            "GDP增长率": 2.5,
-            "失业率": 6.0,
-            "通胀率": 2.0,
-            "财政赤字率": 3.0,
-            "基尼系数": 0.45,
-            "碳排放指数": 100.0,
-            "社会福利指数": 65.0,
-            "创新指数": 60.0,
-            "教育水平": 70.0,
-            "健康指数": 75.0
-        }
-
-        # 数据历史记录
-        self.data_history = {key: [value] for key, value in self.economic_data.items()}
-        self.budget_history = [self.budget]
-
-        # 政策系统
-        self.selected_policies = []
-        self.policy_cooldowns = {}
-        self.random_events = []
-
-        # 目标系统
-        self.objectives = {
-            "📈 经济发展": {"target": "GDP增长率 ≥ 4.0%", "completed": False},
-            "👥 社会稳定": {"target": "失业率 ≤ 4.0%", "completed": False},
-            "🌱 环境保护": {"target": "碳排放指数 ≤ 70", "completed": False},
-            "⚖️ 社会公平": {"target": "基尼系数 ≤ 0.35", "completed": False}
-        }
+        # 游戏状态由无界面引擎维护，界面只负责显示
+        self.engine = EconomicEngine(undo_depth=UNDO_DEPTH, scenario=scenario)
+        self.update_title()
+        # 较重的模拟在后台线程中执行，结果通过 after() 轮询交回主线程
+        self.jobs = WorkerPool(self.root)
 
         # 显示游戏说明
+        self.instruction_widget = None
         self.show_game_instructions()
 
         # 创建UI
@@ -115,24 +114,23 @@ class EconomicSimulationGame:
         self.initialize_policies()
         self.update_display()
 
-    def show_game_instructions(self):
-        """显示游戏说明 - 150mm x 100mm"""
-        instructions = """🎯 游戏目标
+    def instruction_text(self):
+        """按当前场景的回合数、预算和目标生成游戏说明"""
+        scenario = self.engine.scenario
+        objectives = "\n".join(f"• {name}：{info['target']}" for name, info in scenario.objectives.items())
+        return f"""🎯 游戏目标
 作为国家领导人，您需要通过制定政策来管理国家经济，实现以下目标：
-• 📈 经济发展：GDP增长率达到4.0%以上
-• 👥 社会稳定：失业率控制在4.0%以下  
-• 🌱 环境保护：碳排放指数降至70以下
-• ⚖️ 社会公平：基尼系数降至0.35以下
+{objectives}
 
 🎮 游戏规则
-• 总共12个回合，每回合可以实施多项政策
-• 每回合开始时获得30点政策预算，最多储存100点
+• 总共{scenario.max_turns}个回合，每回合可以实施多项政策
+• 每回合开始时获得{scenario.budget_per_turn}点政策预算，最多储存{scenario.max_budget}点
 • 每项政策都有实施成本和冷却时间
 • 部分政策需要满足特定前置条件才能实施
 • 随机事件会影响经济指标，需要灵活应对
 
 🏆 胜利条件
-• 完成4个目标中的3个即可获胜
+• 完成{len(scenario.objectives)}个目标中的{scenario.victory_objectives}个即可获胜
 • 避免经济崩溃、财政危机等严重后果
 
 💡 策略提示
@@ -152,10 +150,7 @@ class EconomicSimulationGame:
         window_width = 600
         window_height = 1000
 
-        # 设置基本几何，然后获取屏幕信息
-        instruction_window.geometry(f"{window_width}x{window_height}")
-        instruction_window.update_idletasks()
-
+        # 获取屏幕信息
         screen_width = instruction_window.winfo_screenwidth()
         screen_height = instruction_window.winfo_screenheight()
 
@@ -198,8 +193,8 @@ class EconomicSimulationGame:
         text_widget.pack(fill=tk.BOTH, expand=True)
         scrollbar.config(command=text_widget.yview)
 
-        text_widget.insert(tk.END, instructions)
-        text_widget.configure(state=tk.DISABLED)
+        self.instruction_widget = text_widget
+        self.refresh_instructions()
 
         # 开始游戏按钮
         start_button = tk.Button(instruction_window,
@@ -214,6 +209,16 @@ class EconomicSimulationGame:
                                  command=instruction_window.destroy)
         start_button.pack(pady=10)
 
+    def refresh_instructions(self):
+        """说明窗口仍然打开时，按当前场景更新其中的文字"""
+        widget = self.instruction_widget
+        if widget is None or not widget.winfo_exists():
+            return
+        widget.configure(state=tk.NORMAL)
+        widget.delete("1.0", tk.END)
+        widget.insert(tk.END, self.instruction_text())
+        widget.configure(state=tk.DISABLED)
+
     def setup_styles(self):
         """设置样式"""
         style = ttk.Style()
@@ -278,6 +283,7 @@ class EconomicSimulationGame:
         self.right_panel.grid(row=0, column=1, sticky="nsew")
 
         self.create_objectives_panel()
+        self.create_event_log_panel()
         self.create_charts_panel()
 
         # 底部控制栏
@@ -304,19 +310,32 @@ class EconomicSimulationGame:
         info_frame.pack(side=tk.RIGHT, pady=15, padx=20)
 
         self.turn_label = tk.Label(info_frame,
-                                   text=f"📅 第 {self.turn} 回合 / {self.max_turns}",
+                                   text=f"📅 第 {self.engine.turn} 回合 / {self.engine.max_turns}",
                                    font=self.fonts['header'],
                                    fg=self.colors['text_primary'],
                                    bg=self.colors['bg_accent'])
         self.turn_label.pack(anchor="e", pady=(0, 5))
 
         self.budget_label = tk.Label(info_frame,
-                                     text=f"💰 政策预算: {self.budget} 点",
+                                     text=f"💰 政策预算: {self.engine.budget} 点",
                                      font=self.fonts['header'],
                                      fg=self.colors['accent'],
                                      bg=self.colors['bg_accent'])
         self.budget_label.pack(anchor="e")
 
+        # 通知栏：随机事件、政策提示和结局依次显示，不打断游戏（点击可跳过）
+        self.notifications = deque()
+        self.notification_job = None
+        self.notification_label = tk.Label(header,
+                                           text="",
+                                           font=self.fonts['normal'],
+                                           fg=self.colors['text_primary'],
+                                           bg=self.colors['bg_accent'],
+                                           wraplength=600,
+                                           justify=tk.LEFT)
+        self.notification_label.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=20)
+        self.notification_label.bind("<Button-1>", self.dismiss_notification)
+
     def create_status_panel(self):
         """创建经济状态面板"""
         status_frame = tk.LabelFrame(self.left_panel,
@@ -342,11 +361,11 @@ class EconomicSimulationGame:
             "健康指数": "❤️"
         }
 
-        # 创建指标网格 - 改为5行2列以减少高度
+        # 创建指标网格 - 改为5行2列以减少高度；场景的额外指标只汇总显示在最后一行
         self.indicator_labels = {}
-        indicators = list(self.economic_data.keys())
+        self.projection_labels = {}
 
-        for i, indicator in enumerate(indicators):
+        for i, indicator in enumerate(INDICATORS):
             row = i // 2
             col = i % 2
 
@@ -369,9 +388,25 @@ class EconomicSimulationGame:
                                    font=self.fonts['normal'],
                                    fg=self.colors['text_primary'],
                                    bg=self.colors['bg_secondary'])
+            # 按当前勾选的政策预估的本回合结束值
+            projection_label = tk.Label(frame,
+                                        text="",
+                                        font=self.fonts['normal'],
+                                        fg=self.colors['text_secondary'],
+                                        bg=self.colors['bg_secondary'])
+            projection_label.pack(side=tk.RIGHT)
             value_label.pack(side=tk.RIGHT)
 
             self.indicator_labels[indicator] = value_label
+            self.projection_labels[indicator] = projection_label
+
+        self.extra_indicators_label = tk.Label(status_frame,
+                                               text="",
+                                               font=self.fonts['normal'],
+                                               fg=self.colors['text_secondary'],
+                                               bg=self.colors['bg_secondary'])
+        self.extra_indicators_label.grid(row=(len(INDICATORS) + 1) // 2, column=0, columnspan=2,
+                                         sticky="w", padx=10, pady=4)
 
     def create_policy_panel(self):
         """创建政策选择面板 - 填满剩余空间"""
@@ -385,28 +420,31 @@ class EconomicSimulationGame:
         # 让政策面板占据剩余的所有空间
         policy_frame.pack(fill=tk.BOTH, expand=True)
 
-        # 创建滚动区域，填满整个policy_frame
-        canvas = tk.Canvas(policy_frame,
-                           bg=self.colors['bg_secondary'],
-                           highlightthickness=0)
-        scrollbar = tk.Scrollbar(policy_frame, orient="vertical", command=canvas.yview)
-        self.policy_scrollable = tk.Frame(canvas, bg=self.colors['bg_secondary'])
-
-        canvas.create_window((0, 0), window=self.policy_scrollable, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-
-        def on_frame_configure(event):
-            canvas.configure(scrollregion=canvas.bbox("all"))
-
-        def on_mousewheel(event):
-            canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
-
-        self.policy_scrollable.bind("<Configure>", on_frame_configure)
-        canvas.bind("<MouseWheel>", on_mousewheel)
-
-        # 让canvas和scrollbar填满policy_frame
-        canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5, pady=5)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y, pady=5)
+        # 虚拟列表：只创建能显示下的几行控件，滚动时把这些行重新绑定到其他政策，
+        # 政策再多，控件数量和每回合的刷新开销也只取决于面板高度
+        self.policy_list = tk.Frame(policy_frame, bg=self.colors['bg_secondary'])
+        self.policy_list.pack_propagate(False)
+        self.policy_scrollbar = tk.Scrollbar(policy_frame, orient="vertical", command=self.scroll_policies)
+        self.policy_list.bind("<Configure>", lambda event: self.layout_policy_rows())
+        self.policy_list.bind("<MouseWheel>", self.on_policy_mousewheel)
+
+        # 面板底部：按本回合的预算、冷却和前置条件勾选期望目标收益最大的组合
+        self.best_selection_btn = tk.Button(policy_frame,
+                                            text="🧮 推荐最优组合",
+                                            font=self.fonts['small'],
+                                            fg=self.colors['text_primary'],
+                                            bg=self.colors['bg_accent'],
+                                            activebackground=self.colors['bg_primary'],
+                                            border=0,
+                                            pady=4,
+                                            command=self.suggest_best_selection)
+        self.best_selection_btn.pack(side=tk.BOTTOM, fill=tk.X, padx=5, pady=(0, 5))
+        self.policy_list.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.policy_scrollbar.pack(side=tk.RIGHT, fill=tk.Y, pady=5)
+
+        self.policy_rows = []
+        self.policy_first = 0       # 第一行显示的政策下标
+        self.policy_visible = 1     # 能完整显示的行数
 
     def create_objectives_panel(self):
         """创建目标面板"""
@@ -418,11 +456,31 @@ class EconomicSimulationGame:
                                   relief='ridge',
                                   bd=2)
         obj_frame.pack(fill=tk.X, pady=(0, 10))
-
+        self.objectives_frame = obj_frame
+
+        self.projection_summary = tk.Label(obj_frame,
+                                           text="",
+                                           font=self.fonts['normal'],
+                                           fg=self.colors['text_secondary'],
+                                           bg=self.colors['bg_secondary'])
+        self.projection_summary.pack(fill=tk.X, pady=(0, 8), padx=15)
+
+        self.objective_rows = []
+        self.preview = None
+        self.preview_pending = False
+        self.create_objective_rows()
+
+    def create_objective_rows(self):
+        """按当前场景的目标创建目标行（切换场景时重建）"""
+        for frame in self.objective_rows:
+            frame.destroy()
+        self.objective_rows = []
         self.objective_labels = {}
-        for i, (name, obj) in enumerate(self.objectives.items()):
-            frame = tk.Frame(obj_frame, bg=self.colors['bg_secondary'])
-            frame.pack(fill=tk.X, pady=8, padx=15)
+        self.objective_projection_labels = {}
+        for name, obj in self.engine.objectives.items():
+            frame = tk.Frame(self.objectives_frame, bg=self.colors['bg_secondary'])
+            frame.pack(fill=tk.X, pady=8, padx=15, before=self.projection_summary)
+            self.objective_rows.append(frame)
 
             # 目标名称
             name_label = tk.Label(frame,
@@ -439,30 +497,75 @@ class EconomicSimulationGame:
                                         bg=self.colors['bg_secondary'])
             completion_label.pack(side=tk.RIGHT)
 
+            # 预估完成概率：本回合结束 / 游戏结束
+            projection_label = tk.Label(frame,
+                                        text="",
+                                        font=self.fonts['normal'],
+                                        fg=self.colors['text_secondary'],
+                                        bg=self.colors['bg_secondary'])
+            projection_label.pack(side=tk.RIGHT, padx=(0, 15))
+
             self.objective_labels[name] = completion_label
+            self.objective_projection_labels[name] = projection_label
+
+    def create_event_log_panel(self):
+        """创建事件记录面板：本局的随机事件、政策提示和结局"""
+        log_frame = tk.LabelFrame(self.right_panel,
+                                  text="📜 事件记录",
+                                  font=self.fonts['header'],
+                                  fg=self.colors['accent'],
+                                  bg=self.colors['bg_secondary'],
+                                  relief='ridge',
+                                  bd=2)
+        log_frame.pack(fill=tk.X, pady=(0, 10))
+
+        scrollbar = tk.Scrollbar(log_frame, orient="vertical")
+        self.event_log = tk.Text(log_frame,
+                                 height=4,
+                                 font=self.fonts['small'],
+                                 fg=self.colors['text_primary'],
+                                 bg=self.colors['bg_secondary'],
+                                 relief='flat',
+                                 wrap=tk.WORD,
+                                 state=tk.DISABLED,
+                                 yscrollcommand=scrollbar.set)
+        scrollbar.configure(command=self.event_log.yview)
+        self.event_log.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5, pady=5)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y, pady=5)
 
     def create_charts_panel(self):
-        """创建图表面板"""
-        chart_frame = tk.LabelFrame(self.right_panel,
-                                    text="📈 经济趋势图",
-                                    font=self.fonts['header'],
-                                    fg=self.colors['accent'],
-                                    bg=self.colors['bg_secondary'],
-                                    relief='ridge',
-                                    bd=2)
-        chart_frame.pack(fill=tk.BOTH, expand=True)
+        """创建图表面板；图表在主窗口首次空闲时才构建，不拖慢启动"""
+        self.chart_frame = tk.LabelFrame(self.right_panel,
+                                         text="📈 经济趋势图",
+                                         font=self.fonts['header'],
+                                         fg=self.colors['accent'],
+                                         bg=self.colors['bg_secondary'],
+                                         relief='ridge',
+                                         bd=2)
+        self.chart_frame.pack(fill=tk.BOTH, expand=True)
+
+        self.canvas = None
+        self.chart_lines = {}
+        self.chart_targets = {}
+        self.chart_backgrounds = {}
+        self.chart_start = 0        # 横轴窗口的第一个回合
+        self.root.after_idle(self.build_charts)
+
+    def build_charts(self):
+        """构建matplotlib图表并嵌入图表面板"""
+        if self.canvas is not None:
+            return
+        Figure, FigureCanvasTkAgg = load_matplotlib()
 
-        # 创建matplotlib图表
-        self.fig, self.axes = plt.subplots(2, 2, figsize=(10, 8), dpi=80)
+        # 创建matplotlib图表（不经过pyplot）
+        self.fig = Figure(figsize=(10, 8), dpi=80)
+        self.axes = self.fig.subplots(2, 2)
         self.fig.patch.set_facecolor(self.colors['bg_secondary'])
 
-        # 设置子图样式
-        chart_indicators = [
-            ["GDP增长率", "失业率"],
-            ["基尼系数", "碳排放指数"]
-        ]
-
-        for i, row in enumerate(chart_indicators):
+        # 标题、坐标轴、网格、目标线和图例只创建一次；
+        # 折线设为 animated，不进入背景，之后只更新折线数据并用 blit 重绘
+        colors = self.colors['chart_colors']
+        for i, row in enumerate(CHART_INDICATORS):
             for j, indicator in enumerate(row):
                 ax = self.axes[i, j]
                 ax.set_facecolor(self.colors['bg_accent'])
@@ -473,15 +576,83 @@ class EconomicSimulationGame:
                 # 设置坐标轴标签字体大小
                 ax.set_xlabel('回合', fontsize=20, color=self.colors['text_secondary'])
                 ax.set_ylabel('数值', fontsize=20, color=self.colors['text_secondary'])
+                ax.grid(True, alpha=0.3, color=self.colors['text_secondary'])
                 for spine in ax.spines.values():
                     spine.set_color(self.colors['text_secondary'])
 
-        plt.tight_layout(pad=2.0)
+                # 添加目标线（目标值和图例由 update_chart_targets 按场景设置）
+                self.chart_targets[indicator] = ax.axhline(y=0, color=self.colors['success'], linestyle='--',
+                                                           alpha=0.8, linewidth=2)
+
+                line_color = colors[i * 2 + j % len(colors)]
+                line, = ax.plot([], [], color=line_color, linewidth=3, marker='o', markersize=6,
+                                animated=True)
+                self.chart_lines[indicator] = (ax, line)
+
+        self.update_chart_targets()
+        self.reset_chart_limits()
+        self.fig.tight_layout(pad=2.0)
 
         # 嵌入到tkinter
-        self.canvas = FigureCanvasTkAgg(self.fig, master=chart_frame)
-        self.canvas.draw()
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self.chart_frame)
+        # 每次完整重绘（包括窗口缩放）后重新截取背景
+        self.canvas.mpl_connect('draw_event', self.on_chart_draw)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.update_charts()
+
+    def chart_target(self, indicator):
+        """当前场景中该指标的目标值和图例文字；没有相关目标时返回 None"""
+        for target_indicator, op, threshold in self.engine.scenario.objective_conditions.values():
+            if target_indicator == indicator:
+                text = f"{threshold:.1f}%" if indicator in PERCENT_INDICATORS else f"{threshold:g}"
+                return threshold, f"目标: {text}"
+        return None
+
+    def update_chart_targets(self):
+        """按当前场景的目标更新目标线和图例"""
+        for indicator, (ax, line) in self.chart_lines.items():
+            target_line = self.chart_targets[indicator]
+            target = self.chart_target(indicator)
+            target_line.set_visible(target is not None)
+            if target is None:
+                if ax.get_legend() is not None:
+                    ax.get_legend().remove()
+                continue
+            target_line.set_ydata([target[0], target[0]])
+            target_line.set_label(target[1])
+            ax.legend(handles=[target_line], loc='best', facecolor=self.colors['bg_accent'],
+                      edgecolor=self.colors['text_secondary'],
+                      labelcolor=self.colors['text_secondary'],
+                      fontsize=20)
+
+    def reset_chart_limits(self):
+        """按初始值和目标线设置坐标范围，横轴为整局回合数（最多 CHART_WINDOW 回合）"""
+        self.chart_start = 0
+        for indicator, (ax, line) in self.chart_lines.items():
+            start = self.engine.scenario.initial_data[indicator]
+            target = self.chart_target(indicator)
+            target = start if target is None else target[0]
+            margin = abs(start - target) or max(abs(start) * 0.2, 1.0)
+            ax.set_xlim(-0.5, min(self.engine.max_turns, CHART_WINDOW) + 0.5)
+            ax.set_ylim(min(start, target) - margin, max(start, target) + margin)
+
+    def move_chart_window(self, last):
+        """把横轴窗口移到让第 last 行数据位于中间，并按窗口内的数据和目标线重设纵轴范围"""
+        self.chart_start = max(0, last - CHART_WINDOW // 2)
+        for indicator, (ax, line) in self.chart_lines.items():
+            data = self.engine.data_history[indicator][self.chart_start:last + 1]
+            target = self.chart_target(indicator)
+            low = data.min() if target is None else min(data.min(), target[0])
+            high = data.max() if target is None else max(data.max(), target[0])
+            margin = (high - low) * 0.5 or max(abs(high) * 0.2, 1.0)
+            ax.set_xlim(self.chart_start - 0.5, self.chart_start + CHART_WINDOW + 0.5)
+            ax.set_ylim(low - margin, high + margin)
+
+    def on_chart_draw(self, event):
+        """完整重绘后截取各子图背景，并画上折线"""
+        for indicator, (ax, line) in self.chart_lines.items():
+            self.chart_backgrounds[indicator] = self.canvas.copy_from_bbox(ax.bbox)
+            ax.draw_artist(line)
 
     def create_control_panel(self):
         """创建底部控制面板"""
@@ -508,6 +679,32 @@ class EconomicSimulationGame:
                                    command=self.reset_game)
         self.reset_btn.pack(side=tk.LEFT)
 
+        self.undo_btn = tk.Button(left_buttons,
+                                  text="↩️ 撤销",
+                                  font=self.fonts['normal'],
+                                  fg='white',
+                                  bg=self.colors['accent'],
+                                  activebackground=self.colors['accent_light'],
+                                  border=0,
+                                  padx=20,
+                                  pady=8,
+                                  state=tk.DISABLED,
+                                  command=self.undo_policies)
+        self.undo_btn.pack(side=tk.LEFT, padx=(10, 0))
+
+        for text, command in (("💾 存档", self.save_game), ("📂 读档", self.load_game),
+                              ("🗺️ 场景", self.choose_scenario)):
+            tk.Button(left_buttons,
+                      text=text,
+                      font=self.fonts['normal'],
+                      fg=self.colors['text_primary'],
+                      bg=self.colors['bg_secondary'],
+                      activebackground=self.colors['bg_primary'],
+                      border=0,
+                      padx=20,
+                      pady=8,
+                      command=command).pack(side=tk.LEFT, padx=(10, 0))
+
         # 右侧按钮
         right_buttons = tk.Frame(button_frame, bg=self.colors['bg_accent'])
         right_buttons.pack(side=tk.RIGHT, pady=10, padx=15)
@@ -525,6 +722,18 @@ class EconomicSimulationGame:
                                        command=self.next_turn)
         self.next_turn_btn.pack(side=tk.RIGHT, padx=(10, 0))
 
+        self.forecast_btn = tk.Button(right_buttons,
+                                      text="🔮 推演未来",
+                                      font=self.fonts['normal'],
+                                      fg=self.colors['text_primary'],
+                                      bg=self.colors['bg_secondary'],
+                                      activebackground=self.colors['bg_primary'],
+                                      border=0,
+                                      padx=20,
+                                      pady=8,
+                                      command=self.toggle_forecast)
+        self.forecast_btn.pack(side=tk.RIGHT, padx=(10, 0))
+
         self.apply_btn = tk.Button(right_buttons,
                                    text="✅ 实施政策",
                                    font=self.fonts['normal'],
@@ -537,283 +746,386 @@ class EconomicSimulationGame:
                                    command=self.apply_policies)
         self.apply_btn.pack(side=tk.RIGHT, padx=(10, 0))
 
+        self.advice_btn = tk.Button(right_buttons,
+                                    text="🤖 AI 建议",
+                                    font=self.fonts['normal'],
+                                    fg=self.colors['text_primary'],
+                                    bg=self.colors['bg_secondary'],
+                                    activebackground=self.colors['bg_primary'],
+                                    border=0,
+                                    padx=20,
+                                    pady=8,
+                                    command=self.request_advice)
+        self.advice_btn.pack(side=tk.RIGHT, padx=(10, 0))
+
+    def notify(self, title, message, kind="info"):
+        """记录一条消息，并排队显示在通知栏（不阻塞事件循环）"""
+        self.log_event(title, message)
+        self.notifications.append((title, message, kind))
+        if self.notification_job is None:
+            self.show_next_notification()
+
+    def show_next_notification(self):
+        """显示队列中的下一条通知；队列为空时清空通知栏"""
+        if not self.notifications:
+            self.notification_job = None
+            self.notification_label.configure(text="", bg=self.colors['bg_accent'])
+            return
+        title, message, kind = self.notifications.popleft()
+        colors = {
+            "info": self.colors['bg_accent'],
+            "event": self.colors['warning'],
+            "warning": self.colors['danger'],
+            "success": self.colors['success'],
+        }
+        self.notification_label.configure(text=f"{title}：{message}", bg=colors[kind])
+        delay = NOTIFICATION_MS // 2 if self.notifications else NOTIFICATION_MS
+        self.notification_job = self.root.after(delay, self.show_next_notification)
+
+    def dismiss_notification(self, event=None):
+        """跳过当前通知"""
+        if self.notification_job is not None:
+            self.root.after_cancel(self.notification_job)
+            self.show_next_notification()
+
+    def clear_notifications(self):
+        """清空待显示的通知并关闭当前通知"""
+        self.notifications.clear()
+        self.dismiss_notification()
+
+    def log_event(self, title, message):
+        """在事件记录面板末尾追加一行，超过 EVENT_LOG_LIMIT 行时删除最早的记录"""
+        self.event_log.configure(state=tk.NORMAL)
+        self.event_log.insert(tk.END, f"[第 {self.engine.turn} 回合] {title}：{message}\n")
+        lines = int(self.event_log.index("end-1c").split(".")[0]) - 1
+        if lines > EVENT_LOG_LIMIT:
+            self.event_log.delete("1.0", f"{lines - EVENT_LOG_LIMIT + 1}.0")
+        self.event_log.configure(state=tk.DISABLED)
+        self.event_log.see(tk.END)
+
     def initialize_policies(self):
         """初始化政策系统"""
-        self.policies = [
-            {
-                "name": "💰 减税政策",
-                "cost": 15,
-                "cooldown": 2,
-                "description": "降低个人和企业税率，刺激经济增长，但会增加财政赤字。",
-                "effects": {
-                    "GDP增长率": 0.8,
-                    "失业率": -0.3,
-                    "财政赤字率": 1.2,
-                    "基尼系数": 0.02
-                },
-                "requirements": {"财政赤字率": 8.0}
-            },
-            {
-                "name": "🏗️ 基础设施投资",
-                "cost": 20,
-                "cooldown": 1,
-                "description": "大规模基础设施建设，创造就业，促进长期增长。",
-                "effects": {
-                    "GDP增长率": 0.6,
-                    "失业率": -0.8,
-                    "财政赤字率": 1.5,
-                    "创新指数": 2.0,
-                    "碳排放指数": 3.0
-                }
-            },
-            {
-                "name": "🎓 教育改革",
-                "cost": 18,
-                "cooldown": 3,
-                "description": "增加教育投入，提高人力资本质量。",
-                "effects": {
-                    "GDP增长率": 0.4,
-                    "教育水平": 5.0,
-                    "创新指数": 3.0,
-                    "基尼系数": -0.03,
-                    "财政赤字率": 0.8
-                }
-            },
-            {
-                "name": "🌱 绿色能源补贴",
-                "cost": 22,
-                "cooldown": 2,
-                "description": "支持可再生能源发展，减少碳排放。",
-                "effects": {
-                    "碳排放指数": -8.0,
-                    "GDP增长率": 0.3,
-                    "失业率": -0.2,
-                    "财政赤字率": 1.0,
-                    "创新指数": 2.5
-                }
-            },
-            {
-                "name": "🏥 社会保障扩展",
-                "cost": 25,
-                "cooldown": 2,
-                "description": "扩大社会保障覆盖面，提高社会福利。",
-                "effects": {
-                    "社会福利指数": 8.0,
-                    "基尼系数": -0.05,
-                    "失业率": -0.3,
-                    "财政赤字率": 2.0,
-                    "GDP增长率": -0.1
-                }
-            },
-            {
-                "name": "💡 创新激励计划",
-                "cost": 16,
-                "cooldown": 1,
-                "description": "支持研发创新，提高科技竞争力。",
-                "effects": {
-                    "创新指数": 6.0,
-                    "GDP增长率": 0.5,
-                    "教育水平": 2.0,
-                    "碳排放指数": -2.0,
-                    "财政赤字率": 0.6
-                }
-            },
-            {
-                "name": "❤️ 医疗改革",
-                "cost": 20,
-                "cooldown": 3,
-                "description": "改善医疗体系，提高公共健康水平。",
-                "effects": {
-                    "健康指数": 8.0,
-                    "社会福利指数": 4.0,
-                    "基尼系数": -0.02,
-                    "财政赤字率": 1.2
-                }
-            },
-            {
-                "name": "👷 劳动市场改革",
-                "cost": 12,
-                "cooldown": 2,
-                "description": "提高劳动市场灵活性，促进就业。",
-                "effects": {
-                    "失业率": -1.0,
-                    "GDP增长率": 0.4,
-                    "基尼系数": 0.01,
-                    "社会福利指数": -1.0
-                }
-            },
-            {
-                "name": "🌍 环境监管加强",
-                "cost": 14,
-                "cooldown": 1,
-                "description": "加强环境保护，但可能影响经济增长。",
-                "effects": {
-                    "碳排放指数": -5.0,
-                    "健康指数": 3.0,
-                    "GDP增长率": -0.2,
-                    "创新指数": 1.0
-                }
-            },
-            {
-                "name": "💹 货币宽松政策",
-                "cost": 10,
-                "cooldown": 1,
-                "description": "降低利率，刺激投资和消费。",
-                "effects": {
-                    "GDP增长率": 0.6,
-                    "失业率": -0.4,
-                    "通胀率": 0.5,
-                    "财政赤字率": -0.3
-                },
-                "requirements": {"通胀率": 4.0}
-            }
-        ]
-
+        self.policies = self.engine.policies
         self.create_policy_widgets()
+        self.refresh_policy_widgets()
 
+    @instrumented("create_policy_widgets")
     def create_policy_widgets(self):
-        """创建政策选择控件"""
-        # 清除现有控件
-        for widget in self.policy_scrollable.winfo_children():
-            widget.destroy()
-
+        """为当前场景的政策创建选择变量，并重建行控件池（之后由 refresh_policy_widgets 原地更新）"""
+        for row in self.policy_rows:
+            row["frame"].destroy()
+        self.policy_rows = []
+        self.policy_first = 0
         self.policy_vars = []
+        self.policy_selection = set()   # 已勾选的政策下标，与 policy_vars 同步
+        self.policy_enabled = [False] * len(self.policies)
 
-        for i, policy in enumerate(self.policies):
-            # 检查冷却时间
-            is_available = self.policy_cooldowns.get(policy['name'], 0) <= 0
-            can_afford = self.budget >= policy['cost']
-
-            # 创建政策框架 - 横向填满左侧页面
-            policy_frame = tk.Frame(self.policy_scrollable,
-                                    bg=self.colors['bg_accent'],
-                                    relief='ridge',
-                                    bd=2)
-            policy_frame.pack(fill=tk.BOTH, pady=3, padx=3)
-
-            # 政策主信息框架 - 填满整个policy_frame
-            main_frame = tk.Frame(policy_frame, bg=self.colors['bg_accent'])
-            main_frame.pack(fill=tk.BOTH, expand=True, padx=12, pady=10)
-
-            # 复选框和标题
+        for i in range(len(self.policies)):
             var = tk.BooleanVar()
+            # 绑定变量变化事件（每个变量只绑定一次）
+            var.trace_add('write', lambda *args, i=i: self.on_policy_var_change(i))
             self.policy_vars.append(var)
 
-            # 自定义复选框样式
-            def create_checkbox(parent, variable, enabled=True):
-                checkbox_frame = tk.Frame(parent, bg=self.colors['bg_accent'])
+        # 先建一行，布局完成后按面板高度补足其余的行
+        self.policy_rows.append(self.create_policy_row())
+        self.root.after_idle(self.layout_policy_rows)
 
-                def toggle_checkbox():
-                    if enabled:
-                        variable.set(not variable.get())
-                        update_checkbox_display()
+    def create_policy_row(self):
+        """创建一行政策控件（不对应具体政策，由 bind_policy_rows 绑定）"""
+        # 创建政策框架 - 横向填满左侧页面
+        policy_frame = tk.Frame(self.policy_list,
+                                bg=self.colors['bg_accent'],
+                                relief='ridge',
+                                bd=2)
 
-                def update_checkbox_display():
-                    if variable.get():
-                        checkbox_label.config(text="☑️", fg=self.colors['success'])
-                    else:
-                        checkbox_label.config(text="☐", fg=self.colors['text_secondary'])
+        # 政策主信息框架 - 填满整个policy_frame
+        main_frame = tk.Frame(policy_frame, bg=self.colors['bg_accent'])
+        main_frame.pack(fill=tk.BOTH, expand=True, padx=12, pady=10)
 
-                checkbox_label = tk.Label(checkbox_frame,
-                                          text="☐",
-                                          font=self.fonts['normal'],
-                                          fg=self.colors['text_secondary'] if enabled else self.colors[
-                                              'text_secondary'],
-                                          bg=self.colors['bg_accent'],
-                                          cursor="hand2" if enabled else "")
-                checkbox_label.pack()
+        row = {"frame": policy_frame, "index": None, "shown": False}
 
-                if enabled:
-                    checkbox_label.bind("<Button-1>", lambda e: toggle_checkbox())
-
-                # 绑定变量变化事件
-                variable.trace_add('write', lambda *args: update_checkbox_display())
-
-                return checkbox_frame
+        # 自定义复选框样式
+        checkbox_frame = tk.Frame(main_frame, bg=self.colors['bg_accent'])
+        checkbox_label = tk.Label(checkbox_frame,
+                                  text="☐",
+                                  font=self.fonts['normal'],
+                                  fg=self.colors['text_secondary'],
+                                  bg=self.colors['bg_accent'])
+        checkbox_label.pack()
+        checkbox_frame.pack(side=tk.LEFT, padx=(0, 12))
 
-            checkbox = create_checkbox(main_frame, var, is_available and can_afford)
-            checkbox.pack(side=tk.LEFT, padx=(0, 12))
+        def toggle_checkbox(event, row=row):
+            i = row["index"]
+            if i is not None and self.policy_enabled[i]:
+                self.policy_vars[i].set(not self.policy_vars[i].get())
 
-            # 政策名称和状态
-            title_frame = tk.Frame(main_frame, bg=self.colors['bg_accent'])
-            title_frame.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        checkbox_label.bind("<Button-1>", toggle_checkbox)
 
-            name_text = policy['name']
-            if not is_available:
-                cooldown_left = self.policy_cooldowns.get(policy['name'], 0)
-                name_text += f" (冷却中: {cooldown_left} 回合)"
+        # 政策名称和状态
+        title_frame = tk.Frame(main_frame, bg=self.colors['bg_accent'])
+        title_frame.pack(side=tk.LEFT, fill=tk.X, expand=True)
 
-            name_label = tk.Label(title_frame,
-                                  text=name_text,
-                                  font=self.fonts['normal'],
-                                  fg=self.colors['text_primary'] if is_available and can_afford
-                                  else self.colors['text_secondary'],
-                                  bg=self.colors['bg_accent'])
-            name_label.pack(side=tk.LEFT)
+        name_label = tk.Label(title_frame,
+                              text="",
+                              font=self.fonts['normal'],
+                              bg=self.colors['bg_accent'])
+        name_label.pack(side=tk.LEFT)
 
-            # 成本显示
-            cost_color = self.colors['accent'] if can_afford else self.colors['danger']
-            cost_label = tk.Label(main_frame,
-                                  text=f"💰 {policy['cost']}",
-                                  font=self.fonts['normal'],
-                                  fg=cost_color,
-                                  bg=self.colors['bg_accent'])
-            cost_label.pack(side=tk.RIGHT)
+        # 成本显示
+        cost_label = tk.Label(main_frame,
+                              text="",
+                              font=self.fonts['normal'],
+                              bg=self.colors['bg_accent'])
+        cost_label.pack(side=tk.RIGHT)
 
-            # 政策描述 - 调整wraplength以适应1/3的页面宽度
-            desc_label = tk.Label(policy_frame,
-                                  text=policy['description'],
-                                  font=self.fonts['normal'],
-                                  fg=self.colors['text_secondary'],
-                                  bg=self.colors['bg_accent'],
-                                  wraplength=1000,  # 适应1/3页面宽度
-                                  justify=tk.LEFT)
-            desc_label.pack(fill=tk.BOTH, expand=True, padx=20, pady=(0, 10))
+        # 政策描述 - 调整wraplength以适应1/3的页面宽度
+        desc_label = tk.Label(policy_frame,
+                              text="",
+                              font=self.fonts['normal'],
+                              fg=self.colors['text_secondary'],
+                              bg=self.colors['bg_accent'],
+                              wraplength=1000,  # 适应1/3页面宽度
+                              justify=tk.LEFT)
+        desc_label.pack(fill=tk.BOTH, expand=True, padx=20, pady=(0, 10))
+
+        for widget in (policy_frame, main_frame, checkbox_label, name_label, cost_label, desc_label):
+            widget.bind("<MouseWheel>", self.on_policy_mousewheel)
+
+        row.update(checkbox=checkbox_label, name=name_label, cost=cost_label, desc=desc_label)
+        return row
+
+    def layout_policy_rows(self):
+        """按政策列表的高度计算能显示的行数，行控件不够时补建"""
+        row_height = self.policy_rows[0]["frame"].winfo_reqheight() + 6  # 上下 pady 各 3
+        self.policy_visible = max(1, self.policy_list.winfo_height() // row_height)
+        # 多建一行显示被截断的下一项政策
+        while len(self.policy_rows) < min(len(self.policies), self.policy_visible + 1):
+            self.policy_rows.append(self.create_policy_row())
+        self.bind_policy_rows()
+
+    def bind_policy_rows(self):
+        """把行控件依次绑定到从 policy_first 开始的政策，并更新滚动条"""
+        n_policies = len(self.policies)
+        self.policy_first = max(0, min(self.policy_first, n_policies - self.policy_visible))
+        for offset, row in enumerate(self.policy_rows):
+            i = self.policy_first + offset
+            if i < n_policies:
+                row["index"] = i
+                self.update_policy_row(row)
+                if not row["shown"]:
+                    row["frame"].pack(fill=tk.BOTH, pady=3, padx=3)
+                    row["shown"] = True
+            else:
+                row["index"] = None
+                if row["shown"]:
+                    row["frame"].pack_forget()
+                    row["shown"] = False
+        self.policy_scrollbar.set(self.policy_first / n_policies,
+                                  min(1.0, (self.policy_first + self.policy_visible) / n_policies))
+
+    def update_policy_row(self, row):
+        """按所绑定政策的冷却、预算和勾选状态更新一行控件"""
+        i = row["index"]
+        policy = self.policies[i]
+        enabled = self.policy_enabled[i]
+
+        name_text = policy['name']
+        if not self.engine.is_policy_available(i):
+            cooldown_left = self.engine.policy_cooldowns.get(policy['name'], 0)
+            name_text += f" (冷却中: {cooldown_left} 回合)"
+
+        self.update_policy_checkbox(row)
+        row["checkbox"].configure(cursor="hand2" if enabled else "")
+        row["name"].configure(text=name_text,
+                              fg=self.colors['text_primary'] if enabled else self.colors['text_secondary'])
+        row["cost"].configure(text=f"💰 {policy['cost']}",
+                              fg=self.colors['accent'] if self.engine.can_afford(i) else self.colors['danger'])
+        row["desc"].configure(text=policy['description'])
+
+    def update_policy_checkbox(self, row):
+        if row["index"] in self.policy_selection:
+            row["checkbox"].config(text="☑️", fg=self.colors['success'])
+        else:
+            row["checkbox"].config(text="☐", fg=self.colors['text_secondary'])
+
+    def scroll_policies(self, action, amount, unit=None):
+        """滚动条回调：按整行滚动（"moveto", 位置）或（"scroll", 行数/页数, "units"/"pages"）"""
+        if action == "moveto":
+            self.policy_first = round(float(amount) * len(self.policies))
+        else:
+            self.policy_first += int(amount) * (self.policy_visible if unit == "pages" else 1)
+        self.bind_policy_rows()
+
+    def on_policy_mousewheel(self, event):
+        self.scroll_policies("scroll", -1 if event.delta > 0 else 1, "units")
+        return "break"
+
+    def on_policy_var_change(self, i):
+        """勾选状态改变：同步选择集合，更新该政策所在的行（如果正在显示）"""
+        if self.policy_vars[i].get():
+            self.policy_selection.add(i)
+        else:
+            self.policy_selection.discard(i)
+        offset = i - self.policy_first
+        if 0 <= offset < len(self.policy_rows) and self.policy_rows[offset]["index"] == i:
+            self.update_policy_checkbox(self.policy_rows[offset])
+        self.on_selection_change()
+
+    def selected_policy_indices(self):
+        """当前勾选的政策下标（升序）"""
+        return sorted(self.policy_selection)
+
+    @instrumented("refresh_policy_widgets")
+    def refresh_policy_widgets(self):
+        """按当前冷却和预算更新各政策的可选状态并清空选择；只重新配置正在显示的行"""
+        engine = self.engine
+        self.policy_enabled = [engine.is_policy_available(i) and engine.can_afford(i)
+                               for i in range(len(self.policies))]
+        for i in self.selected_policy_indices():
+            self.policy_vars[i].set(False)
+        self.bind_policy_rows()
+
+    def on_selection_change(self, *args):
+        """政策选择改变时，基于旧选择的后台推演作废，并更新结果预估"""
+        self.cancel_forecast()
+        self.schedule_preview()
+
+    def schedule_preview(self):
+        """空闲时更新结果预估；同一批勾选变化（如清空全部选择）只计算一次"""
+        if not self.preview_pending:
+            self.preview_pending = True
+            self.root.after_idle(self.update_preview)
+
+    @instrumented("update_preview")
+    def update_preview(self):
+        """按当前勾选的政策显示本回合结束和游戏结束时的预估结果"""
+        self.preview_pending = False
+        engine = self.engine
+        if engine.game_over or engine.rng.used:
+            # 本回合已经实施过政策，没有可预估的选择
+            self.preview = None
+            for label in (*self.projection_labels.values(), *self.objective_projection_labels.values(),
+                          self.projection_summary):
+                label.configure(text="")
+            return
 
+        # 同一局面（回合、历史、预算）只抽取一次样本，之后的勾选变化增量计算
+        state = (engine.history_node, engine.turn, engine.budget)
+        if self.preview is None or self.preview_state != state:
+            from outcome_preview import OutcomePreview
+            self.preview = OutcomePreview(engine.snapshot(), scenario=engine.scenario)
+            self.preview_state = state
+
+        projection = self.preview.evaluate(self.selected_policy_indices())
+
+        for indicator, label in self.projection_labels.items():
+            value = projection.turn_values[indicator]
+            label.configure(text=f"→ {value:.3f} " if indicator == "基尼系数" else f"→ {value:.1f} ")
+        for name, label in self.objective_projection_labels.items():
+            label.configure(text=f"{projection.turn_objectives[name]:.0%} / {projection.final_objectives[name]:.0%}")
+        if not projection.valid:
+            summary = "⚠️ 所选政策无法实施"
+        else:
+            # 回合很多的场景只预估到若干回合之后
+            horizon = ("终局预估" if projection.final_turn is None
+                       else f"第 {projection.final_turn} 回合预估")
+            summary = (f"{horizon}（之后不再实施政策）：胜利 {projection.win_rate:.0%} · "
+                       f"倒台 {projection.failure_rate:.0%} · 得分 {projection.mean_score:.1f}")
+        self.projection_summary.configure(text=summary)
+
+    def toggle_forecast(self):
+        """在后台推演按当前选择实施政策后的未来；推演进行中再次点击则取消"""
+        if self.jobs.busy("forecast"):
+            self.cancel_forecast()
+            return
+        if self.engine.game_over:
+            return
+        # 本回合已经实施过政策时，只推演之后的自然发展
+        selection = [] if self.engine.rng.used else self.selected_policy_indices()
+        self.jobs.submit(simulate_futures, self.engine.snapshot(), [selection], FORECAST_GAMES,
+                         group="forecast", scenario=self.engine.scenario,
+                         on_progress=self.on_forecast_progress,
+                         on_result=lambda result: self.on_forecast_result(selection, result),
+                         on_error=self.on_forecast_error)
+        self.forecast_btn.configure(text="⏹️ 推演中 0%")
+
+    def on_forecast_progress(self, done, total):
+        self.forecast_btn.configure(text=f"⏹️ 推演中 {done * 100 // total}%")
+
+    def on_forecast_result(self, selection, result):
+        self.forecast_btn.configure(text="🔮 推演未来")
+        names = "、".join(self.policies[i]['name'] for i in selection) or "不再实施政策"
+        self.notify("🔮 推演结果",
+                    f"{names}：{len(result)} 局中胜率 {result.win_rate():.1%}，"
+                    f"平均得分 {result.mean_score():.1f}", "info")
+
+    def on_forecast_error(self, error):
+        self.forecast_btn.configure(text="🔮 推演未来")
+        self.notify("⚠️ 推演失败", str(error), "warning")
+
+    def cancel_forecast(self):
+        if self.jobs.cancel("forecast"):
+            self.forecast_btn.configure(text="🔮 推演未来")
+
+    def suggest_best_selection(self):
+        """勾选本回合期望目标收益最大的政策组合（单回合精确求解）"""
+        engine = self.engine
+        if engine.game_over or engine.rng.used:
+            return
+        best = selection_solver(engine.scenario).solve_engine(engine)
+        for i in self.selected_policy_indices():
+            self.policy_vars[i].set(False)
+        for i in best.indices:
+            self.policy_vars[i].set(True)
+        if best.indices:
+            names = "、".join(self.policies[i]['name'] for i in best.indices)
+            self.notify("🧮 最优组合", f"{names}（成本 {best.cost}，期望目标收益 {best.gain:.1f}）")
+        else:
+            self.notify("🧮 最优组合", "本回合没有能提高目标的政策", "warning")
+
+    def request_advice(self):
+        """在后台让 AI 顾问为本回合给出建议，完成后勾选建议的政策"""
+        engine = self.engine
+        if engine.game_over or engine.rng.used or self.jobs.busy("advice"):
+            return
+        # 顾问在分出的引擎上计算；返回时局面已经改变则建议作废
+        state = (engine.history_node, engine.turn, engine.budget)
+        self.jobs.submit(advise, engine.fork(), group="advice",
+                         on_result=lambda selection: self.on_advice_result(state, selection),
+                         on_error=self.on_advice_error)
+        self.advice_btn.configure(text="🤖 思考中…", state=tk.DISABLED)
+
+    def on_advice_result(self, state, selection):
+        self.advice_btn.configure(text="🤖 AI 建议", state=tk.NORMAL)
+        engine = self.engine
+        if engine.rng.used or state != (engine.history_node, engine.turn, engine.budget):
+            return
+        for i in self.selected_policy_indices():
+            self.policy_vars[i].set(False)
+        for i in selection:
+            self.policy_vars[i].set(True)
+        names = "、".join(self.policies[i]['name'] for i in selection)
+        self.notify("🤖 AI 建议", names or "本回合没有可以实施的政策")
+
+    def on_advice_error(self, error):
+        self.advice_btn.configure(text="🤖 AI 建议", state=tk.NORMAL)
+        self.notify("⚠️ AI 建议失败", str(error), "warning")
+
+    @instrumented("ui_apply_policies")
     def apply_policies(self):
         """应用选中的政策"""
-        selected_indices = [i for i, var in enumerate(self.policy_vars) if var.get()]
-
-        if not selected_indices:
-            messagebox.showwarning("⚠️ 警告", "请至少选择一项政策。")
-            return
-
-        total_cost = sum(self.policies[i]['cost'] for i in selected_indices)
+        selected_indices = self.selected_policy_indices()
 
-        if total_cost > self.budget:
-            messagebox.showwarning("💸 预算不足",
-                                   f"选中政策总成本 {total_cost} 超过可用预算 {self.budget}。")
+        try:
+            event = self.engine.apply_policies(selected_indices)
+        except PolicyError as e:
+            self.notify(e.title, e.message.replace("\n", " "), "warning")
             return
 
-        # 检查政策要求
-        for i in selected_indices:
-            policy = self.policies[i]
-            if 'requirements' in policy:
-                for indicator, max_value in policy['requirements'].items():
-                    if self.economic_data[indicator] > max_value:
-                        messagebox.showwarning("❌ 条件不满足",
-                                               f"政策 '{policy['name']}' 要求 {indicator} 不超过 {max_value}，"
-                                               f"当前值为 {self.economic_data[indicator]:.1f}。")
-                        return
-
-        # 应用政策效果
-        self.selected_policies = [self.policies[i] for i in selected_indices]
-        self.budget -= total_cost
-
-        for policy in self.selected_policies:
-            # 设置冷却时间
-            self.policy_cooldowns[policy['name']] = policy['cooldown']
-
-            # 应用效果
-            for indicator, effect in policy['effects'].items():
-                if indicator in self.economic_data:
-                    # 添加一些随机性
-                    random_factor = 1.0 + random.uniform(-0.1, 0.1)
-                    actual_effect = effect * random_factor
-                    self.economic_data[indicator] += actual_effect
-
-        # 触发随机事件
-        self.trigger_random_events()
+        if selected_indices:
+            self.log_event("✅ 实施政策", "、".join(self.policies[i]['name'] for i in selected_indices))
+        if event is not None:
+            self.notify("🎲 随机事件", f"{event['name']}：{event['description']}", "event")
 
         # 更新显示
         self.update_display()
@@ -821,373 +1133,259 @@ class EconomicSimulationGame:
         # 更新按钮状态
         self.apply_btn.configure(state=tk.DISABLED)
         self.next_turn_btn.configure(state=tk.NORMAL)
+        self.undo_btn.configure(state=tk.NORMAL)
 
         # 检查游戏结束条件
         self.check_game_end()
 
-    def trigger_random_events(self):
-        """触发随机事件"""
-        if random.random() < 0.3:  # 30%概率发生随机事件
-            events = [
-                {
-                    "name": "🌍 全球经济衰退",
-                    "description": "全球经济形势恶化，影响本国经济。",
-                    "effects": {"GDP增长率": -0.5, "失业率": 0.3, "财政赤字率": 0.5}
-                },
-                {
-                    "name": "🚀 技术突破",
-                    "description": "重大技术突破促进经济发展。",
-                    "effects": {"GDP增长率": 0.4, "创新指数": 3.0, "碳排放指数": -2.0}
-                },
-                {
-                    "name": "🌪️ 自然灾害",
-                    "description": "自然灾害造成经济损失。",
-                    "effects": {"GDP增长率": -0.3, "财政赤字率": 0.8, "健康指数": -2.0}
-                },
-                {
-                    "name": "🤝 国际贸易协定",
-                    "description": "签署有利的国际贸易协定。",
-                    "effects": {"GDP增长率": 0.3, "失业率": -0.2}
-                }
-            ]
-
-            event = random.choice(events)
-            self.random_events.append(event)
-
-            # 应用事件效果
-            for indicator, effect in event['effects'].items():
-                if indicator in self.economic_data:
-                    self.economic_data[indicator] += effect
-
-            messagebox.showinfo("🎲 随机事件", f"{event['name']}\n\n{event['description']}")
+    def undo_policies(self):
+        """撤销最近一次实施的政策，恢复到实施前的状态并保留当时的选择"""
+        undone = self.engine.selected_indices
+        if self.engine.game_over or not self.engine.undo():
+            return
+        self.after_state_change()
+        for i in undone:
+            self.policy_vars[i].set(True)
+        self.log_event("↩️ 撤销", "恢复到实施政策之前")
+
+    def save_game(self):
+        """把当前状态存档到文件"""
+        path = filedialog.asksaveasfilename(defaultextension=".json",
+                                            filetypes=[("游戏存档", "*.json")])
+        if path:
+            save_snapshot(self.engine.snapshot(), path)
+
+    def load_game(self):
+        """从存档文件恢复游戏"""
+        path = filedialog.askopenfilename(filetypes=[("游戏存档", "*.json")])
+        if not path:
+            return
+        try:
+            snapshot = load_snapshot(path)
+        except (OSError, ValueError, KeyError) as e:
+            self.notify("⚠️ 读档失败", str(e), "warning")
+            return
+        if snapshot.scenario != self.engine.scenario.key:
+            self.notify("⚠️ 读档失败", "该存档属于其他场景，请先切换到存档时的场景", "warning")
+            return
+        self.engine.restore_snapshot(snapshot)
+        self.engine.undo_stack = []
+        self.after_state_change()
+        self.notify("📂 读档", os.path.basename(path))
 
+    def after_state_change(self):
+        """撤销或读档后刷新界面和按钮状态"""
+        self.update_display()
+        self.refresh_policy_widgets()
+        finished = self.engine.game_over
+        applied = self.engine.rng.used  # 本回合已经实施过政策
+        self.apply_btn.configure(state=tk.DISABLED if finished or applied else tk.NORMAL)
+        self.next_turn_btn.configure(state=tk.NORMAL if applied and not finished else tk.DISABLED)
+        self.undo_btn.configure(state=tk.NORMAL if self.engine.undo_stack and not finished else tk.DISABLED)
+
+    @instrumented("ui_next_turn")
     def next_turn(self):
         """进入下一回合"""
-        self.turn += 1
-
-        # 恢复预算
-        self.budget = min(self.max_budget, self.budget + 30)
-
-        # 减少政策冷却时间
-        for policy_name in list(self.policy_cooldowns.keys()):
-            self.policy_cooldowns[policy_name] -= 1
-            if self.policy_cooldowns[policy_name] <= 0:
-                del self.policy_cooldowns[policy_name]
-
-        # 自然变化（经济的内在动态）
-        self.apply_natural_changes()
-
-        # 记录历史数据
-        for key, value in self.economic_data.items():
-            self.data_history[key].append(value)
-        self.budget_history.append(self.budget)
+        finished = self.engine.next_turn()
 
         # 更新显示
         self.update_display()
-        self.create_policy_widgets()
+        self.refresh_policy_widgets()
 
         # 重置按钮状态
         self.apply_btn.configure(state=tk.NORMAL)
         self.next_turn_btn.configure(state=tk.DISABLED)
 
         # 检查游戏结束
-        if self.turn > self.max_turns:
+        if finished:
             self.end_game()
 
-    def apply_natural_changes(self):
-        """应用自然经济变化"""
-        # GDP增长率向长期趋势回归
-        target_gdp_growth = 2.5
-        self.economic_data["GDP增长率"] += (target_gdp_growth - self.economic_data["GDP增长率"]) * 0.1
-
-        # 失业率受GDP增长影响
-        if self.economic_data["GDP增长率"] > 3.0:
-            self.economic_data["失业率"] -= 0.1
-        elif self.economic_data["GDP增长率"] < 1.0:
-            self.economic_data["失业率"] += 0.2
-
-        # 通胀率小幅波动
-        self.economic_data["通胀率"] += random.uniform(-0.2, 0.2)
-
-        # 添加一些随机噪声
-        for key in self.economic_data:
-            noise = random.uniform(-0.05, 0.05)
-            self.economic_data[key] += noise
-
-        # 确保数值在合理范围内
-        self.clamp_values()
-
-    def clamp_values(self):
-        """限制数值在合理范围内"""
-        ranges = {
-            "GDP增长率": (-5.0, 10.0),
-            "失业率": (0.0, 25.0),
-            "通胀率": (-2.0, 15.0),
-            "财政赤字率": (-5.0, 20.0),
-            "基尼系数": (0.2, 0.8),
-            "碳排放指数": (0.0, 200.0),
-            "社会福利指数": (0.0, 100.0),
-            "创新指数": (0.0, 100.0),
-            "教育水平": (0.0, 100.0),
-            "健康指数": (0.0, 100.0)
-        }
-
-        for key, (min_val, max_val) in ranges.items():
-            if key in self.economic_data:
-                self.economic_data[key] = max(min_val, min(max_val, self.economic_data[key]))
-
+    @instrumented("update_display")
     def update_display(self):
         """更新所有显示元素"""
         # 更新回合和预算显示
-        self.turn_label.configure(text=f"📅 第 {self.turn} 回合 / {self.max_turns}")
-        self.budget_label.configure(text=f"💰 政策预算: {self.budget} 点")
+        self.turn_label.configure(text=f"📅 第 {self.engine.turn} 回合 / {self.engine.max_turns}")
+        self.budget_label.configure(text=f"💰 政策预算: {self.engine.budget} 点")
 
-        # 更新经济指标
+        # 更新经济指标（所有指标的好坏一次性判断）
+        states = self.engine.indicator_states()
         for indicator, label in self.indicator_labels.items():
-            value = self.economic_data[indicator]
+            value = self.engine.economic_data[indicator]
             if indicator in ["基尼系数"]:
                 text = f"{value:.3f}"
             else:
                 text = f"{value:.1f}"
 
             # 根据指标好坏设置颜色
-            if self.is_indicator_good(indicator, value):
+            if states[indicator] == INDICATOR_GOOD:
                 color = self.colors['success']
-            elif self.is_indicator_bad(indicator, value):
+            elif states[indicator] == INDICATOR_BAD:
                 color = self.colors['danger']
             else:
                 color = self.colors['warning']
 
             label.configure(text=text, fg=color)
 
+        # 额外指标只汇总好坏的数量
+        extras = self.engine.scenario.extra_indicators
+        if extras:
+            extra_states = [states[k] for k in extras]
+            good, bad = extra_states.count(INDICATOR_GOOD), extra_states.count(INDICATOR_BAD)
+            self.extra_indicators_label.configure(
+                text=f"📊 其他 {len(extras)} 项指标：良好 {good} · 一般 {len(extras) - good - bad} · 糟糕 {bad}")
+        else:
+            self.extra_indicators_label.configure(text="")
+
         # 更新目标完成状态
         self.update_objectives()
 
         # 更新图表
         self.update_charts()
 
-    def is_indicator_good(self, indicator, value):
-        """判断指标是否良好"""
-        good_ranges = {
-            "GDP增长率": value >= 3.0,
-            "失业率": value <= 4.0,
-            "通胀率": 1.0 <= value <= 3.0,
-            "财政赤字率": value <= 3.0,
-            "基尼系数": value <= 0.35,
-            "碳排放指数": value <= 70.0,
-            "社会福利指数": value >= 80.0,
-            "创新指数": value >= 80.0,
-            "教育水平": value >= 85.0,
-            "健康指数": value >= 85.0
-        }
-        return good_ranges.get(indicator, False)
-
-    def is_indicator_bad(self, indicator, value):
-        """判断指标是否糟糕"""
-        bad_ranges = {
-            "GDP增长率": value <= 0.0,
-            "失业率": value >= 10.0,
-            "通胀率": value >= 5.0 or value <= -1.0,
-            "财政赤字率": value >= 8.0,
-            "基尼系数": value >= 0.6,
-            "碳排放指数": value >= 150.0,
-            "社会福利指数": value <= 40.0,
-            "创新指数": value <= 30.0,
-            "教育水平": value <= 40.0,
-            "健康指数": value <= 40.0
-        }
-        return bad_ranges.get(indicator, False)
+        # 局面变化后重新预估
+        self.schedule_preview()
 
     def update_objectives(self):
         """更新目标完成状态"""
-        objectives_check = {
-            "📈 经济发展": self.economic_data["GDP增长率"] >= 4.0,
-            "👥 社会稳定": self.economic_data["失业率"] <= 4.0,
-            "🌱 环境保护": self.economic_data["碳排放指数"] <= 70,
-            "⚖️ 社会公平": self.economic_data["基尼系数"] <= 0.35
-        }
-
-        for name, completed in objectives_check.items():
-            self.objectives[name]["completed"] = completed
-            status = "✅" if completed else "❌"
+        for name, obj in self.engine.objectives.items():
+            status = "✅" if obj["completed"] else "❌"
             self.objective_labels[name].configure(text=status)
 
+    @instrumented("update_charts")
     def update_charts(self):
-        """更新图表显示"""
-        if len(self.data_history["GDP增长率"]) < 2:
+        """更新图表显示：只更新折线数据，超出坐标范围时才完整重绘"""
+        if self.canvas is None:
+            return
+        data_history = self.engine.data_history
+
+        # 只画横轴窗口内的数据，每回合的绘制量不随对局长度增长
+        rescaled = False
+        last = data_history.size - 1
+        if not self.chart_start <= last <= self.chart_start + CHART_WINDOW:
+            self.move_chart_window(last)
+            rescaled = True
+        x = range(self.chart_start, last + 1)
+
+        for indicator, (ax, line) in self.chart_lines.items():
+            if data_history.size < 2:
+                line.set_data([], [])
+                continue
+            # 直接使用历史存储的零拷贝视图
+            data = data_history[indicator][self.chart_start:]
+            line.set_data(x, data)
+            low, high = ax.get_ylim()
+            if data.min() < low or data.max() > high:
+                low = min(low, data.min())
+                high = max(high, data.max())
+                margin = (high - low) * 0.5
+                ax.set_ylim(low - margin, high + margin)
+                rescaled = True
+
+        if rescaled or len(self.chart_backgrounds) < len(self.chart_lines):
+            self.canvas.draw()
             return
 
-        x = range(len(self.data_history["GDP增长率"]))
-
-        # 清除所有子图
-        for ax in self.axes.flat:
-            ax.clear()
-            ax.set_facecolor(self.colors['bg_accent'])
-
-        # 绘制各个指标
-        indicators_to_plot = [
-            ["GDP增长率", "失业率"],
-            ["基尼系数", "碳排放指数"]
-        ]
-
-        colors = self.colors['chart_colors']
-
-        for i, row in enumerate(indicators_to_plot):
-            for j, indicator in enumerate(row):
-                ax = self.axes[i, j]
-                data = self.data_history[indicator]
-
-                # 绘制线图
-                line_color = colors[i * 2 + j % len(colors)]
-                ax.plot(x, data, color=line_color, linewidth=3, marker='o', markersize=6)
-
-                # 设置标题和样式 - 所有文字都是20pt
-                ax.set_title(indicator, color=self.colors['text_primary'],
-                             fontsize=20, fontweight='bold', pad=15)
-                ax.tick_params(colors=self.colors['text_secondary'], labelsize=20)
-                # 设置坐标轴标签字体大小为20pt
-                ax.set_xlabel('回合', fontsize=20, color=self.colors['text_secondary'])
-                ax.set_ylabel('数值', fontsize=20, color=self.colors['text_secondary'])
-                ax.grid(True, alpha=0.3, color=self.colors['text_secondary'])
-
-                # 设置边框颜色
-                for spine in ax.spines.values():
-                    spine.set_color(self.colors['text_secondary'])
-
-                # 添加目标线（如果有的话）
-                if indicator == "GDP增长率":
-                    ax.axhline(y=4.0, color=self.colors['success'], linestyle='--',
-                               alpha=0.8, linewidth=2, label='目标: 4.0%')
-                elif indicator == "失业率":
-                    ax.axhline(y=4.0, color=self.colors['success'], linestyle='--',
-                               alpha=0.8, linewidth=2, label='目标: 4.0%')
-                elif indicator == "基尼系数":
-                    ax.axhline(y=0.35, color=self.colors['success'], linestyle='--',
-                               alpha=0.8, linewidth=2, label='目标: 0.35')
-                elif indicator == "碳排放指数":
-                    ax.axhline(y=70.0, color=self.colors['success'], linestyle='--',
-                               alpha=0.8, linewidth=2, label='目标: 70')
-
-                # 添加图例 - 字体大小设置为20pt
-                ax.legend(loc='best', facecolor=self.colors['bg_accent'],
-                          edgecolor=self.colors['text_secondary'],
-                          labelcolor=self.colors['text_secondary'],
-                          fontsize=20)
-
-        plt.tight_layout(pad=2.0)
-        self.canvas.draw()
+        for indicator, (ax, line) in self.chart_lines.items():
+            self.canvas.restore_region(self.chart_backgrounds[indicator])
+            ax.draw_artist(line)
+            self.canvas.blit(ax.bbox)
 
     def check_game_end(self):
         """检查游戏结束条件"""
-        # 检查胜利条件
-        completed_objectives = sum(1 for obj in self.objectives.values() if obj["completed"])
-
-        if completed_objectives >= 3:
-            messagebox.showinfo("🎉 胜利！",
-                                f"恭喜！您已完成 {completed_objectives}/4 个主要目标，"
-                                f"成功领导国家走向繁荣！")
-            self.end_game()
+        result = self.engine.check_game_end()
+        if result is None:
             return
 
-        # 检查失败条件
-        failure_conditions = [
-            ("经济崩溃", self.economic_data["GDP增长率"] <= -3.0),
-            ("财政危机", self.economic_data["财政赤字率"] >= 15.0),
-            ("社会动荡", self.economic_data["失业率"] >= 20.0),
-            ("恶性通胀", self.economic_data["通胀率"] >= 10.0)
-        ]
-
-        for condition_name, condition in failure_conditions:
-            if condition:
-                messagebox.showinfo("💥 游戏结束",
-                                    f"游戏结束！{condition_name}导致政府倒台。")
-                self.end_game()
-                return
+        outcome, detail = result
+        if outcome == "victory":
+            self.notify("🎉 胜利！",
+                        f"恭喜！您已完成 {detail}/{len(self.engine.objectives)} 个主要目标，成功领导国家走向繁荣！",
+                        "success")
+        else:
+            self.notify("💥 游戏结束", f"{detail}导致政府倒台。", "warning")
+        self.end_game()
 
     def end_game(self):
         """结束游戏"""
         self.apply_btn.configure(state=tk.DISABLED)
         self.next_turn_btn.configure(state=tk.DISABLED)
+        # 结束的对局不能再撤销回去继续
+        self.undo_btn.configure(state=tk.DISABLED)
 
         # 显示最终得分
-        score = self.calculate_final_score()
-        completed = sum(1 for obj in self.objectives.values() if obj["completed"])
+        score = self.engine.calculate_final_score()
+        completed = self.engine.completed_objectives()
 
-        result_msg = f"🏛️ 游戏结束！\n\n"
-        result_msg += f"📊 完成目标: {completed}/4\n"
-        result_msg += f"🏆 最终得分: {score:.1f}\n\n"
-        result_msg += "🎯 目标完成情况：\n"
-
-        for name, obj in self.objectives.items():
-            status = "✅" if obj["completed"] else "❌"
-            result_msg += f"{status} {name}\n"
-
-        messagebox.showinfo("📋 游戏总结", result_msg)
-
-    def calculate_final_score(self):
-        """计算最终得分"""
-        score = 0
-
-        # 基础得分基于目标完成情况
-        completed_objectives = sum(1 for obj in self.objectives.values() if obj["completed"])
-        score += completed_objectives * 25
-
-        # 各项指标的额外得分
-        if self.economic_data["GDP增长率"] >= 3.0:
-            score += 10
-        if self.economic_data["失业率"] <= 5.0:
-            score += 10
-        if self.economic_data["财政赤字率"] <= 5.0:
-            score += 10
-        if self.economic_data["社会福利指数"] >= 70.0:
-            score += 5
-        if self.economic_data["创新指数"] >= 70.0:
-            score += 5
-
-        return score
+        objectives = " ".join(("✅" if obj["completed"] else "❌") + name
+                              for name, obj in self.engine.objectives.items())
+        self.notify("📋 游戏总结", f"完成目标 {completed}/{len(self.engine.objectives)}，最终得分 {score:.1f}", "info")
+        self.log_event("🎯 目标完成情况", objectives)
 
     def reset_game(self):
         """重置游戏"""
-        self.turn = 1
-        self.budget = 100
-
-        # 重置经济数据
-        self.economic_data = {
-            "GDP增长率": 2.5,
-            "失业率": 6.0,
-            "通胀率": 2.0,
-            "财政赤字率": 3.0,
-            "基尼系数": 0.45,
-            "碳排放指数": 100.0,
-            "社会福利指数": 65.0,
-            "创新指数": 60.0,
-            "教育水平": 70.0,
-            "健康指数": 75.0
-        }
+        self.engine.reset()
+        self.start_new_game("🔄 重新开始", "新的一局")
 
-        # 重置历史数据
-        self.data_history = {key: [value] for key, value in self.economic_data.items()}
-        self.budget_history = [self.budget]
-
-        # 重置政策系统
-        self.selected_policies = []
-        self.policy_cooldowns = {}
-        self.random_events = []
+    def choose_scenario(self):
+        """从场景文件开始新的一局"""
+        path = filedialog.askopenfilename(initialdir=SCENARIO_DIR, filetypes=[("场景文件", "*.json")])
+        if not path:
+            return
+        try:
+            scenario = load_scenario(path)
+        except (OSError, ScenarioError) as e:
+            self.notify("⚠️ 场景无效", str(e), "warning")
+            return
+        self.set_scenario(scenario)
 
-        # 重置目标
-        for obj in self.objectives.values():
-            obj["completed"] = False
+    def set_scenario(self, scenario):
+        """切换场景：重建政策和目标控件并开始新的一局"""
+        self.cancel_forecast()
+        self.engine.set_scenario(scenario)
+        self.policies = self.engine.policies
+        self.create_policy_widgets()
+        self.create_objective_rows()
+        self.update_title()
+        self.refresh_instructions()
+        if self.canvas is not None:
+            self.update_chart_targets()
+        self.start_new_game("🗺️ 切换场景", f"{scenario.name}：{scenario.description}")
+
+    def update_title(self):
+        scenario = self.engine.scenario
+        self.root.title("公共经济学模拟游戏" if scenario.key == "default"
+                        else f"公共经济学模拟游戏 - {scenario.name}")
+
+    def start_new_game(self, title, message):
+        """新的一局开始后刷新界面"""
+        self.clear_notifications()
+        self.log_event(title, message)
+        if self.canvas is not None:
+            self.reset_chart_limits()
+            self.canvas.draw()
 
         # 更新显示
         self.update_display()
-        self.create_policy_widgets()
+        self.refresh_policy_widgets()
 
         # 重置按钮状态
         self.apply_btn.configure(state=tk.NORMAL)
         self.next_turn_btn.configure(state=tk.DISABLED)
+        self.undo_btn.configure(state=tk.DISABLED)
 
 
 if __name__ == "__main__":
+    # 设置 ECONOMIC_GAME_PROFILE=<文件路径> 时记录各阶段耗时，关闭窗口后写出摘要
+    profile_path = os.environ.get("ECONOMIC_GAME_PROFILE")
+    stats = register_collector(PhaseStats()) if profile_path else None
+
+    # 可以在命令行指定场景文件：python "economic game.py" scenario_data/hard.json
+    scenario = load_scenario(sys.argv[1]) if len(sys.argv) > 1 else None
+
     root = tk.Tk()
-    game = EconomicSimulationGame(root)
-    root.mainloop()
\ No newline at end of file
+    game = EconomicSimulationGame(root, scenario)
+    root.mainloop()
+    game.jobs.shutdown()
+
+    if stats is not None:
+        stats.dump(profile_path)
\ No newline at end of file
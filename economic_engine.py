@@ -0,0 +1,795 @@
+"""公共经济学模拟游戏 - 无界面模拟引擎
+
+本模块只包含游戏逻辑，不依赖 tkinter 或 matplotlib，
+既可以被图形界面调用，也可以直接用于批量模拟和策略评估。
+下面的常量构成默认场景；其他场景（不同国家、难度、回合数）由 scenarios.py 从数据文件加载。
+"""
+import copy
+
+from history_store import HistoryStore
+from instrumentation import instrumented, phase
+from rng_streams import GameRandom
+from snapshots import GameSnapshot, HistoryNode
+
+# 初始经济指标
+INITIAL_ECONOMIC_DATA = {
+    "GDP增长率": 2.5,
+    "失业率": 6.0,
+    "通胀率": 2.0,
+    "财政赤字率": 3.0,
+    "基尼系数": 0.45,
+    "碳排放指数": 100.0,
+    "社会福利指数": 65.0,
+    "创新指数": 60.0,
+    "教育水平": 70.0,
+    "健康指数": 75.0
+}
+
+# 各指标的合理范围
+INDICATOR_RANGES = {
+    "GDP增长率": (-5.0, 10.0),
+    "失业率": (0.0, 25.0),
+    "通胀率": (-2.0, 15.0),
+    "财政赤字率": (-5.0, 20.0),
+    "基尼系数": (0.2, 0.8),
+    "碳排放指数": (0.0, 200.0),
+    "社会福利指数": (0.0, 100.0),
+    "创新指数": (0.0, 100.0),
+    "教育水平": (0.0, 100.0),
+    "健康指数": (0.0, 100.0)
+}
+
+# 游戏参数
+MAX_TURNS = 12
+INITIAL_BUDGET = 100
+MAX_BUDGET = 100
+BUDGET_PER_TURN = 30
+EVENT_PROBABILITY = 0.3  # 30%概率发生随机事件
+EFFECT_NOISE = 0.1  # 政策效果±10%的随机波动
+
+# 自然变化：GDP增长率每回合向长期趋势回归的比例；
+# GDP增长率高于 GDP_BOOM 时失业率变化 UNEMPLOYMENT_BOOM_CHANGE，低于 GDP_SLUMP 时变化 UNEMPLOYMENT_SLUMP_CHANGE
+GDP_TREND = 2.5
+GDP_REVERSION = 0.1
+GDP_BOOM = 3.0
+GDP_SLUMP = 1.0
+UNEMPLOYMENT_BOOM_CHANGE = -0.1
+UNEMPLOYMENT_SLUMP_CHANGE = 0.2
+
+# 政策定义
+POLICIES = [
+    {
+        "name": "💰 减税政策",
+        "cost": 15,
+        "cooldown": 2,
+        "description": "降低个人和企业税率，刺激经济增长，但会增加财政赤字。",
+        "effects": {
+            "GDP增长率": 0.8,
+            "失业率": -0.3,
+            "财政赤字率": 1.2,
+            "基尼系数": 0.02
+        },
+        "requirements": {"财政赤字率": 8.0}
+    },
+    {
+        "name": "🏗️ 基础设施投资",
+        "cost": 20,
+        "cooldown": 1,
+        "description": "大规模基础设施建设，创造就业，促进长期增长。",
+        "effects": {
+            "GDP增长率": 0.6,
+            "失业率": -0.8,
+            "财政赤字率": 1.5,
+            "创新指数": 2.0,
+            "碳排放指数": 3.0
+        }
+    },
+    {
+        "name": "🎓 教育改革",
+        "cost": 18,
+        "cooldown": 3,
+        "description": "增加教育投入，提高人力资本质量。",
+        "effects": {
+            "GDP增长率": 0.4,
+            "教育水平": 5.0,
+            "创新指数": 3.0,
+            "基尼系数": -0.03,
+            "财政赤字率": 0.8
+        }
+    },
+    {
+        "name": "🌱 绿色能源补贴",
+        "cost": 22,
+        "cooldown": 2,
+        "description": "支持可再生能源发展，减少碳排放。",
+        "effects": {
+            "碳排放指数": -8.0,
+            "GDP增长率": 0.3,
+            "失业率": -0.2,
+            "财政赤字率": 1.0,
+            "创新指数": 2.5
+        }
+    },
+    {
+        "name": "🏥 社会保障扩展",
+        "cost": 25,
+        "cooldown": 2,
+        "description": "扩大社会保障覆盖面，提高社会福利。",
+        "effects": {
+            "社会福利指数": 8.0,
+            "基尼系数": -0.05,
+            "失业率": -0.3,
+            "财政赤字率": 2.0,
+            "GDP增长率": -0.1
+        }
+    },
+    {
+        "name": "💡 创新激励计划",
+        "cost": 16,
+        "cooldown": 1,
+        "description": "支持研发创新，提高科技竞争力。",
+        "effects": {
+            "创新指数": 6.0,
+            "GDP增长率": 0.5,
+            "教育水平": 2.0,
+            "碳排放指数": -2.0,
+            "财政赤字率": 0.6
+        }
+    },
+    {
+        "name": "❤️ 医疗改革",
+        "cost": 20,
+        "cooldown": 3,
+        "description": "改善医疗体系，提高公共健康水平。",
+        "effects": {
+            "健康指数": 8.0,
+            "社会福利指数": 4.0,
+            "基尼系数": -0.02,
+            "财政赤字率": 1.2
+        }
+    },
+    {
+        "name": "👷 劳动市场改革",
+        "cost": 12,
+        "cooldown": 2,
+        "description": "提高劳动市场灵活性，促进就业。",
+        "effects": {
+            "失业率": -1.0,
+            "GDP增长率": 0.4,
+            "基尼系数": 0.01,
+            "社会福利指数": -1.0
+        }
+    },
+    {
+        "name": "🌍 环境监管加强",
+        "cost": 14,
+        "cooldown": 1,
+        "description": "加强环境保护，但可能影响经济增长。",
+        "effects": {
+            "碳排放指数": -5.0,
+            "健康指数": 3.0,
+            "GDP增长率": -0.2,
+            "创新指数": 1.0
+        }
+    },
+    {
+        "name": "💹 货币宽松政策",
+        "cost": 10,
+        "cooldown": 1,
+        "description": "降低利率，刺激投资和消费。",
+        "effects": {
+            "GDP增长率": 0.6,
+            "失业率": -0.4,
+            "通胀率": 0.5,
+            "财政赤字率": -0.3
+        },
+        "requirements": {"通胀率": 4.0}
+    }
+]
+
+# 随机事件定义
+RANDOM_EVENTS = [
+    {
+        "name": "🌍 全球经济衰退",
+        "description": "全球经济形势恶化，影响本国经济。",
+        "effects": {"GDP增长率": -0.5, "失业率": 0.3, "财政赤字率": 0.5}
+    },
+    {
+        "name": "🚀 技术突破",
+        "description": "重大技术突破促进经济发展。",
+        "effects": {"GDP增长率": 0.4, "创新指数": 3.0, "碳排放指数": -2.0}
+    },
+    {
+        "name": "🌪️ 自然灾害",
+        "description": "自然灾害造成经济损失。",
+        "effects": {"GDP增长率": -0.3, "财政赤字率": 0.8, "健康指数": -2.0}
+    },
+    {
+        "name": "🤝 国际贸易协定",
+        "description": "签署有利的国际贸易协定。",
+        "effects": {"GDP增长率": 0.3, "失业率": -0.2}
+    }
+]
+
+# 游戏目标
+OBJECTIVES = {
+    "📈 经济发展": {"target": "GDP增长率 ≥ 4.0%", "completed": False},
+    "👥 社会稳定": {"target": "失业率 ≤ 4.0%", "completed": False},
+    "🌱 环境保护": {"target": "碳排放指数 ≤ 70", "completed": False},
+    "⚖️ 社会公平": {"target": "基尼系数 ≤ 0.35", "completed": False}
+}
+
+# 目标完成条件：目标名称 -> (指标, 比较方式, 阈值)
+OBJECTIVE_CONDITIONS = {
+    "📈 经济发展": ("GDP增长率", ">=", 4.0),
+    "👥 社会稳定": ("失业率", "<=", 4.0),
+    "🌱 环境保护": ("碳排放指数", "<=", 70.0),
+    "⚖️ 社会公平": ("基尼系数", "<=", 0.35)
+}
+
+# 失败条件：(名称, 指标, 比较方式, 阈值)
+FAILURE_CONDITIONS = [
+    ("经济崩溃", "GDP增长率", "<=", -3.0),
+    ("财政危机", "财政赤字率", ">=", 15.0),
+    ("社会动荡", "失业率", ">=", 20.0),
+    ("恶性通胀", "通胀率", ">=", 10.0)
+]
+
+# 最终得分：每个完成的目标得分，以及各项指标的额外得分 (指标, 比较方式, 阈值, 分数)
+OBJECTIVE_SCORE = 25
+SCORE_BONUSES = [
+    ("GDP增长率", ">=", 3.0, 10),
+    ("失业率", "<=", 5.0, 10),
+    ("财政赤字率", "<=", 5.0, 10),
+    ("社会福利指数", ">=", 70.0, 5),
+    ("创新指数", ">=", 70.0, 5)
+]
+
+
+class PolicyError(ValueError):
+    """政策无法实施（未选择、重复选择、冷却中、预算不足或前置条件不满足）"""
+
+    def __init__(self, title, message):
+        super().__init__(message)
+        self.title = title
+        self.message = message
+
+
+def compare(value, op, threshold):
+    """按比较方式 ("<=" 或 ">=") 比较指标值与阈值"""
+    return value <= threshold if op == "<=" else value >= threshold
+
+
+# 编译后的查找表：指标按固定顺序编号，范围、阈值和效果都排列成按该顺序的向量
+INDICATORS = tuple(INITIAL_ECONOMIC_DATA)
+INDICATOR_INDEX = {name: i for i, name in enumerate(INDICATORS)}
+LOWER_BOUNDS = tuple(INDICATOR_RANGES[k][0] for k in INDICATORS)
+UPPER_BOUNDS = tuple(INDICATOR_RANGES[k][1] for k in INDICATORS)
+
+# 指标好坏的阈值：good_low <= 值 <= good_high 为良好，值 <= bad_low 或 值 >= bad_high 为糟糕
+INF = float("inf")
+INDICATOR_THRESHOLDS = {
+    # 指标: (good_low, good_high, bad_low, bad_high)
+    "GDP增长率": (3.0, INF, 0.0, INF),
+    "失业率": (-INF, 4.0, -INF, 10.0),
+    "通胀率": (1.0, 3.0, -1.0, 5.0),
+    "财政赤字率": (-INF, 3.0, -INF, 8.0),
+    "基尼系数": (-INF, 0.35, -INF, 0.6),
+    "碳排放指数": (-INF, 70.0, -INF, 150.0),
+    "社会福利指数": (80.0, INF, 40.0, INF),
+    "创新指数": (80.0, INF, 30.0, INF),
+    "教育水平": (85.0, INF, 40.0, INF),
+    "健康指数": (85.0, INF, 40.0, INF)
+}
+GOOD_LOW, GOOD_HIGH, BAD_LOW, BAD_HIGH = (tuple(INDICATOR_THRESHOLDS[k][c] for k in INDICATORS)
+                                          for c in range(4))
+
+# 指标状态编码
+INDICATOR_BAD = -1
+INDICATOR_NEUTRAL = 0
+INDICATOR_GOOD = 1
+
+
+def effect_matrix(items, indicators=INDICATORS):
+    """把政策或事件的 effects 字典编译为稠密矩阵：每项一行，每个指标一列"""
+    return tuple(tuple(item['effects'].get(k, 0.0) for k in indicators) for item in items)
+
+
+def effect_items(items, indicators=INDICATORS):
+    """把 effects 字典编译为稀疏形式：每项一个 ((指标, 效果值), ...) 元组，只含非零效果，按指标顺序排列
+
+    指标和政策很多时每项政策通常只影响少数几个指标，逐项累加比遍历稠密矩阵的整行快得多；
+    随机波动也只为非零效果抽取，与稠密矩阵逐行跳过零值的抽取顺序相同。
+    """
+    return tuple(tuple((k, item['effects'][k]) for k in indicators if item['effects'].get(k, 0.0))
+                 for item in items)
+
+
+POLICY_EFFECTS = effect_matrix(POLICIES)
+EVENT_EFFECTS = effect_matrix(RANDOM_EVENTS)
+
+
+def is_indicator_good(indicator, value):
+    """判断指标是否良好"""
+    k = INDICATOR_INDEX.get(indicator)
+    return k is not None and GOOD_LOW[k] <= value <= GOOD_HIGH[k]
+
+
+def is_indicator_bad(indicator, value):
+    """判断指标是否糟糕"""
+    k = INDICATOR_INDEX.get(indicator)
+    return k is not None and (value <= BAD_LOW[k] or value >= BAD_HIGH[k])
+
+
+def classify_indicators(values, thresholds=(GOOD_LOW, GOOD_HIGH, BAD_LOW, BAD_HIGH)):
+    """按 INDICATORS 顺序的指标向量一次性判断好坏，返回 INDICATOR_GOOD/NEUTRAL/BAD 列表
+
+    thresholds 为 (good_low, good_high, bad_low, bad_high) 四个向量，默认使用默认场景的阈值。
+    """
+    return [INDICATOR_GOOD if good_low <= v <= good_high
+            else INDICATOR_BAD if v <= bad_low or v >= bad_high
+            else INDICATOR_NEUTRAL
+            for v, good_low, good_high, bad_low, bad_high in zip(values, *thresholds)]
+
+
+class Scenario:
+    """编译后的场景：一局游戏的全部参数，与指标相关的数据都按 indicators 顺序排成向量
+
+    默认参数即本模块的常量。场景创建后不应修改，可以被多个引擎和批量模拟共享；
+    key 用于区分场景（默认场景为 "default"，数据文件加载的场景为文件内容的哈希）。
+    indicators 为 INDICATORS 加上 initial_data 中额外的指标（自然变化只作用于 INDICATORS 中的指标，
+    额外指标只受政策、事件和噪声影响），额外指标也必须在 ranges 和 thresholds 中给出。
+    """
+
+    def __init__(self, name="标准场景", description="", key="default", initial_data=INITIAL_ECONOMIC_DATA,
+                 ranges=INDICATOR_RANGES, thresholds=INDICATOR_THRESHOLDS, max_turns=MAX_TURNS,
+                 initial_budget=INITIAL_BUDGET, max_budget=MAX_BUDGET, budget_per_turn=BUDGET_PER_TURN,
+                 event_probability=EVENT_PROBABILITY, effect_noise=EFFECT_NOISE, policies=POLICIES,
+                 events=RANDOM_EVENTS, objectives=None, failures=FAILURE_CONDITIONS,
+                 objective_score=OBJECTIVE_SCORE, score_bonuses=SCORE_BONUSES, victory_objectives=3):
+        self.name = name
+        self.description = description
+        self.key = key
+
+        self.indicators = INDICATORS + tuple(k for k in initial_data if k not in INDICATOR_INDEX)
+        self.indicator_index = {name: i for i, name in enumerate(self.indicators)}
+        self.initial_data = {k: initial_data[k] for k in self.indicators}
+        self.initial_values = tuple(self.initial_data.values())
+        self.lower_bounds = tuple(ranges[k][0] for k in self.indicators)
+        self.upper_bounds = tuple(ranges[k][1] for k in self.indicators)
+        self.thresholds = tuple(tuple(thresholds[k][c] for k in self.indicators) for c in range(4))
+
+        self.max_turns = max_turns
+        self.initial_budget = initial_budget
+        self.max_budget = max_budget
+        self.budget_per_turn = budget_per_turn
+        self.event_probability = event_probability
+        self.effect_noise = effect_noise
+
+        self.policies = policies
+        self.policy_effects = effect_matrix(policies, self.indicators)
+        self.policy_effect_items = effect_items(policies, self.indicators)
+        self.events = events
+        self.event_effects = effect_matrix(events, self.indicators)
+        self.event_effect_items = effect_items(events, self.indicators)
+
+        # 目标：名称 -> (指标, 比较方式, 阈值, 显示文字)
+        if objectives is None:
+            objectives = {name: (*condition, OBJECTIVES[name]["target"])
+                          for name, condition in OBJECTIVE_CONDITIONS.items()}
+        self.objective_conditions = {name: tuple(item[:3]) for name, item in objectives.items()}
+        self.objectives = {name: {"target": item[3], "completed": False} for name, item in objectives.items()}
+        self.victory_objectives = victory_objectives
+        self.failure_conditions = tuple(tuple(item) for item in failures)
+        self.objective_score = objective_score
+        self.score_bonuses = tuple(tuple(item) for item in score_bonuses)
+
+    def __repr__(self):
+        return f"Scenario({self.name!r}, key={self.key!r})"
+
+    @property
+    def extra_indicators(self):
+        """INDICATORS 之外的指标"""
+        return self.indicators[len(INDICATORS):]
+
+
+DEFAULT_SCENARIO = Scenario()
+
+
+class EconomicEngine:
+    """无界面的游戏引擎：保存全部游戏状态并实现回合逻辑"""
+
+    def __init__(self, seed=None, recorder=None, undo_depth=0, scenario=None):
+        self.scenario = DEFAULT_SCENARIO if scenario is None else scenario
+        self.max_turns = self.scenario.max_turns
+        self.max_budget = self.scenario.max_budget
+        # 记录器（如 replay_log.ReplayRecorder）：接收政策、事件和回合边界
+        self.recorder = recorder
+        # 保留最近 undo_depth 次 apply_policies 之前的快照，用于撤销
+        self.undo_depth = undo_depth
+        self.initialize_policies()
+        self.reset(seed)
+
+    def initialize_policies(self):
+        """初始化政策系统"""
+        self.policies = copy.deepcopy(self.scenario.policies)
+        self.indicators = self.scenario.indicators
+        self.effect_items = self.scenario.policy_effect_items
+
+    def set_scenario(self, scenario, seed=None):
+        """切换到另一个场景并开始新的一局"""
+        self.scenario = scenario
+        self.max_turns = scenario.max_turns
+        self.max_budget = scenario.max_budget
+        self.initialize_policies()
+        self.reset(seed)
+
+    def compile_policies(self):
+        """修改 self.policies 的效果后重新编译效果表"""
+        self.effect_items = effect_items(self.policies, self.indicators)
+
+    def reset(self, seed=None):
+        """重置游戏状态；seed 为 None 时使用新的随机种子"""
+        # 随机数源：效果波动、随机事件、自然噪声各用独立子流
+        self.rng = GameRandom(seed)
+        self.seed = self.rng.seed
+
+        self.turn = 1
+        self.budget = self.scenario.initial_budget
+
+        # 经济指标
+        self.economic_data = dict(self.scenario.initial_data)
+
+        # 数据历史记录
+        self.start_history()
+
+        # 政策系统
+        self.selected_policies = []
+        self.selected_indices = []
+        self.policy_cooldowns = {}
+        self.random_events = []
+        self.event_indices = []      # random_events 对应的事件下标，快照直接使用
+        self.undo_stack = []
+
+        # 目标系统
+        self.objectives = copy.deepcopy(self.scenario.objectives)
+        self.game_over = False
+
+        if self.recorder is not None:
+            self.recorder.start(self)
+
+    def restore(self, turn, budget, values, cooldowns):
+        """从检查点恢复到第 turn 回合开始时的状态
+
+        values 为按场景指标顺序的指标值，cooldowns 为按政策下标的剩余冷却回合数。
+        历史记录从该回合重新开始。
+        """
+        self.rng.for_turn(turn)
+        self.turn = turn
+        self.budget = budget
+        self.set_indicator_vector(values)
+        self.start_history()
+        self.policy_cooldowns = {policy['name']: left
+                                 for policy, left in zip(self.policies, cooldowns) if left > 0}
+        self.selected_policies = []
+        self.selected_indices = []
+        self.random_events = []
+        self.event_indices = []
+        self.update_objectives()
+        self.game_over = turn > self.max_turns
+
+    def start_history(self):
+        """重新开始历史记录，只含当前状态
+
+        data_history 是每回合一行的列式存储，data_history[指标] 为该指标历史的视图；
+        它建立在不可变的 HistoryNode 链表上，快照和分支共享之前的回合。
+        """
+        head = HistoryNode(None, self.indicator_vector(), self.budget)
+        self.data_history = HistoryStore(self.indicators, head, capacity=self.max_turns + 1)
+
+    def snapshot(self, copy_log=True):
+        """当前完整状态的不可变快照；历史与之前的快照共享
+
+        copy_log=False 时不复制记录器的日志，只记下日志长度，
+        只能用同一记录器恢复（撤销），不能用于存档。
+        """
+        recorder = self.recorder
+        return GameSnapshot(
+            seed=self.seed,
+            turn=self.turn,
+            budget=self.budget,
+            values=self.indicator_vector(),
+            cooldowns=sorted(self.policy_cooldowns.items()),
+            selected=self.selected_indices,
+            events=self.event_indices,
+            game_over=self.game_over,
+            rng_state=self.rng.getstate(),
+            history=self.history_node,
+            log=recorder.getvalue() if recorder is not None and copy_log else None,
+            log_length=len(recorder.buffer) if recorder is not None else None,
+            scenario=self.scenario.key)
+
+    def restore_snapshot(self, snapshot):
+        """恢复到快照时的状态（记录器的日志也回到快照时的内容）"""
+        self.rng = GameRandom(snapshot.seed, snapshot.rng_state[0])
+        self.rng.setstate(snapshot.rng_state)
+        self.seed = snapshot.seed
+        self.turn = snapshot.turn
+        self.budget = snapshot.budget
+        self.economic_data = dict(zip(self.indicators, snapshot.values))
+        # 直接指向快照的历史链，之后的回合追加在其后，不复制之前的回合
+        self.data_history.attach(snapshot.history)
+        self.policy_cooldowns = dict(snapshot.cooldowns)
+        self.selected_indices = list(snapshot.selected)
+        self.selected_policies = [self.policies[i] for i in snapshot.selected]
+        self.event_indices = list(snapshot.events)
+        self.random_events = [self.scenario.events[i] for i in snapshot.events]
+        self.objectives = copy.deepcopy(self.scenario.objectives)
+        self.update_objectives()
+        self.game_over = snapshot.game_over
+        if self.recorder is not None:
+            if snapshot.log is not None:
+                self.recorder.buffer = bytearray(snapshot.log)
+            elif snapshot.log_length is not None:
+                del self.recorder.buffer[snapshot.log_length:]
+
+    def fork(self, snapshot=None):
+        """从快照（默认为当前状态）分出一个独立的引擎，用于推演不同的选择"""
+        branch = copy.copy(self)
+        branch.recorder = None
+        branch.undo_stack = []
+        branch.data_history = HistoryStore(self.indicators, capacity=self.max_turns + 1)
+        branch.restore_snapshot(self.snapshot(copy_log=False) if snapshot is None else snapshot)
+        return branch
+
+    def undo(self):
+        """撤销最近一次 apply_policies，返回是否成功"""
+        if not self.undo_stack:
+            return False
+        self.restore_snapshot(self.undo_stack.pop())
+        return True
+
+    @property
+    def history_node(self):
+        """历史链的最后一个节点（当前回合开始时的状态）"""
+        return self.data_history.head
+
+    @property
+    def budget_history(self):
+        """每回合开始时的预算历史"""
+        return self.data_history.budgets()
+
+    def is_policy_available(self, index):
+        """政策是否已过冷却期"""
+        return self.policy_cooldowns.get(self.policies[index]['name'], 0) <= 0
+
+    def can_afford(self, index):
+        """当前预算是否足以实施该政策"""
+        return self.budget >= self.policies[index]['cost']
+
+    @instrumented("validate")
+    def validate_policies(self, selected_indices):
+        """检查选中的政策能否实施，不满足时抛出 PolicyError"""
+        if not selected_indices:
+            raise PolicyError("⚠️ 警告", "请至少选择一项政策。")
+        if len(set(selected_indices)) != len(selected_indices):
+            raise PolicyError("⚠️ 警告", "同一项政策每回合只能实施一次。")
+
+        for i in selected_indices:
+            if not self.is_policy_available(i):
+                policy = self.policies[i]
+                raise PolicyError("⏳ 冷却中",
+                                  f"政策 '{policy['name']}' 尚在冷却中，"
+                                  f"还需 {self.policy_cooldowns[policy['name']]} 回合。")
+
+        total_cost = sum(self.policies[i]['cost'] for i in selected_indices)
+
+        if total_cost > self.budget:
+            raise PolicyError("💸 预算不足",
+                              f"选中政策总成本 {total_cost} 超过可用预算 {self.budget}。")
+
+        # 检查政策要求
+        for i in selected_indices:
+            policy = self.policies[i]
+            if 'requirements' in policy:
+                for indicator, max_value in policy['requirements'].items():
+                    if self.economic_data[indicator] > max_value:
+                        raise PolicyError("❌ 条件不满足",
+                                          f"政策 '{policy['name']}' 要求 {indicator} 不超过 {max_value}，"
+                                          f"当前值为 {self.economic_data[indicator]:.1f}。")
+
+        return total_cost
+
+    @instrumented("apply_policies")
+    def apply_policies(self, selected_indices):
+        """应用选中的政策，返回本次触发的随机事件（没有则为 None）"""
+        total_cost = self.validate_policies(selected_indices)
+
+        if self.undo_depth:
+            # 撤销快照只记日志长度，不复制日志，每次实施政策的开销与回合数无关
+            self.undo_stack.append(self.snapshot(copy_log=False))
+            del self.undo_stack[:-self.undo_depth]
+
+        if self.recorder is not None:
+            self.recorder.record_apply(selected_indices)
+
+        # 应用政策效果
+        self.selected_indices = list(selected_indices)
+        self.selected_policies = [self.policies[i] for i in selected_indices]
+        self.budget -= total_cost
+
+        # 选中政策的非零效果项直接累加到对应指标（每项带±10%随机波动），不遍历其余指标
+        with phase("effects"):
+            self.rng.used = True
+            uniform = self.rng.effects.uniform
+            noise = self.scenario.effect_noise
+            data = self.economic_data
+            for i in selected_indices:
+                # 设置冷却时间
+                policy = self.policies[i]
+                self.policy_cooldowns[policy['name']] = policy['cooldown']
+
+                for indicator, effect in self.effect_items[i]:
+                    data[indicator] += effect * (1.0 + uniform(-noise, noise))
+
+        # 触发随机事件
+        event = self.trigger_random_events()
+
+        self.update_objectives()
+        return event
+
+    @instrumented("events")
+    def trigger_random_events(self):
+        """触发随机事件，返回发生的事件（没有则为 None）"""
+        # 每次固定抽取两个随机数，使同一种子下不同策略的事件序列保持一致
+        events = self.scenario.events
+        roll = self.rng.events.random()
+        choice = self.rng.events.randrange(len(events))
+        if roll < self.scenario.event_probability:
+            event = events[choice]
+            self.random_events.append(event)
+            self.event_indices.append(choice)
+            if self.recorder is not None:
+                self.recorder.record_event(choice)
+
+            # 应用事件效果（只累加非零效果项）
+            data = self.economic_data
+            for indicator, effect in self.scenario.event_effect_items[choice]:
+                data[indicator] += effect
+
+            return event
+        return None
+
+    @instrumented("next_turn")
+    def next_turn(self):
+        """进入下一回合，返回游戏是否已到达最后回合"""
+        self.turn += 1
+        # 切换到新回合的子流（noise 子流只在回合切换时使用这一次）
+        self.rng.for_turn(self.turn)
+
+        # 恢复预算
+        self.budget = min(self.max_budget, self.budget + self.scenario.budget_per_turn)
+
+        # 减少政策冷却时间
+        for policy_name in list(self.policy_cooldowns.keys()):
+            self.policy_cooldowns[policy_name] -= 1
+            if self.policy_cooldowns[policy_name] <= 0:
+                del self.policy_cooldowns[policy_name]
+
+        # 自然变化（经济的内在动态）
+        self.apply_natural_changes()
+
+        # 记录历史数据
+        self.data_history.append(self.indicator_vector(), self.budget)
+
+        self.update_objectives()
+
+        if self.turn > self.max_turns:
+            self.game_over = True
+        if self.recorder is not None:
+            self.recorder.record_turn(self)
+        return self.game_over
+
+    @instrumented("natural_changes")
+    def apply_natural_changes(self):
+        """应用自然经济变化"""
+        # GDP增长率向长期趋势回归
+        self.economic_data["GDP增长率"] += (GDP_TREND - self.economic_data["GDP增长率"]) * GDP_REVERSION
+
+        # 失业率受GDP增长影响
+        if self.economic_data["GDP增长率"] > GDP_BOOM:
+            self.economic_data["失业率"] += UNEMPLOYMENT_BOOM_CHANGE
+        elif self.economic_data["GDP增长率"] < GDP_SLUMP:
+            self.economic_data["失业率"] += UNEMPLOYMENT_SLUMP_CHANGE
+
+        # 通胀率小幅波动
+        self.economic_data["通胀率"] += self.rng.noise.uniform(-0.2, 0.2)
+
+        # 添加一些随机噪声
+        uniform = self.rng.noise.uniform
+        self.set_indicator_vector([v + uniform(-0.05, 0.05) for v in self.indicator_vector()])
+
+        # 确保数值在合理范围内
+        self.clamp_values()
+
+    @instrumented("clamp")
+    def clamp_values(self):
+        """限制数值在合理范围内"""
+        self.set_indicator_vector([max(low, min(high, v)) for v, low, high
+                                   in zip(self.indicator_vector(), self.scenario.lower_bounds,
+                                          self.scenario.upper_bounds)])
+
+    def indicator_vector(self):
+        """按场景指标顺序（scenario.indicators）返回当前指标值列表"""
+        data = self.economic_data
+        return [data[k] for k in self.indicators]
+
+    def set_indicator_vector(self, values):
+        """用按场景指标顺序的列表更新指标值"""
+        self.economic_data.update(zip(self.indicators, values))
+
+    def indicator_states(self):
+        """所有指标的好坏状态：{指标: INDICATOR_GOOD/NEUTRAL/BAD}"""
+        return dict(zip(self.indicators, classify_indicators(self.indicator_vector(), self.scenario.thresholds)))
+
+    @instrumented("objectives")
+    def update_objectives(self):
+        """更新目标完成状态"""
+        for name, (indicator, op, threshold) in self.scenario.objective_conditions.items():
+            self.objectives[name]["completed"] = compare(self.economic_data[indicator], op, threshold)
+
+    def completed_objectives(self):
+        """已完成的目标数量"""
+        return sum(1 for obj in self.objectives.values() if obj["completed"])
+
+    def check_game_end(self):
+        """检查游戏结束条件
+
+        返回 None 表示游戏继续；胜利时返回 ("victory", 完成目标数)，
+        失败时返回 ("defeat", 失败原因)。
+        """
+        # 检查胜利条件
+        completed_objectives = self.completed_objectives()
+
+        if completed_objectives >= self.scenario.victory_objectives:
+            self.game_over = True
+            return "victory", completed_objectives
+
+        # 检查失败条件
+        for condition_name, indicator, op, threshold in self.scenario.failure_conditions:
+            if compare(self.economic_data[indicator], op, threshold):
+                self.game_over = True
+                return "defeat", condition_name
+
+        return None
+
+    def calculate_final_score(self):
+        """计算最终得分"""
+        score = 0
+
+        # 基础得分基于目标完成情况
+        score += self.completed_objectives() * self.scenario.objective_score
+
+        # 各项指标的额外得分
+        for indicator, op, threshold, bonus in self.scenario.score_bonuses:
+            if compare(self.economic_data[indicator], op, threshold):
+                score += bonus
+
+        return score
+
+    def step(self, selected_indices):
+        """无界面执行完整一回合：实施政策、检查结束条件并进入下一回合
+
+        selected_indices 为空时跳过实施政策，直接进入下一回合。
+        返回字典，包含本回合触发的事件和游戏结束结果。
+        """
+        event = None
+        result = None
+        if selected_indices:
+            event = self.apply_policies(selected_indices)
+            result = self.check_game_end()
+        if result is None:
+            self.next_turn()
+            if self.game_over:
+                result = "finished", self.completed_objectives()
+        return {"event": event, "result": result}
@@ -0,0 +1,469 @@
+"""公共经济学模拟游戏 - 多会话 asyncio 游戏服务器
+
+只依赖标准库，在一个进程中托管大量互相独立的游戏会话（每个会话是一个无界面的
+EconomicEngine，不创建 Tk 窗口），通过 HTTP/JSON 接口操作，并通过 WebSocket 推送每回合的更新。
+
+接口：
+    GET    /policies                       政策列表
+    POST   /sessions                       新建会话，可选请求体 {"seed": 整数}
+    GET    /sessions/<id>/state            当前状态
+    GET    /sessions/<id>/history          各指标和预算的历史
+    POST   /sessions/<id>/apply            实施政策，请求体 {"policies": [政策下标, ...]}
+    POST   /sessions/<id>/next             进入下一回合
+    DELETE /sessions/<id>                  结束会话
+    GET    /sessions/<id>/ws               WebSocket：每次实施政策、进入下一回合后推送
+                                           {"type": "update", "state": ...}；也可以发送
+                                           {"action": "apply", "policies": [...]} 或 {"action": "next"}
+
+回合流程与图形界面相同：每回合实施一次政策，之后才能进入下一回合。
+超过 idle_timeout 秒没有操作的会话会被回收；会话数达到 max_sessions 时拒绝新建。
+给定导出目录时，每局结束后把历史追加写入该目录（history_export 的列式格式）。
+
+命令行用法：
+    python game_server.py [端口] [导出目录]
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import secrets
+import struct
+import sys
+
+from economic_engine import EconomicEngine, PolicyError, INDICATORS, POLICIES
+from replay_log import ReplayRecorder, ReplayError
+
+DEFAULT_PORT = 8765
+IDLE_TIMEOUT = 30 * 60
+SWEEP_INTERVAL = 30
+MAX_SESSIONS = 2000
+MAX_BODY = 64 * 1024
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+OPCODE_TEXT = 0x1
+OPCODE_CLOSE = 0x8
+OPCODE_PING = 0x9
+OPCODE_PONG = 0xA
+
+STATUS_TEXT = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+               405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large",
+               503: "Service Unavailable"}
+
+
+class ServerError(Exception):
+    """请求无法处理，携带 HTTP 状态码"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class GameSession:
+    """一个玩家的游戏会话"""
+
+    def __init__(self, session_id, seed=None, now=0.0, export=None):
+        self.id = session_id
+        # export 为 history_export.HistoryWriter 时记录回放日志，对局结束后写入历史
+        self.export = export
+        try:
+            self.engine = EconomicEngine(seed=seed, recorder=None if export is None else ReplayRecorder())
+        except ReplayError as e:
+            raise ServerError(400, str(e)) from e
+        self.applied = False          # 本回合是否已实施政策
+        self.result = None            # 游戏结束结果
+        self.last_event = None
+        self.last_active = now
+        self.subscribers = set()      # WebSocket 连接
+
+    def apply(self, indices):
+        if self.engine.game_over:
+            raise ServerError(409, "游戏已结束")
+        if self.applied:
+            raise ServerError(409, "本回合已实施过政策，请进入下一回合")
+        if not isinstance(indices, list):
+            raise ServerError(400, "policies 必须是列表")
+        for i in indices:
+            # JSON 的 true/false 解析为 bool，它也是 int 的子类
+            if isinstance(i, bool) or not isinstance(i, int) or not 0 <= i < len(self.engine.policies):
+                raise ServerError(400, f"无效的政策下标: {i!r}")
+        if len(set(indices)) != len(indices):
+            raise ServerError(400, "政策下标重复")
+        try:
+            event = self.engine.apply_policies(indices)
+        except PolicyError as e:
+            raise ServerError(409, e.message) from e
+        self.applied = True
+        self.last_event = event['name'] if event else None
+        result = self.engine.check_game_end()
+        if result is not None:
+            self.result = result
+            self.finish()
+        return self.state()
+
+    def next_turn(self):
+        if self.engine.game_over:
+            raise ServerError(409, "游戏已结束")
+        if not self.applied:
+            raise ServerError(409, "请先实施政策")
+        if self.engine.next_turn():
+            self.result = "finished", self.engine.completed_objectives()
+            self.finish()
+        self.applied = False
+        self.last_event = None
+        return self.state()
+
+    def finish(self):
+        """对局结束：导出历史"""
+        if self.export is not None:
+            self.export.add_engine(self.engine)
+
+    def state(self):
+        engine = self.engine
+        state = {
+            "session": self.id,
+            "turn": engine.turn,
+            "max_turns": engine.max_turns,
+            "budget": engine.budget,
+            "indicators": dict(engine.economic_data),
+            "indicator_states": engine.indicator_states(),
+            "objectives": {name: obj["completed"] for name, obj in engine.objectives.items()},
+            "cooldowns": dict(engine.policy_cooldowns),
+            "available": [i for i in range(len(engine.policies))
+                          if engine.is_policy_available(i) and engine.can_afford(i)],
+            "applied": self.applied,
+            "event": self.last_event,
+            "game_over": engine.game_over,
+            "result": list(self.result) if self.result else None,
+        }
+        if engine.game_over:
+            state["score"] = engine.calculate_final_score()
+        return state
+
+    def history(self):
+        store = self.engine.data_history
+        return {
+            "turns": store.size,
+            "indicators": {name: store[name].tolist() for name in INDICATORS},
+            "budget": self.engine.budget_history.tolist(),
+        }
+
+
+class GameServer:
+    """托管全部会话的服务器"""
+
+    def __init__(self, idle_timeout=IDLE_TIMEOUT, max_sessions=MAX_SESSIONS, sweep_interval=SWEEP_INTERVAL,
+                 export=None):
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.sweep_interval = sweep_interval
+        self.export = export              # 结束的对局写入的 HistoryWriter（由调用方关闭）
+        self.sessions = {}
+        self.server = None
+        self._sweeper = None
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT):
+        self.server = await asyncio.start_server(self.handle_connection, host, port)
+        self._sweeper = asyncio.create_task(self._sweep_loop())
+        return self.server
+
+    async def stop(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+        for session_id in list(self.sessions):
+            self.close_session(session_id)
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    @property
+    def port(self):
+        return self.server.sockets[0].getsockname()[1]
+
+    # ---- 会话管理 ----
+
+    def create_session(self, seed=None):
+        now = asyncio.get_running_loop().time()
+        if len(self.sessions) >= self.max_sessions:
+            self.evict_idle(now)
+            if len(self.sessions) >= self.max_sessions:
+                raise ServerError(503, "会话数已达上限")
+        session_id = secrets.token_urlsafe(12)
+        session = GameSession(session_id, seed=seed, now=now, export=self.export)
+        self.sessions[session_id] = session
+        return session
+
+    def get_session(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise ServerError(404, "会话不存在或已过期")
+        session.last_active = asyncio.get_running_loop().time()
+        return session
+
+    def close_session(self, session_id):
+        session = self.sessions.pop(session_id, None)
+        if session is not None:
+            for writer in list(session.subscribers):
+                writer.close()
+
+    def evict_idle(self, now):
+        """回收空闲超时的会话，返回回收数量"""
+        expired = [sid for sid, s in self.sessions.items() if now - s.last_active > self.idle_timeout]
+        for session_id in expired:
+            self.close_session(session_id)
+        return len(expired)
+
+    async def _sweep_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            self.evict_idle(loop.time())
+
+    # ---- HTTP ----
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+                try:
+                    method, path, headers = _parse_head(head)
+                    length = _content_length(headers)
+                except ServerError as e:
+                    await _send_json(writer, e.status, {"error": e.message}, keep_alive=False)
+                    return
+                if length > MAX_BODY:
+                    await _send_json(writer, 413, {"error": "请求体过大"})
+                    return
+                body = await reader.readexactly(length) if length else b""
+
+                if headers.get("upgrade", "").lower() == "websocket":
+                    await self.handle_websocket(reader, writer, path, headers)
+                    return
+
+                try:
+                    status, payload = self.route(method, path, body)
+                except ServerError as e:
+                    status, payload = e.status, {"error": e.message}
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await _send_json(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def route(self, method, path, body):
+        """分发 HTTP 请求，返回 (状态码, 响应数据)"""
+        parts = [p for p in path.split("?")[0].split("/") if p]
+        if parts == ["policies"] and method == "GET":
+            return 200, [{"index": i, "name": p["name"], "cost": p["cost"], "cooldown": p["cooldown"],
+                          "description": p["description"], "effects": p["effects"],
+                          "requirements": p.get("requirements", {})}
+                         for i, p in enumerate(POLICIES)]
+        if parts == ["sessions"] and method == "POST":
+            seed = _parse_body(body).get("seed")
+            if seed is not None and not isinstance(seed, int):
+                raise ServerError(400, "seed 必须是整数")
+            session = self.create_session(seed)
+            return 201, session.state()
+        if len(parts) == 2 and parts[0] == "sessions" and method == "DELETE":
+            self.get_session(parts[1])
+            self.close_session(parts[1])
+            return 200, {"closed": parts[1]}
+        if len(parts) == 3 and parts[0] == "sessions":
+            session = self.get_session(parts[1])
+            action = parts[2]
+            if action == "state" and method == "GET":
+                return 200, session.state()
+            if action == "history" and method == "GET":
+                return 200, session.history()
+            if action == "apply" and method == "POST":
+                state = session.apply(_parse_body(body).get("policies", []))
+                self.publish(session, state)
+                return 200, state
+            if action == "next" and method == "POST":
+                state = session.next_turn()
+                self.publish(session, state)
+                return 200, state
+            raise ServerError(405, "不支持的操作")
+        raise ServerError(404, "未知的路径")
+
+    # ---- WebSocket ----
+
+    async def handle_websocket(self, reader, writer, path, headers):
+        parts = [p for p in path.split("?")[0].split("/") if p]
+        key = headers.get("sec-websocket-key")
+        try:
+            if len(parts) != 3 or parts[0] != "sessions" or parts[2] != "ws" or not key:
+                raise ServerError(400, "无效的 WebSocket 请求")
+            session = self.get_session(parts[1])
+        except ServerError as e:
+            await _send_json(writer, e.status, {"error": e.message}, keep_alive=False)
+            return
+
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()).decode()
+        writer.write(("HTTP/1.1 101 Switching Protocols\r\n"
+                      "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode())
+        await writer.drain()
+
+        session.subscribers.add(writer)
+        try:
+            _write_frame(writer, OPCODE_TEXT, _dumps({"type": "update", "state": session.state()}))
+            await writer.drain()
+            while True:
+                opcode, payload = await _read_frame(reader)
+                if opcode == OPCODE_CLOSE:
+                    _write_frame(writer, OPCODE_CLOSE, payload[:2])
+                    await writer.drain()
+                    return
+                if opcode == OPCODE_PING:
+                    _write_frame(writer, OPCODE_PONG, payload)
+                elif opcode == OPCODE_TEXT:
+                    self.handle_message(session, writer, payload)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            session.subscribers.discard(writer)
+
+    def handle_message(self, session, writer, payload):
+        """处理客户端通过 WebSocket 发来的操作；结果推送给所有订阅者，错误只发给发送方"""
+        session.last_active = asyncio.get_running_loop().time()
+        try:
+            message = json.loads(payload)
+            if not isinstance(message, dict):
+                raise ServerError(400, "消息必须是 JSON 对象")
+            action = message.get("action")
+            if action == "apply":
+                state = session.apply(message.get("policies", []))
+            elif action == "next":
+                state = session.next_turn()
+            elif action == "state":
+                state = session.state()
+            else:
+                raise ServerError(400, f"未知的操作: {action!r}")
+        except ValueError:
+            error = {"type": "error", "error": "消息不是有效的 JSON"}
+        except ServerError as e:
+            error = {"type": "error", "error": e.message}
+        else:
+            self.publish(session, state)
+            return
+        _write_frame(writer, OPCODE_TEXT, _dumps(error))
+
+    def publish(self, session, state):
+        """向会话的所有 WebSocket 连接推送状态更新"""
+        if not session.subscribers:
+            return
+        data = _dumps({"type": "update", "state": state})
+        for writer in list(session.subscribers):
+            if writer.is_closing():
+                session.subscribers.discard(writer)
+            else:
+                _write_frame(writer, OPCODE_TEXT, data)
+
+
+def _dumps(payload):
+    return json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+
+def _parse_head(head):
+    """解析请求行和请求头；请求行无效时为 400"""
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, path, version = lines[0].split(" ", 2)
+    except ValueError:
+        raise ServerError(400, "无效的请求行")
+    if not method or not path or not version.startswith("HTTP/"):
+        raise ServerError(400, "无效的请求行")
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    return method.upper(), path, headers
+
+
+def _content_length(headers):
+    """请求体长度；不是非负整数时为 400"""
+    value = headers.get("content-length", "0")
+    if not (value.isascii() and value.isdigit()):
+        raise ServerError(400, "无效的 Content-Length")
+    return int(value)
+
+
+def _parse_body(body):
+    if not body:
+        return {}
+    try:
+        data = json.loads(body)
+    except ValueError:
+        raise ServerError(400, "请求体不是有效的 JSON")
+    if not isinstance(data, dict):
+        raise ServerError(400, "请求体必须是 JSON 对象")
+    return data
+
+
+async def _send_json(writer, status, payload, keep_alive=True):
+    body = _dumps(payload)
+    writer.write((f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                  "Content-Type: application/json; charset=utf-8\r\n"
+                  f"Content-Length: {len(body)}\r\n"
+                  f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode() + body)
+    await writer.drain()
+
+
+def _write_frame(writer, opcode, payload):
+    """写一个不分片、不加掩码的服务器帧"""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    writer.write(header + payload)
+
+
+async def _read_frame(reader):
+    """读一个客户端帧（客户端帧必须加掩码），返回 (操作码, 载荷)"""
+    first, second = await reader.readexactly(2)
+    opcode = first & 0x0F
+    length = second & 0x7F
+    if length == 126:
+        length, = struct.unpack("!H", await reader.readexactly(2))
+    elif length == 127:
+        length, = struct.unpack("!Q", await reader.readexactly(8))
+    if length > MAX_BODY:
+        raise ConnectionError("WebSocket 消息过大")
+    mask = await reader.readexactly(4) if second & 0x80 else b"\0\0\0\0"
+    payload = bytearray(await reader.readexactly(length))
+    for i in range(length):
+        payload[i] ^= mask[i % 4]
+    return opcode, bytes(payload)
+
+
+async def serve(port=DEFAULT_PORT, host="127.0.0.1", export=None):
+    writer = None
+    if export is not None:
+        from history_export import HistoryWriter
+        writer = HistoryWriter(export)
+    server = GameServer(export=writer)
+    await server.start(host, port)
+    print(f"游戏服务器已启动: http://{host}:{server.port}")
+    try:
+        async with server.server:
+            await server.server.serve_forever()
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(serve(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PORT,
+                      export=sys.argv[2] if len(sys.argv) > 2 else None))
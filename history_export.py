@@ -0,0 +1,369 @@
+"""公共经济学模拟游戏 - 对局历史的列式导出
+
+把大量对局的 data_history、budget_history、每回合实施的政策和触发的随机事件写入一个目录，
+每列一个 NumPy .npy 文件（第一维为对局），读取时用内存映射，百万局的数据集也能在瞬间打开：
+    values.npy        (局数 × 行数 × 指标数) float64   每回合开始时的指标值（即 data_history）
+    budget.npy        (局数 × 行数) int32              每回合开始时的预算（即 budget_history）
+    policies.npy      (局数 × 行数 × 政策数) bool       该回合实施的政策
+    events.npy        (局数 × 行数) int16              该回合触发的事件下标，-1 表示没有
+    turns.npy         (局数,) int16                    每局实际记录的行数
+    final_values.npy  (局数 × 指标数) float64          对局结束时的指标值
+    scores.npy        (局数,) int32                    最终得分
+    outcomes.npy      (局数,) int8                     结果编码（与 batch_simulation 相同）
+    meta.json         指标、政策、事件和结果编码的名称
+
+每局的行数为 最大回合数 + 1（第 i 行对应第 i+1 回合开始时，最后一行是下完全部回合后的状态），
+提前结束的对局只记录到结束的回合，其余行的指标为 nan、预算和事件为 -1。
+
+HistoryWriter 按局追加写入，内存中最多缓存 buffer_games 局，每次写出后更新文件头的行数，
+因此内存占用与总局数无关：
+
+    with HistoryWriter("runs/") as writer:
+        writer.add_engine(engine)              # 引擎需要带 ReplayRecorder（从日志取得每回合的政策和事件）
+    export_schedule("runs/", [[1, 5], [3, 9], [7]] * 4, n_games=1000000, seed=0)
+
+    histories = load_histories("runs/")
+    gdp = histories.indicator("GDP增长率")     # (局数 × 行数) 的内存映射视图
+
+    python history_export.py schedule 输出目录 局数 [政策方案JSON] [场景文件]
+    python history_export.py logs 日志文件 输出目录 [场景文件]
+"""
+import json
+import os
+import struct
+import sys
+
+import numpy as np
+
+from batch_simulation import (BatchSimulation, BLOCK_SIZE, OUTCOME_FINISHED, OUTCOME_VICTORY,
+                              OUTCOME_FAILURE_BASE, _policy_mask)
+from economic_engine import DEFAULT_SCENARIO
+from replay_log import ReplayLog, TAG_APPLY, TAG_EVENT, TAG_TURN, iter_logs, replay
+
+FORMAT_VERSION = 1
+META_FILE = "meta.json"
+# .npy 文件头的固定长度：行数增加后原地改写文件头，不移动数据
+HEADER_BYTES = 128
+# HistoryWriter 默认缓存的局数
+BUFFER_GAMES = 4096
+# export_schedule 每块缓存的历史数值个数上限（标准场景下块大小即 BLOCK_SIZE）
+EXPORT_BLOCK_VALUES = 1 << 22
+
+# 列名: (类型, 每局的形状)；形状中的 T、K、P 分别为行数、指标数和政策数
+COLUMNS = {
+    "values": (np.float64, ("T", "K")),
+    "budget": (np.int32, ("T",)),
+    "policies": (np.bool_, ("T", "P")),
+    "events": (np.int16, ("T",)),
+    "turns": (np.int16, ()),
+    "final_values": (np.float64, ("K",)),
+    "scores": (np.int32, ()),
+    "outcomes": (np.int8, ()),
+}
+
+
+def _npy_header(dtype, shape):
+    """固定长度的 .npy 文件头（1.0 版）"""
+    text = repr({"descr": np.lib.format.dtype_to_descr(np.dtype(dtype)), "fortran_order": False,
+                 "shape": tuple(shape)}).encode("latin1")
+    size = HEADER_BYTES - 10
+    if len(text) >= size:
+        raise ValueError(f"数组形状 {shape} 超出文件头长度")
+    return np.lib.format.magic(1, 0) + struct.pack("<H", size) + text.ljust(size - 1) + b"\n"
+
+
+class _ColumnFile:
+    """只追加的 .npy 文件：第一维随写入增长"""
+
+    def __init__(self, path, dtype, shape):
+        self.dtype = np.dtype(dtype)
+        self.shape = tuple(shape)
+        self.rows = 0
+        self.file = open(path, "wb")
+        self.file.write(_npy_header(self.dtype, (0,) + self.shape))
+
+    def write(self, array):
+        array = np.ascontiguousarray(array, dtype=self.dtype)
+        if array.shape[1:] != self.shape:
+            raise ValueError(f"形状 {array.shape[1:]} 与列的形状 {self.shape} 不一致")
+        self.file.write(array.data)
+        self.rows += len(array)
+
+    def flush(self):
+        """把当前行数写回文件头"""
+        end = self.file.tell()
+        self.file.seek(0)
+        self.file.write(_npy_header(self.dtype, (self.rows,) + self.shape))
+        self.file.seek(end)
+        self.file.flush()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+def _outcome_names(scenario):
+    return ["finished", "victory"] + [name for name, _, _, _ in scenario.failure_conditions]
+
+
+class HistoryWriter:
+    """把对局历史流式写入目录中的列式 .npy 文件，内存中最多缓存 buffer_games 局"""
+
+    def __init__(self, directory, scenario=None, buffer_games=BUFFER_GAMES):
+        self.directory = directory
+        self.scenario = DEFAULT_SCENARIO if scenario is None else scenario
+        self.buffer_games = buffer_games
+        self.n_rows = self.scenario.max_turns + 1
+        self.n_indicators = len(self.scenario.indicators)
+        self.n_policies = len(self.scenario.policies)
+        sizes = {"T": self.n_rows, "K": self.n_indicators, "P": self.n_policies}
+
+        os.makedirs(directory, exist_ok=True)
+        self.columns = {name: _ColumnFile(os.path.join(directory, name + ".npy"), dtype,
+                                          [sizes[axis] for axis in shape])
+                        for name, (dtype, shape) in COLUMNS.items()}
+        self.pending = {name: [] for name in COLUMNS}
+        self.pending_games = 0
+        self.games = 0
+        self.closed = False
+        self._write_meta()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def empty(self, n_games):
+        """n_games 局未记录任何回合的列数组 {列名: 数组}，add_games 的参数可以从它开始填写"""
+        return {
+            "values": np.full((n_games, self.n_rows, self.n_indicators), np.nan),
+            "budget": np.full((n_games, self.n_rows), -1, dtype=np.int32),
+            "policies": np.zeros((n_games, self.n_rows, self.n_policies), dtype=bool),
+            "events": np.full((n_games, self.n_rows), -1, dtype=np.int16),
+            "turns": np.zeros(n_games, dtype=np.int16),
+            "final_values": np.full((n_games, self.n_indicators), np.nan),
+            "scores": np.zeros(n_games, dtype=np.int32),
+            "outcomes": np.full(n_games, OUTCOME_FINISHED, dtype=np.int8),
+        }
+
+    def add_games(self, columns):
+        """追加若干局：columns 为 {列名: 第一维为局的数组}，格式与 empty() 相同"""
+        if self.closed:
+            raise ValueError("HistoryWriter 已关闭")
+        n_games = len(columns["turns"])
+        for name in COLUMNS:
+            self.pending[name].append(columns[name])
+        self.pending_games += n_games
+        self.games += n_games
+        if self.pending_games >= self.buffer_games:
+            self.flush()
+
+    def add_engine(self, engine, log=None):
+        """追加引擎中的一局
+
+        每回合的政策和事件取自回放日志 log，默认为引擎的 ReplayRecorder 记录的日志；
+        data_history 需要从第1回合开始（经检查点恢复的引擎请改用 add_log）。
+        """
+        if log is None:
+            if engine.recorder is None:
+                raise ValueError("引擎没有记录器，无法得到每回合实施的政策，请传入回放日志")
+            log = engine.recorder.getvalue()
+        if not isinstance(log, ReplayLog):
+            log = ReplayLog(log, self.n_indicators)
+        rows = engine.data_history.rows()
+        if engine.turn - len(rows) + 1 != 1:
+            raise ValueError("引擎的历史记录不是从第1回合开始")
+
+        game = self.empty(1)
+        n = len(rows)
+        game["values"][0, :n] = rows
+        game["budget"][0, :n] = engine.budget_history
+        game["turns"][0] = n
+        row = 0
+        for tag, content in log.records:
+            if tag == TAG_APPLY and row < n:
+                game["policies"][0, row, list(content)] = True
+            elif tag == TAG_EVENT and row < n:
+                game["events"][0, row] = content
+            elif tag == TAG_TURN:
+                row += 1
+        game["final_values"][0] = engine.indicator_vector()
+        game["scores"][0] = engine.calculate_final_score()
+        game["outcomes"][0] = self._engine_outcome(engine)
+        self.add_games(game)
+
+    def add_log(self, data):
+        """重放一局回放日志（场景须与写入器相同）并追加"""
+        log = ReplayLog(data, self.n_indicators)
+        engine = replay(log, seek=False, scenario=self.scenario)
+        # replay 停在最后一回合开始时，补上这一回合实施的政策（提前结束的对局就结束在这一回合）
+        last_turn = max([i for i, (tag, _) in enumerate(log.records) if tag == TAG_TURN], default=-1)
+        for tag, content in log.records[last_turn + 1:]:
+            if tag == TAG_APPLY:
+                engine.apply_policies(list(content))
+                engine.check_game_end()
+        self.add_engine(engine, log)
+
+    def _engine_outcome(self, engine):
+        # 下完全部回合或尚未结束的对局为 OUTCOME_FINISHED；提前结束时指标停在结束时的值，重新检查即可
+        if not engine.game_over or engine.turn > engine.max_turns:
+            return OUTCOME_FINISHED
+        result = engine.check_game_end()
+        if result is None:
+            return OUTCOME_FINISHED
+        if result[0] == "victory":
+            return OUTCOME_VICTORY
+        names = [name for name, _, _, _ in self.scenario.failure_conditions]
+        return OUTCOME_FAILURE_BASE + names.index(result[1])
+
+    def flush(self):
+        """写出缓存的对局并更新各文件头的行数"""
+        for name, column in self.columns.items():
+            parts = self.pending[name]
+            if parts:
+                column.write(parts[0] if len(parts) == 1 else np.concatenate(parts))
+                parts.clear()
+            column.flush()
+        self.pending_games = 0
+
+    def close(self):
+        if self.closed:
+            return
+        self.flush()
+        for column in self.columns.values():
+            column.close()
+        self._write_meta()
+        self.closed = True
+
+    def _write_meta(self):
+        scenario = self.scenario
+        meta = {
+            "version": FORMAT_VERSION,
+            "games": self.games,
+            "scenario": scenario.key,
+            "max_turns": scenario.max_turns,
+            "indicators": list(scenario.indicators),
+            "policies": [policy['name'] for policy in scenario.policies],
+            "events": [event['name'] for event in scenario.events],
+            "outcomes": _outcome_names(scenario),
+        }
+        with open(os.path.join(self.directory, META_FILE), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+
+
+class GameHistories:
+    """load_histories 返回的数据集：各列是内存映射的只读数组，属性名与列名相同"""
+
+    def __init__(self, directory, mmap_mode="r"):
+        with open(os.path.join(directory, META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"不支持的数据集版本：{meta.get('version')}")
+        self.meta = meta
+        self.indicators = meta["indicators"]
+        self.policies = meta["policies"]
+        self.events = meta["events"]
+        self.outcome_names = meta["outcomes"]
+        for name in COLUMNS:
+            setattr(self, name, np.load(os.path.join(directory, name + ".npy"), mmap_mode=mmap_mode))
+
+    def __len__(self):
+        return len(self.turns)
+
+    def indicator(self, name):
+        """某项指标的历史 (局数 × 行数)"""
+        return self.values[:, :, self.indicators.index(name)]
+
+    def outcome_counts(self):
+        """{结果名称: 局数}"""
+        counts = np.bincount(self.outcomes, minlength=len(self.outcome_names))
+        return dict(zip(self.outcome_names, counts.tolist()))
+
+
+def load_histories(directory, mmap_mode="r"):
+    """打开 HistoryWriter 写出的数据集"""
+    return GameHistories(directory, mmap_mode)
+
+
+def _record_block(sim, writer, schedule):
+    """按政策方案下完 sim 中的全部对局，返回各列数组"""
+    columns = writer.empty(sim.n_games)
+    values, budget, policies, events = (columns[name] for name in ("values", "budget", "policies", "events"))
+    n_policies = len(sim.policies)
+    while sim.turn <= sim.max_turns and sim.active.any():
+        row = sim.turn - 1
+        active = sim.active
+        values[active, row] = sim.data[active]
+        budget[active, row] = sim.budget[active]
+        columns["turns"][active] = row + 1
+        selection = schedule[row] if row < len(schedule) else None
+        if selection:
+            mask = _policy_mask(selection, n_policies)
+            valid = sim.apply_policies(mask)
+            policies[valid, row] = mask
+            events[:, row] = sim.last_event
+        sim.next_turn()
+
+    # 下完全部回合的对局还有最后一行（与引擎的 data_history 相同）
+    finished = sim.outcome == OUTCOME_FINISHED
+    values[finished, -1] = sim.data[finished]
+    budget[finished, -1] = sim.budget[finished]
+    columns["turns"][finished] = writer.n_rows
+    columns["final_values"][:] = sim.data
+    columns["scores"][:] = sim.final_scores()
+    columns["outcomes"][:] = sim.outcome
+    return columns
+
+
+def export_schedule(directory, schedule, n_games, seed=None, scenario=None, block_size=None):
+    """按固定政策方案批量模拟 n_games 局并流式写入 directory，返回写入的局数
+
+    对局分块模拟，每块使用由 (seed, 块号) 派生的随机流，内存中只保留一块的历史；
+    块大小默认使每块的历史不超过 EXPORT_BLOCK_VALUES 个数值，且不超过 BLOCK_SIZE
+    （标准场景下即 BLOCK_SIZE，导出的对局与同一种子的 simulate_schedule 逐局相同）。
+    """
+    scenario = DEFAULT_SCENARIO if scenario is None else scenario
+    if block_size is None:
+        per_game = (scenario.max_turns + 1) * (len(scenario.indicators) + len(scenario.policies))
+        block_size = max(1, min(BLOCK_SIZE, EXPORT_BLOCK_VALUES // per_game))
+    sizes = [min(block_size, n_games - start) for start in range(0, n_games, block_size)]
+    with HistoryWriter(directory, scenario, buffer_games=block_size) as writer:
+        for size, block_seed in zip(sizes, np.random.SeedSequence(seed).spawn(len(sizes))):
+            sim = BatchSimulation(size, seed=block_seed, scenario=scenario)
+            writer.add_games(_record_block(sim, writer, schedule))
+        return writer.games
+
+
+def export_logs(file, directory, scenario=None):
+    """把 append_log 写入的日志文件中的各局重放后写入 directory，返回写入的局数"""
+    with open(file, "rb") as f, HistoryWriter(directory, scenario) as writer:
+        for data in iter_logs(f):
+            writer.add_log(data)
+        return writer.games
+
+
+def main(argv):
+    usage = ("用法: python history_export.py schedule 输出目录 局数 [政策方案JSON] [场景文件]\n"
+             "      python history_export.py logs 日志文件 输出目录 [场景文件]")
+    if len(argv) >= 4 and argv[1] == "schedule" and len(argv) <= 6:
+        schedule = json.loads(argv[4]) if len(argv) > 4 else [[1, 5], [3, 9], [7]] * 4
+        scenario = _load_scenario(argv[5]) if len(argv) > 5 else None
+        games = export_schedule(argv[2], schedule, int(argv[3]), seed=0, scenario=scenario)
+    elif len(argv) >= 4 and argv[1] == "logs" and len(argv) <= 5:
+        scenario = _load_scenario(argv[4]) if len(argv) > 4 else None
+        games = export_logs(argv[2], argv[3], scenario)
+    else:
+        print(usage)
+        return 1
+    print(f"已导出 {games} 局")
+    return 0
+
+
+def _load_scenario(path):
+    from scenarios import load_scenario
+    return load_scenario(path)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
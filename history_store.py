@@ -0,0 +1,145 @@
+"""公共经济学模拟游戏 - 列式历史数据存储
+
+历史记录本身是 snapshots.HistoryNode 的不可变链表：追加一回合只新建一个节点，
+恢复快照只需指向快照的节点，分支之间共享之前的全部回合。
+按列读取时才把链表同步到预分配的 float64 数组（每回合一行、每项指标一列）：
+    append          追加一行，O(1)
+    attach(节点)     改为指向另一条历史（快照、撤销、分支），O(1)
+    store[指标]      该指标的历史（零拷贝视图），可直接交给 matplotlib 或 NumPy 分析
+    store.rows()     全部历史 (回合数 × 指标数) 的视图
+
+同步时只写入与上次同步的历史不同的那些回合（与共同祖先之后的部分），
+数组容量不足时按倍数扩容。视图直接引用共享的缓冲区，只在下一次 append、attach（恢复快照、撤销、分支）
+之前有效：之后的同步会原地改写与新历史不同的回合，旧视图的内容随之改变（扩容后则不再更新）。
+需要长期保留的数据请自行 .copy()。
+
+引擎在界面启动时就会导入本模块，NumPy 在第一次按列读取时才导入（此时图表已经加载了 matplotlib）。
+"""
+from snapshots import HistoryNode
+
+INITIAL_CAPACITY = 16
+
+
+class HistoryStore:
+    """按列访问的历史记录，兼容 {指标: 数值列表} 的读取方式"""
+
+    def __init__(self, columns, head=None, capacity=INITIAL_CAPACITY):
+        self.columns = tuple(columns)
+        self.index = {name: i for i, name in enumerate(self.columns)}
+        self.head = head            # 最后一回合的 HistoryNode
+        self._capacity = max(1, capacity)
+        self._data = None
+        self._budget = None
+        self._synced = None         # _data 前 _size 行对应的节点
+        self._size = 0
+
+    def append(self, row, budget):
+        """追加一行；row 为按列顺序排列的数值序列"""
+        self.head = HistoryNode(self.head, row, budget)
+
+    def attach(self, head):
+        """改为指向以 head 结尾的历史（不复制之前的回合）"""
+        self.head = head
+
+    def _sync(self):
+        """把数组更新为 head 对应的历史，只重写与已同步历史不同的回合"""
+        head = self.head
+        if head is self._synced:
+            return
+        # 找到 head 与已同步历史的共同祖先，收集其后的新节点
+        pending = []
+        node, old = head, self._synced
+        while node is not None and (old is None or node.length > old.length):
+            pending.append(node)
+            node = node.parent
+        while old is not None and (node is None or old.length > node.length):
+            old = old.parent
+        while node is not old:
+            pending.append(node)
+            node, old = node.parent, old.parent
+
+        import numpy as np
+
+        size = 0 if head is None else head.length
+        if self._data is None or len(self._data) < size:
+            capacity = self._capacity
+            while capacity < size:
+                capacity *= 2
+            keep = 0 if node is None else node.length
+            data = np.empty((capacity, len(self.columns)), dtype=np.float64)
+            budget = np.empty(capacity, dtype=np.float64)
+            if self._data is not None:
+                data[:keep] = self._data[:keep]
+                budget[:keep] = self._budget[:keep]
+            self._data, self._budget, self._capacity = data, budget, capacity
+        for node in pending:
+            self._data[node.length - 1] = node.row
+            self._budget[node.length - 1] = node.budget
+        self._synced = head
+        self._size = size
+
+    def rows(self):
+        """全部历史的只读视图 (行数 × 列数)，只在下一次 append/attach 之前有效"""
+        import numpy as np
+
+        self._sync()
+        if self._data is None:
+            return np.empty((0, len(self.columns)))
+        view = self._data[:self._size]
+        view.flags.writeable = False
+        return view
+
+    def column(self, name):
+        """某一列历史的只读视图，有效期同 rows()"""
+        return self.rows()[:, self.index[name]]
+
+    def budgets(self):
+        """每回合开始时预算的只读视图，有效期同 rows()"""
+        import numpy as np
+
+        self._sync()
+        if self._budget is None:
+            return np.empty(0)
+        view = self._budget[:self._size]
+        view.flags.writeable = False
+        return view
+
+    def turns(self):
+        """与各行对应的横坐标 0, 1, 2, ..."""
+        import numpy as np
+
+        return np.arange(self.size)
+
+    @property
+    def size(self):
+        """已记录的行数"""
+        return 0 if self.head is None else self.head.length
+
+    @property
+    def nbytes(self):
+        """同步数组占用的字节数"""
+        if self._data is None:
+            return 0
+        return self._data.nbytes + self._budget.nbytes
+
+    # 以下方法使其可以像 {指标: 历史列表} 一样读取
+    def __getitem__(self, name):
+        return self.column(name)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def __len__(self):
+        return len(self.columns)
+
+    def keys(self):
+        return self.columns
+
+    def values(self):
+        return [self.column(name) for name in self.columns]
+
+    def items(self):
+        return [(name, self.column(name)) for name in self.columns]
@@ -0,0 +1,151 @@
+"""公共经济学模拟游戏 - 分阶段性能插桩
+
+引擎和界面在每个阶段（政策校验、效果应用、随机事件、自然变化、范围限制、目标判断，
+以及界面、图表、政策控件刷新）前后设有插桩点。注册收集器后，每个阶段结束时
+把 (阶段路径, 耗时秒数, 新分配的内存块数) 交给收集器；没有注册收集器时插桩点几乎没有开销。
+
+内置的 PhaseStats 汇总每个阶段的耗时分位数，并输出火焰图格式（folded stacks）的摘要：
+
+    from instrumentation import PhaseStats, register_collector
+
+    stats = register_collector(PhaseStats())
+    ...                                   # 运行游戏
+    print(stats.summary())
+    stats.dump("profile.folded")          # 可交给 flamegraph.pl / speedscope
+
+图形界面设置环境变量 ECONOMIC_GAME_PROFILE=<文件路径> 后，关闭窗口时会写出摘要。
+"""
+import functools
+import sys
+import time
+
+_collectors = []
+_stack = []
+
+
+def register_collector(collector):
+    """注册收集器：需要实现 record(path, seconds, blocks) 方法；返回该收集器"""
+    _collectors.append(collector)
+    return collector
+
+
+def unregister_collector(collector):
+    if collector in _collectors:
+        _collectors.remove(collector)
+
+
+class _NullPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class _Phase:
+    __slots__ = ("name", "start", "blocks")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        _stack.append(self.name)
+        self.blocks = sys.getallocatedblocks()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        blocks = sys.getallocatedblocks() - self.blocks
+        path = tuple(_stack)
+        _stack.pop()
+        for collector in _collectors:
+            collector.record(path, elapsed, blocks)
+        return False
+
+
+def phase(name):
+    """插桩点：with phase("名称"): ...；阶段可以嵌套"""
+    if not _collectors:
+        return _NULL_PHASE
+    return _Phase(name)
+
+
+def instrumented(name):
+    """把整个函数作为一个阶段的装饰器"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _collectors:
+                return func(*args, **kwargs)
+            with _Phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def percentile(sorted_values, fraction):
+    """已排序序列的分位数（线性插值）"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * fraction
+    low = int(position)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (position - low)
+
+
+class PhaseStats:
+    """汇总各阶段的耗时和内存分配"""
+
+    def __init__(self):
+        self.samples = {}      # 阶段路径 -> 耗时列表
+        self.blocks = {}       # 阶段路径 -> 分配块数合计
+
+    def record(self, path, seconds, blocks):
+        self.samples.setdefault(path, []).append(seconds)
+        self.blocks[path] = self.blocks.get(path, 0) + blocks
+
+    def reset(self):
+        self.samples.clear()
+        self.blocks.clear()
+
+    def self_time(self, path):
+        """阶段自身的耗时（扣除直接子阶段）"""
+        total = sum(self.samples[path])
+        children = sum(sum(times) for child, times in self.samples.items()
+                       if len(child) == len(path) + 1 and child[:len(path)] == path)
+        return max(0.0, total - children)
+
+    def table(self):
+        """每个阶段一行：(阶段路径, 次数, 合计秒, p50, p90, p99, 最大值, 平均分配块数)"""
+        rows = []
+        for path, times in self.samples.items():
+            ordered = sorted(times)
+            rows.append((path, len(times), sum(times), percentile(ordered, 0.5), percentile(ordered, 0.9),
+                         percentile(ordered, 0.99), ordered[-1], self.blocks[path] / len(times)))
+        rows.sort(key=lambda row: row[0])
+        return rows
+
+    def summary(self):
+        """按阶段层级缩进的文字摘要，耗时单位为毫秒"""
+        lines = [f"{'阶段':30s} {'次数':>6s} {'合计':>9s} {'p50':>8s} {'p90':>8s} {'p99':>8s} {'最大':>8s} {'分配块':>7s}"]
+        for path, count, total, p50, p90, p99, worst, blocks in self.table():
+            name = "  " * (len(path) - 1) + path[-1]
+            lines.append(f"{name:30s} {count:6d} {total * 1e3:9.2f} {p50 * 1e3:8.3f} {p90 * 1e3:8.3f} "
+                         f"{p99 * 1e3:8.3f} {worst * 1e3:8.3f} {blocks:7.1f}")
+        return "\n".join(lines)
+
+    def folded(self):
+        """火焰图的 folded stacks 格式：每行 "父;子;孙 自身微秒数" """
+        return "\n".join(f"{';'.join(path)} {round(self.self_time(path) * 1e6)}"
+                         for path in sorted(self.samples))
+
+    def dump(self, path):
+        """把火焰图摘要写入文件，并在同名 .txt 文件中写入分位数表"""
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.folded() + "\n")
+        with open(path + ".txt", "w", encoding="utf-8") as f:
+            f.write(self.summary() + "\n")
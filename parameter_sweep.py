@@ -0,0 +1,150 @@
+"""公共经济学模拟游戏 - 多进程参数扫描
+
+对政策的成本、冷却、效果以及随机事件概率做网格或拉丁超立方扫描，
+每个参数组合用 batch_simulation 模拟一批对局，多个组合分发到进程池并行计算。
+每个组合算完立即以一行 JSON 追加到结果文件，不在内存中保留全部结果；
+同时提交到进程池的组合不超过进程数的 IN_FLIGHT_PER_PROCESS 倍，算完一个再提交下一个。
+
+参数名的写法：
+    "scenario"                               场景文件路径（其余参数在该场景的基础上覆盖）
+    "event_probability"                      随机事件概率
+    "policies.<政策下标>.cost"                 政策成本
+    "policies.<政策下标>.cooldown"             政策冷却回合数
+    "policies.<政策下标>.effects.<指标名>"      政策对某项指标的效果
+
+命令行用法：
+    python parameter_sweep.py sweep.json results.jsonl
+
+sweep.json 示例：
+    {"schedule": [[1, 5], [3, 9], [7]], "n_games": 20000, "seed": 1,
+     "grid": {"event_probability": [0.2, 0.3, 0.4], "policies.9.cost": [8, 10, 12]}}
+或用 "lhs": {"ranges": {"policies.0.cost": [10, 20]}, "samples": 64} 代替 "grid"。
+扫描多个场景时写 "grid": {"scenario": ["scenario_data/hard.json", ...]}，
+场景文件在每个进程中按内容哈希只编译一次。
+"""
+import copy
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from batch_simulation import BatchSimulation
+from economic_engine import DEFAULT_SCENARIO
+from scenarios import load_scenario
+
+INTEGER_FIELDS = ("cost", "cooldown")
+# 每个进程最多排队的组合数：保证进程不空闲，又不把全部组合一次性放进执行器队列
+IN_FLIGHT_PER_PROCESS = 2
+
+
+def grid(space):
+    """网格扫描：space 为 {参数名: 取值列表}，返回全部组合的列表"""
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[n] for n in names))]
+
+
+def latin_hypercube(ranges, samples, seed=None):
+    """拉丁超立方采样：ranges 为 {参数名: (下限, 上限)}，每个参数的区间被等分为 samples 层，每层恰好取一次"""
+    rng = np.random.default_rng(seed)
+    configurations = [{} for _ in range(samples)]
+    for name, (low, high) in ranges.items():
+        strata = (rng.permutation(samples) + rng.random(samples)) / samples
+        for config, u in zip(configurations, strata):
+            value = float(low + u * (high - low))
+            if name.split(".")[-1] in INTEGER_FIELDS:
+                value = int(round(value))
+            config[name] = value
+    return configurations
+
+
+def apply_overrides(overrides):
+    """把参数覆盖应用到场景（默认为默认场景）的政策表上，返回 (场景, 政策列表, 随机事件概率)"""
+    scenario = load_scenario(overrides["scenario"]) if "scenario" in overrides else DEFAULT_SCENARIO
+    policies = copy.deepcopy(scenario.policies)
+    event_probability = scenario.event_probability
+    for name, value in overrides.items():
+        parts = name.split(".")
+        if parts == ["scenario"]:
+            continue
+        elif parts == ["event_probability"]:
+            event_probability = float(value)
+        elif len(parts) == 3 and parts[0] == "policies" and parts[2] in INTEGER_FIELDS:
+            policies[int(parts[1])][parts[2]] = int(value)
+        elif len(parts) == 4 and parts[0] == "policies" and parts[2] == "effects":
+            policies[int(parts[1])]["effects"][parts[3]] = float(value)
+        else:
+            raise ValueError(f"无法识别的参数名: {name}")
+    return scenario, policies, event_probability
+
+
+def evaluate_configuration(config_id, overrides, schedule, n_games, seed):
+    """在一个参数组合下模拟 n_games 局，返回聚合结果"""
+    scenario, policies, event_probability = apply_overrides(overrides)
+    batch = BatchSimulation(n_games, policies=policies, event_probability=event_probability, seed=seed,
+                            scenario=scenario)
+    result = batch.run(schedule)
+    return {
+        "id": config_id,
+        "overrides": overrides,
+        "n_games": n_games,
+        "win_rate": result.win_rate(),
+        "completion_rate": result.completion_rate(),
+        "mean_score": result.mean_score(),
+        "failures": result.failure_breakdown(),
+    }
+
+
+def run_sweep(configurations, schedule, n_games, output_path, processes=None, seed=None,
+              common_random_numbers=False):
+    """并行评估全部参数组合，结果按完成顺序逐行写入 output_path（JSON Lines）
+
+    每个组合使用由 seed 派生的独立随机种子，结果与进程数无关。
+    common_random_numbers=True 时所有组合使用同一种子，组合之间的差异不受随机波动影响。
+    返回写入的行数。
+    """
+    if common_random_numbers:
+        seeds = [np.random.SeedSequence(seed)] * len(configurations)
+    else:
+        seeds = np.random.SeedSequence(seed).spawn(len(configurations))
+    processes = processes or os.cpu_count() or 1
+    window = IN_FLIGHT_PER_PROCESS * processes
+    jobs = enumerate(zip(configurations, seeds))
+    pending = set()
+    written = 0
+    with open(output_path, "a", encoding="utf-8") as output, \
+            ProcessPoolExecutor(max_workers=processes) as pool:
+        while True:
+            for k, (config, child) in itertools.islice(jobs, window - len(pending)):
+                pending.add(pool.submit(evaluate_configuration, k, config, schedule, n_games, child))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                output.write(json.dumps(future.result(), ensure_ascii=False) + "\n")
+                output.flush()
+                written += 1
+    return written
+
+
+def main(argv):
+    if len(argv) != 3:
+        print("用法: python parameter_sweep.py sweep.json results.jsonl")
+        return 1
+    with open(argv[1], encoding="utf-8") as f:
+        spec = json.load(f)
+    if "grid" in spec:
+        configurations = grid(spec["grid"])
+    else:
+        configurations = latin_hypercube(spec["lhs"]["ranges"], spec["lhs"]["samples"], spec.get("seed"))
+    written = run_sweep(configurations, spec["schedule"], spec.get("n_games", 10000), argv[2],
+                        processes=spec.get("processes"), seed=spec.get("seed"),
+                        common_random_numbers=spec.get("common_random_numbers", False))
+    print(f"已完成 {written} 个参数组合，结果写入 {argv[2]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,216 @@
+"""公共经济学模拟游戏 - 二进制回放日志
+
+把一局游戏记录为只追加的二进制日志：
+    文件头      魔数、版本、种子、政策数量、检查点间隔
+    APPLY       一次 apply_policies 的政策下标
+    EVENT       trigger_random_events 触发的事件下标
+    TURN        next_turn 的回合边界
+    CHECKPOINT  每隔若干回合记录一次完整状态（回合、预算、指标值、冷却）
+
+引擎每回合的随机数由 (种子, 回合) 派生，因此从检查点恢复后继续重放，
+结果与从第1回合重放逐位相同。一局12回合的日志通常只有一两百字节。
+
+    from economic_engine import EconomicEngine
+    from replay_log import ReplayRecorder, replay
+
+    recorder = ReplayRecorder()
+    engine = EconomicEngine(seed=7, recorder=recorder)
+    ...                                   # 正常进行游戏
+    data = recorder.getvalue()
+    engine = replay(data, turn=6)         # 第6回合开始时的状态
+
+大量日志可以用 append_log/iter_logs 按长度前缀连续保存在一个文件中。
+"""
+import struct
+
+from economic_engine import EconomicEngine, PolicyError, INDICATORS, DEFAULT_SCENARIO
+
+MAGIC = b"EGRL"
+VERSION = 1
+CHECKPOINT_INTERVAL = 4
+
+TAG_APPLY = 1
+TAG_EVENT = 2
+TAG_TURN = 3
+TAG_CHECKPOINT = 4
+
+HEADER = struct.Struct("<4sBQHB")         # 魔数, 版本, 种子, 政策数量, 检查点间隔
+APPLY = struct.Struct("<BH")               # 标记, 政策数量（之后为各政策下标）
+EVENT = struct.Struct("<BB")               # 标记, 事件下标
+TURN = struct.Struct("<B")                 # 标记
+CHECKPOINT = struct.Struct("<BHi%dd" % len(INDICATORS))  # 标记, 回合, 预算, 指标值（之后为各政策冷却）
+LENGTH = struct.Struct("<I")
+
+
+def checkpoint_format(n_indicators):
+    """指标数为 n_indicators 的场景的检查点格式（默认场景即 CHECKPOINT）"""
+    return CHECKPOINT if n_indicators == len(INDICATORS) else struct.Struct("<BHi%dd" % n_indicators)
+
+
+class ReplayError(ValueError):
+    """日志格式错误，或重放结果与日志记录不一致"""
+
+
+class ReplayRecorder:
+    """引擎的记录器：把一局游戏写成二进制日志"""
+
+    def __init__(self, checkpoint_interval=CHECKPOINT_INTERVAL):
+        self.checkpoint_interval = checkpoint_interval
+        self.buffer = bytearray()
+
+    def start(self, engine):
+        """新的一局开始（由引擎在 reset 时调用）"""
+        if not isinstance(engine.seed, int) or not 0 <= engine.seed < 2 ** 64:
+            raise ReplayError(f"只能记录 64 位非负整数种子: {engine.seed!r}")
+        self.n_policies = len(engine.policies)
+        self.cooldown_format = struct.Struct("<%dB" % self.n_policies)
+        self.checkpoint_format = checkpoint_format(len(engine.indicators))
+        self.buffer = bytearray(HEADER.pack(MAGIC, VERSION, engine.seed, self.n_policies,
+                                            self.checkpoint_interval))
+
+    def record_apply(self, indices):
+        self.buffer += APPLY.pack(TAG_APPLY, len(indices))
+        self.buffer += struct.pack("<%dH" % len(indices), *indices)
+
+    def record_event(self, index):
+        self.buffer += EVENT.pack(TAG_EVENT, index)
+
+    def record_turn(self, engine):
+        self.buffer += TURN.pack(TAG_TURN)
+        if engine.turn % self.checkpoint_interval == 0:
+            self.buffer += self.checkpoint_format.pack(TAG_CHECKPOINT, engine.turn, engine.budget,
+                                                       *engine.indicator_vector())
+            self.buffer += self.cooldown_format.pack(
+                *(min(255, engine.policy_cooldowns.get(p['name'], 0)) for p in engine.policies))
+
+    def getvalue(self):
+        """当前日志的字节串"""
+        return bytes(self.buffer)
+
+
+class ReplayLog:
+    """解析后的日志：只扫描字节、不做模拟
+
+    检查点的长度取决于场景的指标数，有额外指标的场景需要传入 n_indicators。
+    """
+
+    def __init__(self, data, n_indicators=len(INDICATORS)):
+        if len(data) < HEADER.size:
+            raise ReplayError("日志长度不足")
+        magic, version, self.seed, self.n_policies, self.checkpoint_interval = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ReplayError("不是可识别的回放日志")
+        self.data = data
+        cooldown_format = struct.Struct("<%dB" % self.n_policies)
+        checkpoint = checkpoint_format(n_indicators)
+
+        # 记录列表：(标记, 内容)；APPLY 为下标元组，EVENT 为事件下标，
+        # TURN 为进入的回合数，CHECKPOINT 为 (回合, 预算, 指标值, 冷却)
+        self.records = []
+        self.checkpoints = {}        # 回合 -> 该检查点在 records 中的位置
+        turn = 1
+        offset = HEADER.size
+        try:
+            while offset < len(data):
+                tag = data[offset]
+                if tag == TAG_APPLY:
+                    _, count = APPLY.unpack_from(data, offset)
+                    offset += APPLY.size
+                    indices = struct.unpack_from("<%dH" % count, data, offset)
+                    offset += 2 * count
+                    self.records.append((TAG_APPLY, indices))
+                elif tag == TAG_EVENT:
+                    _, index = EVENT.unpack_from(data, offset)
+                    offset += EVENT.size
+                    self.records.append((TAG_EVENT, index))
+                elif tag == TAG_TURN:
+                    offset += TURN.size
+                    turn += 1
+                    self.records.append((TAG_TURN, turn))
+                elif tag == TAG_CHECKPOINT:
+                    _, cp_turn, budget, *values = checkpoint.unpack_from(data, offset)
+                    offset += checkpoint.size
+                    cooldowns = cooldown_format.unpack_from(data, offset)
+                    offset += cooldown_format.size
+                    self.checkpoints[cp_turn] = len(self.records)
+                    self.records.append((TAG_CHECKPOINT, (cp_turn, budget, values, cooldowns)))
+                else:
+                    raise ReplayError(f"未知的记录标记 {tag} (位置 {offset})")
+        except struct.error as e:
+            raise ReplayError(f"日志在位置 {offset} 处被截断") from e
+        self.turns = turn
+
+    def events(self, scenario=DEFAULT_SCENARIO):
+        """按顺序列出触发的随机事件名称（不需要模拟）"""
+        return [scenario.events[index]['name'] for tag, index in self.records if tag == TAG_EVENT]
+
+    def selections(self):
+        """按顺序列出每次实施的政策下标"""
+        return [indices for tag, indices in self.records if tag == TAG_APPLY]
+
+
+def replay(data, turn=None, seek=True, scenario=None):
+    """重放日志，返回处于第 turn 回合开始时（默认为日志末尾）的引擎
+
+    seek=True 时从不晚于 turn 的最近检查点恢复，只重放之后的记录，
+    此时引擎的历史记录从检查点所在回合开始；seek=False 时从第1回合完整重放。
+    日志不记录场景，非默认场景的对局需要传入录制时的 scenario。
+    """
+    log = data if isinstance(data, ReplayLog) else ReplayLog(
+        data, len((scenario or DEFAULT_SCENARIO).indicators))
+    target = log.turns if turn is None else turn
+    if not 1 <= target <= log.turns:
+        raise ReplayError(f"日志只包含第 1-{log.turns} 回合")
+
+    engine = EconomicEngine(seed=log.seed, scenario=scenario)
+    start = 0
+    if seek:
+        candidates = [t for t in log.checkpoints if t <= target]
+        if candidates:
+            start = log.checkpoints[max(candidates)]
+
+    fired = None        # 本回合重放时触发、尚未与日志核对的事件
+    for position in range(start, len(log.records)):
+        tag, content = log.records[position]
+        if tag == TAG_CHECKPOINT:
+            if position == start:
+                engine.restore(*content)
+            elif (engine.turn, engine.budget, engine.indicator_vector()) != (content[0], content[1], content[2]):
+                raise ReplayError(f"第 {engine.turn} 回合的状态与日志检查点不一致")
+        elif engine.turn >= target:
+            break
+        elif tag == TAG_APPLY:
+            try:
+                fired = engine.apply_policies(list(content))
+            except PolicyError as e:
+                raise ReplayError(f"第 {engine.turn} 回合无法重放政策: {e.message}") from e
+        elif tag == TAG_EVENT:
+            if fired is not engine.scenario.events[content]:
+                raise ReplayError(f"第 {engine.turn} 回合的随机事件与日志不一致")
+            fired = None
+        elif tag == TAG_TURN:
+            if fired is not None:
+                raise ReplayError(f"第 {engine.turn} 回合触发了日志中没有记录的随机事件")
+            engine.next_turn()
+    return engine
+
+
+def append_log(file, data):
+    """把一局日志以长度前缀追加到已打开的二进制文件"""
+    file.write(LENGTH.pack(len(data)))
+    file.write(data)
+
+
+def iter_logs(file):
+    """依次读出 append_log 写入的各局日志"""
+    while True:
+        prefix = file.read(LENGTH.size)
+        if not prefix:
+            return
+        if len(prefix) < LENGTH.size:
+            raise ReplayError("日志文件被截断")
+        size, = LENGTH.unpack(prefix)
+        data = file.read(size)
+        if len(data) < size:
+            raise ReplayError("日志文件被截断")
+        yield data
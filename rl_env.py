@@ -0,0 +1,199 @@
+"""公共经济学模拟游戏 - 强化学习环境
+
+把回合循环（实施政策 → 随机事件 → 进入下一回合/自然变化）包装成 Gym 风格的环境：
+    观测   各指标的值、当前预算、每项政策剩余的冷却回合数（float32 向量）
+    动作   每项政策是否实施的 0/1 掩码（MultiBinary）；全 0 表示本回合不实施政策
+    奖励   reward="score" 时为 calculate_final_score 的增量，一局奖励之和等于最终得分减开局得分；
+          reward="final" 时只在对局结束时给出最终得分；政府倒台时再减去 failure_penalty
+
+无法实施的动作（预算不足、冷却中、前置条件不满足）按不实施政策处理，info["invalid"] 标明。
+提前胜利或政府倒台时 terminated 为真，下完最后一回合时 truncated 为真。
+
+EconomicEnv 逐局运行 EconomicEngine，规则与界面完全一致；
+VectorEconomicEnv 在 BatchSimulation 的数组上同时推进成千上万局，每步只有数组运算，
+对局结束后自动重置（结束时的观测在 info["final_observation"] 中）：
+
+    env = VectorEconomicEnv(4096, seed=0)
+    obs, info = env.reset()
+    obs, reward, terminated, truncated, info = env.step(actions)   # actions: (4096 × 政策数)
+
+安装 gymnasium 后可通过 observation_space / action_space 取得对应的空间。
+"""
+import numpy as np
+
+from batch_simulation import BatchSimulation, OUTCOME_FAILURE_BASE
+from economic_engine import EconomicEngine, PolicyError
+from rng_streams import game_seed
+
+REWARD_MODES = ("score", "final")
+
+
+def _check_reward(reward):
+    if reward not in REWARD_MODES:
+        raise ValueError(f"未知的奖励方式：{reward}（可选 {', '.join(REWARD_MODES)}）")
+
+
+def _spaces(scenario, n_policies):
+    """(观测空间, 动作空间)；需要安装 gymnasium"""
+    from gymnasium import spaces
+
+    low = np.concatenate([scenario.lower_bounds, [0], np.zeros(n_policies)]).astype(np.float32)
+    max_cooldown = max([0] + [policy['cooldown'] for policy in scenario.policies])
+    high = np.concatenate([scenario.upper_bounds, [scenario.max_budget],
+                           np.full(n_policies, max_cooldown)]).astype(np.float32)
+    return spaces.Box(low, high, dtype=np.float32), spaces.MultiBinary(n_policies)
+
+
+class EconomicEnv:
+    """单局环境：在 EconomicEngine 上执行，用于评估和调试"""
+
+    def __init__(self, scenario=None, seed=None, reward="score", failure_penalty=0.0):
+        _check_reward(reward)
+        self.engine = EconomicEngine(scenario=scenario)
+        self.scenario = self.engine.scenario
+        self.n_policies = len(self.engine.policies)
+        self.reward_mode = reward
+        self.failure_penalty = failure_penalty
+        self.seed = seed
+        self.episodes = 0
+        self.score = 0
+
+    @property
+    def observation_space(self):
+        return _spaces(self.scenario, self.n_policies)[0]
+
+    @property
+    def action_space(self):
+        return _spaces(self.scenario, self.n_policies)[1]
+
+    def reset(self, seed=None):
+        """开始新的一局，返回 (观测, info)；给定种子时之后各局的种子由它依次派生"""
+        if seed is not None:
+            self.seed = seed
+            self.episodes = 0
+        self.engine.reset(None if self.seed is None else game_seed(self.seed, self.episodes))
+        self.episodes += 1
+        self.score = self.engine.calculate_final_score()
+        return self.observation(), {"seed": self.engine.seed}
+
+    def observation(self):
+        engine = self.engine
+        cooldowns = [engine.policy_cooldowns.get(policy['name'], 0) for policy in engine.policies]
+        return np.array(engine.indicator_vector() + [engine.budget] + cooldowns, dtype=np.float32)
+
+    def step(self, action):
+        """执行一回合，返回 (观测, 奖励, terminated, truncated, info)"""
+        engine = self.engine
+        selected = np.flatnonzero(action).tolist()
+        result = None
+        invalid = False
+        if selected:
+            try:
+                engine.apply_policies(selected)
+                result = engine.check_game_end()
+            except PolicyError:
+                invalid = True
+        if result is None:
+            engine.next_turn()
+
+        score = engine.calculate_final_score()
+        terminated = result is not None
+        truncated = not terminated and engine.game_over
+        if self.reward_mode == "score":
+            reward = score - self.score
+        else:
+            reward = score if terminated or truncated else 0
+        if result is not None and result[0] == "defeat":
+            reward -= self.failure_penalty
+        self.score = score
+        info = {"score": score, "invalid": invalid, "result": result,
+                "objectives": engine.completed_objectives()}
+        return self.observation(), float(reward), terminated, truncated, info
+
+
+class VectorEconomicEnv:
+    """同时推进 n_envs 局的向量化环境，观测为 (n_envs × 观测维数) 的数组"""
+
+    def __init__(self, n_envs, scenario=None, seed=None, reward="score", failure_penalty=0.0, auto_reset=True):
+        _check_reward(reward)
+        self.sim = BatchSimulation(n_envs, seed=seed, scenario=scenario)
+        self.scenario = self.sim.scenario
+        self.n_envs = n_envs
+        self.n_policies = len(self.sim.policies)
+        self.n_indicators = len(self.scenario.indicators)
+        self.max_turns = self.sim.max_turns
+        self.reward_mode = reward
+        self.failure_penalty = failure_penalty
+        self.auto_reset = auto_reset
+        # 各局各自的回合数；self.sim.turn 只作为步数计数，用于派生每一步的随机数子流
+        self.turns = np.ones(n_envs, dtype=np.int64)
+        self.initial_score = self.sim.final_scores()[0]
+        self.score = np.full(n_envs, self.initial_score)
+
+    @property
+    def observation_space(self):
+        """单局的观测空间"""
+        return _spaces(self.scenario, self.n_policies)[0]
+
+    @property
+    def action_space(self):
+        """单局的动作空间"""
+        return _spaces(self.scenario, self.n_policies)[1]
+
+    def reset(self, seed=None):
+        """重置全部对局，返回 (观测, info)"""
+        if seed is not None:
+            self.sim.seed_sequence = np.random.SeedSequence(seed)
+        self.sim.reset()
+        self.turns[:] = 1
+        self.score[:] = self.initial_score
+        return self.observation(), {}
+
+    def observation(self):
+        sim = self.sim
+        k = self.n_indicators
+        obs = np.empty((self.n_envs, k + 1 + self.n_policies), dtype=np.float32)
+        obs[:, :k] = sim.data
+        obs[:, k] = sim.budget
+        obs[:, k + 1:] = sim.cooldown_left
+        return obs
+
+    def step(self, actions):
+        """所有对局执行一回合；actions 为 (n_envs × 政策数) 的 0/1 数组
+
+        返回 (观测, 奖励, terminated, truncated, info)，后四项都是长度为 n_envs 的数组。
+        auto_reset=False 时已结束的对局不再变化，奖励为 0。
+        """
+        sim = self.sim
+        selected = np.asarray(actions, dtype=bool).reshape(self.n_envs, self.n_policies)
+        running = sim.active.copy()
+
+        valid = sim.apply_policies(selected)
+        terminated = running & ~sim.active       # 提前胜利或政府倒台
+        sim.advance(sim.active)
+        self.turns += sim.active
+        truncated = sim.active & (self.turns > self.max_turns)
+        sim.active &= ~truncated
+        sim.turn += 1
+
+        score = sim.final_scores()
+        if self.reward_mode == "score":
+            reward = np.where(running, score - self.score, 0)
+        else:
+            reward = np.where(terminated | truncated, score, 0)
+        reward = reward.astype(np.float32)
+        if self.failure_penalty:
+            reward[terminated & (sim.outcome >= OUTCOME_FAILURE_BASE)] -= self.failure_penalty
+        self.score = score
+
+        info = {"score": score, "outcome": sim.outcome.copy(),
+                "invalid": running & selected.any(axis=1) & ~valid}
+        obs = self.observation()
+        done = terminated | truncated
+        if self.auto_reset and done.any():
+            info["final_observation"] = obs
+            sim.reset_games(done)
+            self.turns[done] = 1
+            self.score = np.where(done, self.initial_score, score)
+            obs = self.observation()
+        return obs, reward, terminated, truncated, info
@@ -0,0 +1,64 @@
+"""公共经济学模拟游戏 - 可复现的随机数流
+
+每局游戏由一个种子决定，再按用途拆分为互相独立的子流：
+effects（政策效果的±10%波动）、events（随机事件）、noise（自然变化中的噪声）。
+子流每回合由 (种子, 用途, 回合) 重新派生，某一回合的随机数不受之前回合抽取次数的影响，
+因此可以从任意回合开始继续模拟。
+子种子由主种子和键经哈希派生，与对局在哪个进程、以什么顺序运行无关，
+因此大量并行对局的结果可以逐位复现；比较两种策略时使用同一种子，
+随机事件和噪声保持一致（公共随机数），可以显著降低比较的方差。
+"""
+import hashlib
+import random
+import secrets
+
+STREAMS = ("effects", "events", "noise")
+
+
+def derive_seed(seed, *key):
+    """由主种子和键派生 64 位子种子"""
+    data = repr((seed,) + key).encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+def new_seed():
+    """生成新的随机主种子"""
+    return secrets.randbits(63)
+
+
+def game_seed(master_seed, game_index):
+    """第 game_index 局的种子，只取决于主种子和局号"""
+    return derive_seed(master_seed, "game", game_index)
+
+
+class GameRandom:
+    """一局游戏的随机数源，按用途拆分为互相独立的子流"""
+
+    def __init__(self, seed=None, turn=1):
+        self.seed = new_seed() if seed is None else seed
+        self.for_turn(turn)
+
+    def for_turn(self, turn):
+        """切换到第 turn 回合的子流"""
+        self.turn = turn
+        # 使用方在抽取随机数前置为 True；未使用过的子流只需回合数即可重建
+        self.used = False
+        self.effects = random.Random(derive_seed(self.seed, "effects", turn))
+        self.events = random.Random(derive_seed(self.seed, "events", turn))
+        self.noise = random.Random(derive_seed(self.seed, "noise", turn))
+
+    def getstate(self):
+        """三个子流的当前状态（不可变元组）；本回合尚未抽取时只含回合数"""
+        if not self.used:
+            return (self.turn,)
+        return self.turn, self.effects.getstate(), self.events.getstate(), self.noise.getstate()
+
+    def setstate(self, state):
+        if len(state) == 1:
+            self.for_turn(state[0])
+            return
+        self.turn, effects, events, noise = state
+        self.used = True
+        self.effects.setstate(effects)
+        self.events.setstate(events)
+        self.noise.setstate(noise)
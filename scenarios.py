@@ -0,0 +1,374 @@
+"""公共经济学模拟游戏 - 场景文件
+
+场景文件是 JSON，描述一局游戏的初始指标、指标范围和好坏阈值、回合数和预算、
+政策表、随机事件、目标、失败条件和得分规则。文件中没有出现的项使用默认场景的值，
+因此难度或回合数的变体只需写出不同的几项：
+
+    {"name": "长期执政", "max_turns": 24, "budget_per_turn": 25}
+
+除内置的 10 项指标外，场景还可以在 "indicators" 中定义额外的指标，
+之后在政策效果、目标、失败条件等处像内置指标一样使用：
+
+    "indicators": {"粮食安全": {"initial": 60, "range": [0, 100], "thresholds": [80, null, 40, null]}}
+
+加载时先完整校验一次，再编译为引擎使用的 Scenario（按指标顺序排列的查找表），
+编译结果按文件内容的哈希缓存：同一内容的文件无论加载多少次只编译一次，
+在参数扫描中切换数百个场景时几乎没有开销。
+
+    from scenarios import load_scenario
+    engine = EconomicEngine(scenario=load_scenario("scenario_data/hard.json"))
+
+命令行用法：
+    python scenarios.py check scenario_data/*.json      # 校验场景文件
+    python scenarios.py export standard.json            # 导出默认场景，作为编写新场景的模板
+    python scenarios.py synthesize large.json 500 120 240  # 生成大规模场景（回合数 指标数 政策数）
+"""
+import hashlib
+import json
+import numbers
+import random
+import sys
+
+from economic_engine import Scenario, DEFAULT_SCENARIO, INDICATORS, INDICATOR_RANGES, INDICATOR_THRESHOLDS, INF
+
+# 文件中可以出现的项
+FIELDS = ("name", "description", "indicators", "initial_data", "ranges", "thresholds", "max_turns",
+          "initial_budget", "max_budget", "budget_per_turn", "event_probability", "effect_noise", "policies",
+          "events", "objectives", "victory_objectives", "failures", "objective_score", "score_bonuses")
+OPERATORS = ("<=", ">=")
+MAX_EVENTS = 255          # 回放日志用一个字节记录事件下标
+
+_cache = {}               # 文件内容哈希 -> Scenario
+
+
+class ScenarioError(ValueError):
+    """场景文件无法解析或校验失败"""
+
+    def __init__(self, where, message):
+        super().__init__(f"{where}: {message}" if where else message)
+        self.where = where
+        self.message = message
+
+
+def _number(value, where, low=None, high=None, integer=False):
+    """校验数值（可选范围和整数要求），返回该数值"""
+    kind = numbers.Integral if integer else numbers.Real
+    if isinstance(value, bool) or not isinstance(value, kind):
+        raise ScenarioError(where, "应为整数" if integer else "应为数值")
+    if low is not None and value < low:
+        raise ScenarioError(where, f"不能小于 {low}")
+    if high is not None and value > high:
+        raise ScenarioError(where, f"不能大于 {high}")
+    return value
+
+
+def _text(value, where):
+    if not isinstance(value, str) or not value:
+        raise ScenarioError(where, "应为非空字符串")
+    return value
+
+
+def _mapping(value, where):
+    if not isinstance(value, dict):
+        raise ScenarioError(where, "应为对象")
+    return value
+
+
+def _sequence(value, where):
+    if not isinstance(value, list):
+        raise ScenarioError(where, "应为列表")
+    return value
+
+
+def _indicator(name, where, known):
+    """known 为场景的全部指标（内置指标加上额外指标）"""
+    if name not in known:
+        raise ScenarioError(where, f"未知的指标 {name!r}")
+    return name
+
+
+def _indicator_values(value, where, known):
+    """{指标: 数值} 的部分覆盖"""
+    return {_indicator(k, f"{where}.{k}", known): _number(v, f"{where}.{k}")
+            for k, v in _mapping(value, where).items()}
+
+
+def _range(value, where):
+    """[下限, 上限]"""
+    if len(_sequence(value, where)) != 2:
+        raise ScenarioError(where, "应为 [下限, 上限]")
+    low, high = _number(value[0], f"{where}[0]"), _number(value[1], f"{where}[1]")
+    if low >= high:
+        raise ScenarioError(where, "下限应小于上限")
+    return low, high
+
+
+def _thresholds(value, where):
+    """[good_low, good_high, bad_low, bad_high]，null 表示无界"""
+    if len(_sequence(value, where)) != 4:
+        raise ScenarioError(where, "应为 [good_low, good_high, bad_low, bad_high]，无界用 null")
+    return tuple(unbounded if v is None else _number(v, f"{where}[{c}]")
+                 for c, (v, unbounded) in enumerate(zip(value, (-INF, INF, -INF, INF))))
+
+
+def _extra_indicators(value):
+    """额外指标：{名称: {"initial": 初始值, "range": [下限, 上限], "thresholds": [...]}}"""
+    extras = {}
+    for name, item in _mapping(value, "indicators").items():
+        here = f"indicators.{name}"
+        if name in INDICATORS:
+            raise ScenarioError(here, "与内置指标重名")
+        _mapping(item, here)
+        missing = [k for k in ("initial", "range", "thresholds") if k not in item]
+        if missing:
+            raise ScenarioError(here, f"缺少 {', '.join(missing)}")
+        extras[_text(name, here)] = (_number(item["initial"], f"{here}.initial"),
+                                     _range(item["range"], f"{here}.range"),
+                                     _thresholds(item["thresholds"], f"{here}.thresholds"))
+    return extras
+
+
+def _condition(item, where, keys, known):
+    """{"indicator": ..., "op": ..., "threshold": ...} 形式的条件"""
+    _mapping(item, where)
+    missing = [k for k in keys if k not in item]
+    if missing:
+        raise ScenarioError(where, f"缺少 {', '.join(missing)}")
+    if item["op"] not in OPERATORS:
+        raise ScenarioError(f"{where}.op", f"应为 {' 或 '.join(OPERATORS)}")
+    return (_indicator(item["indicator"], f"{where}.indicator", known), item["op"],
+            _number(item["threshold"], f"{where}.threshold"))
+
+
+def _items(value, where, kind, known):
+    """政策或事件列表：kind 为 "policy" 时还校验成本、冷却和前置条件"""
+    items = []
+    names = set()
+    for k, item in enumerate(_sequence(value, where)):
+        here = f"{where}[{k}]"
+        _mapping(item, here)
+        name = _text(item.get("name"), f"{here}.name")
+        if name in names:
+            raise ScenarioError(f"{here}.name", f"名称 {name!r} 重复")
+        names.add(name)
+        compiled = {"name": name, "description": _text(item.get("description"), f"{here}.description")}
+        if kind == "policy":
+            compiled["cost"] = _number(item.get("cost"), f"{here}.cost", low=0, integer=True)
+            compiled["cooldown"] = _number(item.get("cooldown"), f"{here}.cooldown", low=0, high=255,
+                                           integer=True)
+        compiled["effects"] = _indicator_values(item.get("effects", {}), f"{here}.effects", known)
+        if kind == "policy" and "requirements" in item:
+            compiled["requirements"] = _indicator_values(item["requirements"], f"{here}.requirements", known)
+        items.append(compiled)
+    if not items:
+        raise ScenarioError(where, "至少需要一项")
+    return items
+
+
+def compile_scenario(data, key="custom"):
+    """校验场景字典并编译为 Scenario；没有给出的项使用默认场景的值"""
+    _mapping(data, "")
+    unknown = [k for k in data if k not in FIELDS]
+    if unknown:
+        raise ScenarioError("", f"未知的项 {', '.join(unknown)}")
+    base = DEFAULT_SCENARIO
+    kwargs = {"key": key}
+
+    kwargs["name"] = _text(data.get("name", base.name), "name")
+    kwargs["description"] = data.get("description", base.description)
+    if not isinstance(kwargs["description"], str):
+        raise ScenarioError("description", "应为字符串")
+
+    extras = _extra_indicators(data.get("indicators", {}))
+    known = set(INDICATORS) | set(extras)
+
+    ranges = dict(INDICATOR_RANGES)
+    ranges.update((k, extra[1]) for k, extra in extras.items())
+    for k, value in _mapping(data.get("ranges", {}), "ranges").items():
+        ranges[k] = _range(value, f"ranges.{_indicator(k, f'ranges.{k}', known)}")
+    kwargs["ranges"] = ranges
+
+    initial = dict(base.initial_data)
+    initial.update((k, extra[0]) for k, extra in extras.items())
+    initial.update(_indicator_values(data.get("initial_data", {}), "initial_data", known))
+    for k, value in initial.items():
+        if not ranges[k][0] <= value <= ranges[k][1]:
+            raise ScenarioError(f"initial_data.{k}", f"{value} 超出范围 {list(ranges[k])}")
+    kwargs["initial_data"] = initial
+
+    thresholds = dict(INDICATOR_THRESHOLDS)
+    thresholds.update((k, extra[2]) for k, extra in extras.items())
+    for k, value in _mapping(data.get("thresholds", {}), "thresholds").items():
+        thresholds[k] = _thresholds(value, f"thresholds.{_indicator(k, f'thresholds.{k}', known)}")
+    kwargs["thresholds"] = thresholds
+
+    kwargs["max_turns"] = _number(data.get("max_turns", base.max_turns), "max_turns", low=1, high=65535,
+                                  integer=True)
+    kwargs["max_budget"] = _number(data.get("max_budget", base.max_budget), "max_budget", low=0, integer=True)
+    kwargs["initial_budget"] = _number(data.get("initial_budget", base.initial_budget), "initial_budget",
+                                       low=0, high=kwargs["max_budget"], integer=True)
+    kwargs["budget_per_turn"] = _number(data.get("budget_per_turn", base.budget_per_turn), "budget_per_turn",
+                                        low=0, integer=True)
+    kwargs["event_probability"] = _number(data.get("event_probability", base.event_probability),
+                                          "event_probability", low=0, high=1)
+    kwargs["effect_noise"] = _number(data.get("effect_noise", base.effect_noise), "effect_noise", low=0, high=1)
+
+    kwargs["policies"] = (_items(data["policies"], "policies", "policy", known) if "policies" in data
+                          else base.policies)
+    kwargs["events"] = _items(data["events"], "events", "event", known) if "events" in data else base.events
+    if len(kwargs["events"]) > MAX_EVENTS:
+        raise ScenarioError("events", f"最多 {MAX_EVENTS} 项")
+
+    if "objectives" in data:
+        objectives = {}
+        for name, item in _mapping(data["objectives"], "objectives").items():
+            here = f"objectives.{name}"
+            indicator, op, threshold = _condition(item, here, ("indicator", "op", "threshold"), known)
+            target = item.get("target") or f"{indicator} {'≥' if op == '>=' else '≤'} {threshold:g}"
+            objectives[name] = (indicator, op, threshold, _text(target, f"{here}.target"))
+        if not objectives:
+            raise ScenarioError("objectives", "至少需要一项")
+        kwargs["objectives"] = objectives
+        count = len(objectives)
+    else:
+        count = len(base.objective_conditions)
+    kwargs["victory_objectives"] = _number(data.get("victory_objectives", base.victory_objectives),
+                                           "victory_objectives", low=1, high=count, integer=True)
+
+    if "failures" in data:
+        failures = []
+        for k, item in enumerate(_sequence(data["failures"], "failures")):
+            condition = _condition(item, f"failures[{k}]", ("name", "indicator", "op", "threshold"), known)
+            failures.append((_text(item["name"], f"failures[{k}].name"), *condition))
+        kwargs["failures"] = failures
+    kwargs["objective_score"] = _number(data.get("objective_score", base.objective_score), "objective_score")
+    if "score_bonuses" in data:
+        kwargs["score_bonuses"] = [(*_condition(item, f"score_bonuses[{k}]",
+                                                ("indicator", "op", "threshold", "bonus"), known),
+                                    _number(item["bonus"], f"score_bonuses[{k}].bonus"))
+                                   for k, item in enumerate(_sequence(data["score_bonuses"], "score_bonuses"))]
+    return Scenario(**kwargs)
+
+
+def load_scenario(path):
+    """读取、校验并编译场景文件；同一内容的文件只编译一次"""
+    with open(path, "rb") as f:
+        content = f.read()
+    key = hashlib.sha256(content).hexdigest()[:16]
+    scenario = _cache.get(key)
+    if scenario is None:
+        try:
+            data = json.loads(content.decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise ScenarioError("", f"{path} 不是有效的 JSON: {e}") from e
+        scenario = _cache[key] = compile_scenario(data, key)
+    return scenario
+
+
+def clear_cache():
+    """清空编译结果的缓存"""
+    _cache.clear()
+
+
+def scenario_to_dict(scenario=DEFAULT_SCENARIO):
+    """把场景转换为场景文件的格式（完整写出全部项）"""
+    def condition(indicator, op, threshold):
+        return {"indicator": indicator, "op": op, "threshold": threshold}
+
+    def bound(value):
+        return None if value in (INF, -INF) else value
+
+    def thresholds(i):
+        return [bound(column[i]) for column in scenario.thresholds]
+
+    extras = {k: {"initial": scenario.initial_data[k],
+                  "range": [scenario.lower_bounds[i], scenario.upper_bounds[i]],
+                  "thresholds": thresholds(i)}
+              for i, k in enumerate(scenario.indicators) if i >= len(INDICATORS)}
+    return {
+        "name": scenario.name,
+        "description": scenario.description,
+        **({"indicators": extras} if extras else {}),
+        "initial_data": {k: scenario.initial_data[k] for k in INDICATORS},
+        "ranges": {k: [low, high] for k, low, high in zip(INDICATORS, scenario.lower_bounds,
+                                                          scenario.upper_bounds)},
+        "thresholds": {k: thresholds(i) for i, k in enumerate(INDICATORS)},
+        "max_turns": scenario.max_turns,
+        "initial_budget": scenario.initial_budget,
+        "max_budget": scenario.max_budget,
+        "budget_per_turn": scenario.budget_per_turn,
+        "event_probability": scenario.event_probability,
+        "effect_noise": scenario.effect_noise,
+        "policies": scenario.policies,
+        "events": scenario.events,
+        "objectives": {name: {**condition(*scenario.objective_conditions[name]), "target": obj["target"]}
+                       for name, obj in scenario.objectives.items()},
+        "victory_objectives": scenario.victory_objectives,
+        "failures": [{"name": name, **condition(indicator, op, threshold)}
+                     for name, indicator, op, threshold in scenario.failure_conditions],
+        "objective_score": scenario.objective_score,
+        "score_bonuses": [{**condition(indicator, op, threshold), "bonus": bonus}
+                          for indicator, op, threshold, bonus in scenario.score_bonuses],
+    }
+
+
+def synthetic_scenario(max_turns=500, n_indicators=120, n_policies=240, n_events=40, effects_per_policy=4,
+                       seed=0):
+    """生成大规模场景的数据（用于压力测试，也可以写成场景文件在界面中试玩）
+
+    在内置指标之外补足到 n_indicators 项指标；每项政策随机影响 effects_per_policy 项额外指标，
+    效果正负各半，内置指标只受自然变化影响，因此整局通常不会提前失败。
+    """
+    rng = random.Random(seed)
+    extras = [f"指标{k:03d}" for k in range(max(0, n_indicators - len(INDICATORS)))]
+
+    def effects(count, scale):
+        return {k: round(rng.choice((-1, 1)) * rng.uniform(0.2, 1.0) * scale, 2)
+                for k in rng.sample(extras, min(count, len(extras)))}
+
+    return {
+        "name": f"大规模场景（{max_turns} 回合）",
+        "description": f"{len(INDICATORS) + len(extras)} 项指标、{n_policies} 项政策的长期执政",
+        "indicators": {k: {"initial": 50.0, "range": [0.0, 100.0], "thresholds": [70.0, None, 30.0, None]}
+                       for k in extras},
+        "max_turns": max_turns,
+        "policies": [{"name": f"政策{p:03d}", "description": f"第 {p} 项政策",
+                      "cost": rng.randint(5, 25), "cooldown": rng.randint(1, 4),
+                      "effects": effects(effects_per_policy, 3.0)}
+                     for p in range(n_policies)],
+        "events": [{"name": f"事件{e:02d}", "description": f"第 {e} 项随机事件", "effects": effects(3, 2.0)}
+                   for e in range(n_events)],
+        **({"objectives": {f"🎯 {k}": {"indicator": k, "op": ">=", "threshold": 90.0} for k in extras[:4]},
+            "victory_objectives": min(4, len(extras))} if extras else {}),
+    }
+
+
+def main(argv):
+    if len(argv) >= 3 and argv[1] == "check":
+        failed = 0
+        for path in argv[2:]:
+            try:
+                scenario = load_scenario(path)
+            except (OSError, ScenarioError) as e:
+                print(f"❌ {path}: {e}")
+                failed += 1
+            else:
+                print(f"✅ {path}: {scenario.name}（{scenario.max_turns} 回合，{len(scenario.policies)} 项政策）")
+        return 1 if failed else 0
+    if len(argv) == 3 and argv[1] == "export":
+        with open(argv[2], "w", encoding="utf-8") as f:
+            json.dump(scenario_to_dict(), f, ensure_ascii=False, indent=2)
+        return 0
+    if 3 <= len(argv) <= 6 and argv[1] == "synthesize":
+        data = synthetic_scenario(*(int(v) for v in argv[3:]))
+        compile_scenario(data)
+        with open(argv[2], "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        return 0
+    print("用法: python scenarios.py check 场景文件...  |  python scenarios.py export 输出文件  |  "
+          "python scenarios.py synthesize 输出文件 [回合数 指标数 政策数]")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
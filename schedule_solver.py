@@ -0,0 +1,814 @@
+"""公共经济学模拟游戏 - 最优政策方案搜索
+
+在场景的全部回合内搜索政策组合方案，使 calculate_final_score 最大。
+搜索在期望路径上进行：政策效果取均值（±10%波动的期望为 1），
+随机事件按概率折算为每次实施政策后的期望效果，自然变化中的噪声取期望 0。
+
+为了在数秒内给出答案，使用了：
+- 离散化状态：只保留影响得分、失败条件和前置条件的指标，按固定精度取整后
+  与回合、预算、冷却一起作为状态键记忆化；
+- 分支定界：用各指标在剩余预算、剩余可实施次数内可达范围的乐观估计作为得分上界；
+- 整数线性规划松弛：总分要超过当前最好方案时，对每个可能的结束回合，检查所需的一组条件
+  能否在共享的预算、可实施次数和赤字约束下同时满足。变量是结束回合之前和结束回合当中
+  各政策的实施次数；GDP增长率按每回合的回归比例折减更早实施的政策效果，随机事件按
+  结束回合之前的回合数计入期望效果；线性规划可行时再对非整数的实施次数分支；
+- 支配剪枝：同一回合、同一指标下，预算不少且冷却不长的已解状态给出得分上界；
+- 集束搜索先给出较好的可行方案作为下界。
+
+标准场景在数秒内证明最优（集束搜索找到的 130 分方案即为最优，根节点的整数规划
+就排除了更高的得分）。超过时间限制时返回当前找到的最好方案，结果中 optimal 为 False，
+bound 给出最优得分的上界。
+
+objective="probability" 时，在收紧目标阈值的若干安全边际下分别搜索，
+再用 batch_simulation 的蒙特卡洛模拟选出目标完成概率最高的方案。
+"""
+import math
+import time
+
+from economic_engine import (DEFAULT_SCENARIO, GDP_TREND, GDP_REVERSION, GDP_BOOM, GDP_SLUMP,
+                             UNEMPLOYMENT_BOOM_CHANGE, UNEMPLOYMENT_SLUMP_CHANGE)
+
+# 离散化精度：指标值以该精度取整后作为状态
+DEFAULT_RESOLUTION = 0.01
+RESOLUTIONS = {"基尼系数": 0.001}
+
+DEFEAT_VALUE = -1  # 导致政府倒台的方案总是劣于任何正常结束的方案
+BEAM_WIDTH = 50
+ILP_BRANCHES = 64  # 整数规划松弛中最多求解的分支数，超过后按可行处理
+
+
+class SolverResult:
+    """搜索结果"""
+
+    def __init__(self, schedule, score, optimal, nodes, elapsed, final_data, bound=None):
+        self.schedule = schedule  # 每回合实施的政策下标列表
+        self.score = score  # 期望路径上的最终得分
+        self.optimal = optimal  # 是否在时间限制内证明了最优
+        self.bound = score if bound is None else bound  # 最优得分的上界（已证明最优时等于 score）
+        self.nodes = nodes
+        self.elapsed = elapsed
+        self.final_data = final_data  # 期望路径上与得分相关的最终指标
+
+    def __repr__(self):
+        return (f"SolverResult(score={self.score}, optimal={self.optimal}, bound={self.bound}, "
+                f"nodes={self.nodes}, elapsed={self.elapsed:.2f}s, schedule={self.schedule})")
+
+
+class _SearchTimeout(Exception):
+    pass
+
+
+def _lp_solve(rows, rhs, eps=1e-9):
+    """求线性不等式组 rows·v ≤ rhs, v ≥ 0 的一个可行解，无解时返回 None（两阶段单纯形法的第一阶段，Bland 规则）"""
+    n_vars = len(rows[0])
+    n_rows = len(rows)
+    # 每行加松弛变量；右端为负的行取反并加人工变量
+    tableau = []
+    basis = []
+    artificial = []
+    width = n_vars + n_rows
+    for r, (row, b) in enumerate(zip(rows, rhs)):
+        line = list(row) + [0.0] * n_rows
+        line[n_vars + r] = 1.0
+        if b < 0:
+            line = [-v for v in line]
+            b = -b
+            artificial.append(r)
+        tableau.append(line + [b])
+        basis.append(n_vars + r)
+    if not artificial:
+        return [0.0] * n_vars
+
+    # 为需要的行追加人工变量列
+    n_art = len(artificial)
+    for line in tableau:
+        line[width:width] = [0.0] * n_art
+    for k, r in enumerate(artificial):
+        tableau[r][width + k] = 1.0
+        basis[r] = width + k
+    total = width + n_art
+
+    # 目标：最小化人工变量之和
+    objective = [0.0] * (total + 1)
+    for r in artificial:
+        for c in range(total + 1):
+            objective[c] -= tableau[r][c]
+    for k in range(n_art):
+        objective[width + k] = 0.0
+
+    while True:
+        entering = next((c for c in range(total) if objective[c] < -eps), None)
+        if entering is None:
+            if -objective[total] > 1e-7:
+                return None
+            solution = [0.0] * n_vars
+            for r, c in enumerate(basis):
+                if c < n_vars:
+                    solution[c] = tableau[r][total]
+            return solution
+        leaving, best_ratio = None, math.inf
+        for r in range(n_rows):
+            a = tableau[r][entering]
+            if a > eps:
+                ratio = tableau[r][total] / a
+                if ratio < best_ratio - eps or (abs(ratio - best_ratio) <= eps and basis[r] < basis[leaving]):
+                    leaving, best_ratio = r, ratio
+        if leaving is None:  # 第一阶段目标有下界，不会出现
+            return [0.0] * n_vars
+        pivot_row = tableau[leaving]
+        pivot = pivot_row[entering]
+        pivot_row[:] = [v / pivot for v in pivot_row]
+        for r in range(n_rows):
+            if r != leaving and tableau[r][entering] != 0.0:
+                factor = tableau[r][entering]
+                line = tableau[r]
+                line[:] = [a - factor * b for a, b in zip(line, pivot_row)]
+        factor = objective[entering]
+        objective[:] = [a - factor * b for a, b in zip(objective, pivot_row)]
+        basis[leaving] = entering
+
+
+def _ilp_feasible(rows, rhs, branches):
+    """整数解的可行性：线性规划解中有非整数变量时分支 (v ≤ 下取整 或 v ≥ 上取整)
+
+    branches 是只含剩余分支数的列表，用完后把当前的线性规划解按可行处理（仍是上界）。
+    """
+    solution = _lp_solve(rows, rhs)
+    if solution is None:
+        return False
+    fractions = [(abs(v - round(v)), j) for j, v in enumerate(solution) if abs(v - round(v)) > 1e-6]
+    if not fractions or branches[0] <= 0:
+        return True
+    _, j = max(fractions)
+    unit = [0.0] * len(solution)
+    unit[j] = 1.0
+    for row, b in ((unit, math.floor(solution[j])), ([-v for v in unit], -math.ceil(solution[j]))):
+        branches[0] -= 1
+        if _ilp_feasible(rows + [row], rhs + [float(b)], branches):
+            return True
+    return False
+
+
+class ScheduleSolver:
+    """记忆化的分支定界政策方案搜索器"""
+
+    def __init__(self, policies=None, events=None, event_probability=None,
+                 allow_pass=False, margins=None, scenario=None):
+        # 场景（默认场景或 scenarios.load_scenario 加载的场景）；policies、events、event_probability 可单独覆盖
+        self.scenario = DEFAULT_SCENARIO if scenario is None else scenario
+        self.policies = self.scenario.policies if policies is None else policies
+        self.events = self.scenario.events if events is None else events
+        self.event_probability = self.scenario.event_probability if event_probability is None else event_probability
+        # 图形界面中每回合必须至少实施一项政策才能进入下一回合
+        self.allow_pass = allow_pass
+        # 目标阈值的安全边际：指标名 -> 向有利方向收紧的幅度
+        self.margins = margins or {}
+        self._compile()
+
+    def _compile(self):
+        """把政策、事件、阈值转换为离散化的整数表"""
+        scenario = self.scenario
+        self.max_turns = scenario.max_turns
+        self.initial_budget = scenario.initial_budget
+        self.max_budget = scenario.max_budget
+        self.budget_per_turn = scenario.budget_per_turn
+        self.victory_objectives = scenario.victory_objectives
+
+        # 只跟踪会影响得分、失败条件、前置条件和自然变化的指标
+        relevant = {"GDP增长率", "失业率"}
+        relevant.update(ind for ind, _, _ in scenario.objective_conditions.values())
+        relevant.update(ind for _, ind, _, _ in scenario.failure_conditions)
+        relevant.update(ind for ind, _, _, _ in scenario.score_bonuses)
+        for policy in self.policies:
+            relevant.update(policy.get('requirements', {}))
+        self.indicators = [k for k in scenario.indicators if k in relevant]
+        index = {name: i for i, name in enumerate(self.indicators)}
+        n_indicators = len(self.indicators)
+
+        self.res = [RESOLUTIONS.get(k, DEFAULT_RESOLUTION) for k in self.indicators]
+
+        def quantize(i, value):
+            return int(round(value / self.res[i]))
+
+        self.quantize = quantize
+        self.initial = tuple(quantize(i, scenario.initial_data[k]) for i, k in enumerate(self.indicators))
+        self.lower = [quantize(i, scenario.lower_bounds[scenario.indicator_index[k]])
+                      for i, k in enumerate(self.indicators)]
+        self.upper = [quantize(i, scenario.upper_bounds[scenario.indicator_index[k]])
+                      for i, k in enumerate(self.indicators)]
+
+        self.costs = [p['cost'] for p in self.policies]
+        self.cooldowns = [p['cooldown'] for p in self.policies]
+        self.effects = []
+        for policy in self.policies:
+            effect = [0.0] * n_indicators
+            for indicator, value in policy['effects'].items():
+                if indicator in index:
+                    effect[index[indicator]] = value
+            self.effects.append(effect)
+        self.requirements = [[(index[k], quantize(index[k], v)) for k, v in p.get('requirements', {}).items()]
+                             for p in self.policies]
+
+        # 每次实施政策后随机事件的期望效果
+        self.event_mean = [0.0] * n_indicators
+        for event in self.events:
+            for indicator, value in event['effects'].items():
+                if indicator in index:
+                    self.event_mean[index[indicator]] += value * self.event_probability / len(self.events)
+
+        # 离散化后每回合事件的期望效果（格点数）及每回合的取整误差上限：
+        # 政策效果都在格点上时只有事件效果被取整，结果是确定的
+        self.event_steps = []
+        self.rounding = []
+        for i in range(n_indicators):
+            step = self.event_mean[i] / self.res[i]
+            on_grid = all(abs(e[i] / self.res[i] - round(e[i] / self.res[i])) < 1e-6 for e in self.effects)
+            if on_grid and abs(step - math.floor(step) - 0.5) > 1e-6:
+                self.event_steps.append(round(step))
+                self.rounding.append(0.0)
+            else:
+                self.event_steps.append(step)
+                self.rounding.append(0.5)
+
+        # 目标、失败条件和额外得分的离散化阈值
+        def condition(indicator, op, threshold, margin=0.0):
+            i = index[indicator]
+            threshold = threshold + margin if op == ">=" else threshold - margin
+            return i, op, quantize(i, threshold)
+
+        self.objective_conditions = [condition(ind, op, thr, self.margins.get(ind, 0.0))
+                                     for ind, op, thr in scenario.objective_conditions.values()]
+        self.failure_conditions = [condition(ind, op, thr) for _, ind, op, thr in scenario.failure_conditions]
+        self.bonus_conditions = [(condition(ind, op, thr), bonus) for ind, op, thr, bonus in scenario.score_bonuses]
+        self.scored_conditions = ([(c, scenario.objective_score) for c in self.objective_conditions]
+                                  + self.bonus_conditions)
+
+        # 上界计算用：每个指标每个方向上按 效果/成本 从高到低排列的政策
+        self.best_ratio = {}
+        for i in range(n_indicators):
+            for sign in (1, -1):
+                items = [(self.effects[p][i] * sign / self.costs[p], p)
+                         for p in range(len(self.policies)) if self.effects[p][i] * sign > 0]
+                self.best_ratio[i, sign] = sorted(items, reverse=True)
+
+        self.gdp = index["GDP增长率"]
+        self.unemployment = index["失业率"]
+        # 自然变化（与 EconomicEngine.apply_natural_changes 相同的常量）
+        self.gdp_trend = quantize(self.gdp, GDP_TREND)
+        self.boom_change = quantize(self.unemployment, UNEMPLOYMENT_BOOM_CHANGE)
+        self.slump_change = quantize(self.unemployment, UNEMPLOYMENT_SLUMP_CHANGE)
+
+        # 财政赤字是各项政策共同消耗的"资源"：额外得分要求 ≤5，达到 15 即失败。
+        # 上界中把赤字上限作为第二个背包约束，与各指标的目标联立估计。
+        self.deficit = index["财政赤字率"]
+        self.deficit_rates = [self.effects[p][self.deficit] / self.costs[p] for p in range(len(self.policies))]
+        self.deficit_caps = sorted({thr for (i, op, thr), _ in self.bonus_conditions
+                                    if i == self.deficit and op == "<="} |
+                                   {thr for i, op, thr in self.failure_conditions if i == self.deficit})
+
+        # 只会增加、不会减少的指标上的前置条件限制了政策的可实施次数
+        # （例如货币宽松推高通胀，而没有政策或事件能降低通胀）
+        self.requirement_caps = []
+        for p, requirements in enumerate(self.requirements):
+            for i, limit in requirements:
+                step = self.quantize(i, self.effects[p][i])
+                never_decreases = (i not in (self.gdp, self.unemployment) and self.event_mean[i] >= 0
+                                   and all(e[i] >= 0 for e in self.effects)
+                                   and all(ev['effects'].get(self.indicators[i], 0) >= 0 for ev in self.events))
+                if step > 0 and never_decreases:
+                    self.requirement_caps.append((p, i, limit, step))
+
+        self._action_cache = {}
+        self._shift_cache = {}
+        self._coupled_cache = {}
+
+    # ------------------------------------------------------------------
+    # 状态转移
+    # ------------------------------------------------------------------
+    def _actions(self, budget, cooldown):
+        """可用且预算允许的所有政策组合：[(政策下标元组, 成本, 离散化效果)]"""
+        key = (budget, cooldown)
+        actions = self._action_cache.get(key)
+        if actions is not None:
+            return actions
+
+        available = [p for p in range(len(self.policies)) if cooldown[p] == 0]
+        actions = []
+
+        def extend(start, chosen, cost):
+            if chosen:
+                delta = tuple(self.quantize(i, sum(self.effects[p][i] for p in chosen) + self.event_mean[i])
+                              for i in range(len(self.indicators)))
+                actions.append((tuple(chosen), cost, delta))
+            elif self.allow_pass:
+                actions.append(((), 0, (0,) * len(self.indicators)))
+            for k in range(start, len(available)):
+                p = available[k]
+                if cost + self.costs[p] <= budget:
+                    chosen.append(p)
+                    extend(k + 1, chosen, cost + self.costs[p])
+                    chosen.pop()
+
+        extend(0, [], 0)
+        self._action_cache[key] = actions
+        return actions
+
+    def _requirements_met(self, chosen, x):
+        for p in chosen:
+            for i, limit in self.requirements[p]:
+                if x[i] > limit:
+                    return False
+        return True
+
+    @staticmethod
+    def _holds(value, op, threshold):
+        return value <= threshold if op == "<=" else value >= threshold
+
+    def _completed(self, x):
+        return sum(1 for i, op, thr in self.objective_conditions if self._holds(x[i], op, thr))
+
+    def score(self, x):
+        """离散化状态下的 calculate_final_score"""
+        return sum(points for (i, op, thr), points in self.scored_conditions if self._holds(x[i], op, thr))
+
+    def progress(self, x):
+        """启发式：各得分条件按离阈值的相对距离加权的完成度，用于排序后继"""
+        total = 0.0
+        for (i, op, thr), points in self.scored_conditions:
+            start = self.initial[i]
+            if self._holds(x[i], op, thr) or start == thr:
+                total += points
+            else:
+                total += points * max(0.0, (x[i] - start) / (thr - start))
+        return total
+
+    def _after_policies(self, x, delta):
+        """实施政策后的状态；返回 (指标, 终局得分或 None)"""
+        x = tuple(a + b for a, b in zip(x, delta))
+        if self._completed(x) >= self.victory_objectives:
+            return x, self.score(x)
+        for i, op, thr in self.failure_conditions:
+            if self._holds(x[i], op, thr):
+                return x, DEFEAT_VALUE
+        return x, None
+
+    def _natural_changes(self, x):
+        """期望路径上的自然经济变化（噪声期望为 0）"""
+        x = list(x)
+        gdp, unemployment = self.gdp, self.unemployment
+        x[gdp] += int(round((self.gdp_trend - x[gdp]) * GDP_REVERSION))
+        gdp_value = x[gdp] * self.res[gdp]
+        if gdp_value > GDP_BOOM:
+            x[unemployment] += self.boom_change
+        elif gdp_value < GDP_SLUMP:
+            x[unemployment] += self.slump_change
+        return tuple(min(hi, max(lo, v)) for v, lo, hi in zip(x, self.lower, self.upper))
+
+    def _children(self, turn, x, budget, cooldown):
+        """展开一个状态的全部后继：[(终局得分或 None, 政策, 下一状态或终局指标)]"""
+        children = []
+        for chosen, cost, delta in self._actions(budget, cooldown):
+            if not self._requirements_met(chosen, x):
+                continue
+            nx, terminal = self._after_policies(x, delta)
+            if terminal is not None:
+                children.append((terminal, chosen, nx))
+                continue
+            ncd = list(cooldown)
+            for p in chosen:
+                ncd[p] = self.cooldowns[p]
+            ncd = tuple(max(c - 1, 0) for c in ncd)
+            nx = self._natural_changes(nx)
+            if turn + 1 > self.max_turns:
+                children.append((self.score(nx), chosen, nx))
+            else:
+                nbudget = min(self.max_budget, budget - cost + self.budget_per_turn)
+                children.append((None, chosen, (turn + 1, nx, nbudget, ncd)))
+        return children
+
+    # ------------------------------------------------------------------
+    # 上界
+    # ------------------------------------------------------------------
+    def _uses(self, turn, x, cooldown, last=None):
+        """从 turn 到 last（默认最后一回合）每项政策最多还能实施的次数"""
+        remaining = (self.max_turns if last is None else last) - turn + 1
+        uses = [0 if remaining <= c else 1 + (remaining - c - 1) // max(1, cd)
+                for c, cd in zip(cooldown, self.cooldowns)]
+        for p, i, limit, step in self.requirement_caps:
+            uses[p] = min(uses[p], 0 if x[i] > limit else (limit - x[i]) // step + 1)
+        return tuple(uses)
+
+    def _knapsack(self, rates, total_budget, uses):
+        """分数背包松弛：按单位成本收益从高到低花掉预算，返回最大总收益"""
+        gain, left = 0.0, total_budget
+        for rate, p in sorted(((r, p) for p, r in enumerate(rates) if r > 0), reverse=True):
+            if left <= 0:
+                break
+            spend = min(left, uses[p] * self.costs[p])
+            gain += rate * spend
+            left -= spend
+        return gain
+
+    def _drift(self, i, sign, remaining):
+        """事件和自然变化在剩余回合内对指标的最大有利漂移（实际单位）"""
+        drift = max(0.0, self.event_mean[i] * remaining * sign)
+        if i == self.unemployment:
+            drift += max(0.0, UNEMPLOYMENT_BOOM_CHANGE * sign, UNEMPLOYMENT_SLUMP_CHANGE * sign) * remaining
+        return drift
+
+    def _shifts(self, turn, budget, uses):
+        """剩余回合内每个指标向上、向下可移动的最大离散幅度（与指标当前值无关，可缓存）"""
+        key = (turn, budget, uses)
+        shifts = self._shift_cache.get(key)
+        if shifts is not None:
+            return shifts
+
+        remaining = self.max_turns - turn + 1
+        total_budget = budget + self.budget_per_turn * (remaining - 1)
+        shifts = []
+        for i in range(len(self.indicators)):
+            pair = []
+            for sign in (1, -1):
+                rates = [self.effects[p][i] * sign / self.costs[p] for p in range(len(self.policies))]
+                shift = self._knapsack(rates, total_budget, uses) + self._drift(i, sign, remaining)
+                pair.append(int(math.ceil(shift / self.res[i])) + 1)
+            shifts.append(tuple(pair))
+
+        self._shift_cache[key] = shifts
+        return shifts
+
+    def _coupled_shift(self, turn, budget, uses, i, sign, allowance):
+        """赤字增幅不超过 allowance 时指标 i 向 sign 方向可移动的最大离散幅度
+
+        带赤字约束的分数背包是只有两个约束的线性规划，其拉格朗日对偶
+        min_λ≥0 [λ·allowance + 背包(收益 - λ·赤字)] 的最优值出现在某个断点处，
+        因此逐个断点取最小值即得到精确的线性规划上界。
+        """
+        key = (turn, budget, uses, i, sign, allowance)
+        cached = self._coupled_cache.get(key)
+        if cached is not None:
+            return cached
+
+        remaining = self.max_turns - turn + 1
+        total_budget = budget + self.budget_per_turn * (remaining - 1)
+        allowance_value = allowance * self.res[self.deficit]
+        rates = [self.effects[p][i] * sign / self.costs[p] for p in range(len(self.policies))]
+        multipliers = {0.0}
+        multipliers.update(r / d for r, d in zip(rates, self.deficit_rates) if r > 0 and d > 0)
+
+        best = math.inf
+        for lam in multipliers:
+            value = lam * allowance_value + self._knapsack(
+                [r - lam * d for r, d in zip(rates, self.deficit_rates)], total_budget, uses)
+            best = min(best, value)
+        shift = int(math.ceil((best + self._drift(i, sign, remaining)) / self.res[i])) + 1
+
+        if len(self._coupled_cache) > 500000:
+            self._coupled_cache.clear()
+        self._coupled_cache[key] = shift
+        return shift
+
+    def _reachable(self, i, op, thr, x, shift):
+        """指标 i 在可移动幅度 shift 内能否满足条件"""
+        anchor = self.gdp_trend
+        if op == ">=":
+            # GDP 向长期趋势回归：最终值不超过 max(当前值, 趋势) 加上可增加的幅度
+            reach = (max(x[i], anchor) if i == self.gdp else x[i]) + shift
+            return min(reach, self.upper[i]) >= thr
+        reach = (min(x[i], anchor) if i == self.gdp else x[i]) - shift
+        return max(reach, self.lower[i]) <= thr
+
+    def upper_bound(self, turn, x, budget, cooldown):
+        """从该状态出发能达到的最终得分的乐观上界（各条件独立估计，计算快）"""
+        shifts = self._shifts(turn, budget, self._uses(turn, x, cooldown))
+        bound = 0
+        for (i, op, thr), points in self.scored_conditions:
+            if self._reachable(i, op, thr, x, shifts[i][0 if op == ">=" else 1]):
+                bound += points
+        return bound
+
+    def tight_bound(self, turn, x, budget, cooldown):
+        """考虑赤字约束的上界：对每个赤字上限，联立估计其余条件能否满足"""
+        uses = self._uses(turn, x, cooldown)
+        remaining = self.max_turns - turn + 1
+        # 赤字最多能降低多少（货币宽松等），用来判断上限是否可行
+        down = self._shifts(turn, budget, uses)[self.deficit][1]
+
+        bound = DEFEAT_VALUE
+        for cap in self.deficit_caps:
+            if x[self.deficit] - down > cap:
+                continue
+            # 赤字最终不超过 cap 时，政策最多能让赤字净增加 allowance
+            allowance = cap - x[self.deficit] + self.quantize(
+                self.deficit, max(0.0, -self.event_mean[self.deficit] * remaining))
+            value = 0
+            for (i, op, thr), points in self.scored_conditions:
+                if i == self.deficit:
+                    if op == "<=" and cap <= thr:
+                        value += points
+                    continue
+                sign = 1 if op == ">=" else -1
+                if self._reachable(i, op, thr, x, self._coupled_shift(turn, budget, uses, i, sign, allowance)):
+                    value += points
+            bound = max(bound, value)
+        return min(bound, self.upper_bound(turn, x, budget, cooldown))
+
+    def _condition_row(self, turn, last, x, i, op, thr):
+        """把条件 "指标 i 在第 last 回合结束时满足 op thr" 写成关于各政策实施次数的线性不等式 (系数, 右端)
+
+        变量依次为 last 之前各政策的实施次数和第 last 回合各政策的实施次数；
+        last 为最后一回合加 1 时表示最后一回合的自然变化之后（游戏正常结束时的计分）。
+        """
+        actions = min(last, self.max_turns) - turn + 1  # 实施政策（并可能触发事件）的回合数
+        steps = last - turn  # 其间的自然变化次数
+        sign = 1 if op == ">=" else -1
+        final = [sign * e[i] for e in self.effects]
+        event = sign * self.event_steps[i]
+        # 取整误差（格点数）：每回合的政策和事件效果，以及 GDP 回归的取整
+        slack = 1 + self.rounding[i] * actions
+        if i == self.gdp:
+            # GDP 每次自然变化向趋势回归，k 回合前的变化只保留 ratio^k
+            ratio = 1 - GDP_REVERSION
+            base = self.gdp_trend + (x[i] - self.gdp_trend) * ratio ** steps
+            early = [v * ratio if v > 0 else v * ratio ** max(steps, 1) for v in final]
+            drift = event * sum(ratio ** (last - t) for t in range(turn, turn + actions))
+            slack += 0.5 * steps
+        else:
+            base = x[i]
+            early = final
+            drift = event * actions
+            if i == self.unemployment:
+                drift += max(0, self.boom_change * sign, self.slump_change * sign) * steps
+        if self.allow_pass:
+            drift = max(0.0, drift)  # 不实施政策的回合没有事件
+        need = ((thr - base) * sign - drift - slack) * self.res[i]
+        # sign·Σ e_p v_p ≥ need  ⇔  -sign·Σ e_p v_p ≤ -need
+        return [-v for v in early] + [-v for v in final], -need
+
+    def joint_feasible(self, turn, x, budget, cooldown, alpha, limit=32):
+        """能否同时满足一组总分超过 alpha 的得分条件（整数线性规划松弛）
+
+        对每个可能的结束回合，变量是其之前和当回合各政策的实施次数，约束为总预算、
+        当回合预算、可实施次数上限、赤字不触发财政危机，以及该组中每个条件。
+        所有结束回合下所有这样的条件组都不可行时返回 False。
+        """
+        uses = self._uses(turn, x, cooldown)
+        shifts = self._shifts(turn, budget, uses)
+
+        # 单独就无法满足的条件不必考虑
+        conditions = [((i, op, thr), points) for (i, op, thr), points in self.scored_conditions
+                      if self._reachable(i, op, thr, x, shifts[i][0 if op == ">=" else 1])]
+        conditions.sort(key=lambda c: c[1], reverse=True)
+
+        # 枚举总分超过 alpha 的极小条件组
+        groups = []
+        suffix = [0] * (len(conditions) + 1)
+        for k in range(len(conditions) - 1, -1, -1):
+            suffix[k] = suffix[k + 1] + conditions[k][1]
+
+        def collect(k, chosen, points):
+            if len(groups) > limit:
+                return
+            if points > alpha:
+                groups.append(list(chosen))
+                return
+            if k == len(conditions) or points + suffix[k] <= alpha:
+                return
+            chosen.append(conditions[k][0])
+            collect(k + 1, chosen, points + conditions[k][1])
+            chosen.pop()
+            collect(k + 1, chosen, points)
+
+        collect(0, [], 0)
+        if not groups:
+            return False
+        if len(groups) > limit:
+            return True
+
+        n_policies = len(self.policies)
+        costs = list(map(float, self.costs))
+        for last in range(turn, self.max_turns + 2):
+            final_turn = min(last, self.max_turns)
+            uses = self._uses(turn, x, cooldown, final_turn)
+            if last == turn:
+                final_budget = budget
+            elif last > self.max_turns:
+                final_budget = 0
+            else:
+                final_budget = self.max_budget
+            common_rows = [costs + costs, [0.0] * n_policies + costs]
+            common_rhs = [float(budget + self.budget_per_turn * (final_turn - turn)), float(final_budget)]
+            for p in range(n_policies):
+                row = [0.0] * (2 * n_policies)
+                row[p] = row[n_policies + p] = 1.0
+                common_rows.append(row)
+                common_rhs.append(float(uses[p]))
+                row = [0.0] * (2 * n_policies)
+                row[n_policies + p] = 1.0
+                common_rows.append(row)
+                common_rhs.append(0.0 if last > self.max_turns else float(min(1, uses[p])))
+                if last == turn:
+                    row = [0.0] * (2 * n_policies)
+                    row[p] = 1.0
+                    common_rows.append(row)
+                    common_rhs.append(0.0)
+            for i, op, thr in self.failure_conditions:
+                if i == self.deficit:
+                    row, rhs = self._condition_row(turn, last, x, i, "<=", thr)
+                    common_rows.append(row)
+                    common_rhs.append(rhs)
+
+            for group in groups:
+                rows, rhs = list(common_rows), list(common_rhs)
+                for i, op, thr in group:
+                    row, b = self._condition_row(turn, last, x, i, op, thr)
+                    rows.append(row)
+                    rhs.append(b)
+                if _ilp_feasible(rows, rhs, [ILP_BRANCHES]):
+                    return True
+        return False
+
+    # ------------------------------------------------------------------
+    # 搜索
+    # ------------------------------------------------------------------
+    def _dominance_bound(self, turn, x, budget, cooldown):
+        """已精确求解且支配该状态（预算不少、冷却不长）的状态给出的上界"""
+        bound = None
+        for other_budget, other_cooldown, value in self._solved.get((turn, x), ()):
+            if other_budget >= budget and all(a <= b for a, b in zip(other_cooldown, cooldown)):
+                bound = value if bound is None else min(bound, value)
+        return bound
+
+    def _ordered_children(self, turn, x, budget, cooldown):
+        """后继按 (上界, 启发式完成度) 从高到低排列"""
+        children = []
+        for terminal, chosen, state in self._children(turn, x, budget, cooldown):
+            if terminal is not None:
+                children.append((terminal, math.inf, chosen, state, True))
+            else:
+                children.append((self.upper_bound(*state), self.progress(state[1]), chosen, state, False))
+        children.sort(key=lambda c: (c[0], c[1]), reverse=True)
+        return children
+
+    def _search(self, turn, x, budget, cooldown, alpha):
+        """返回状态的最优值；结果不超过 alpha 时返回的是上界"""
+        self.nodes += 1
+        if self.deadline is not None and self.nodes % 256 == 0 and time.perf_counter() > self.deadline:
+            raise _SearchTimeout()
+
+        key = (turn, x, budget, cooldown)
+        entry = self._table.get(key)
+        if entry is not None:
+            value, exact = entry
+            if exact or value <= alpha:
+                return value
+
+        ub = self.tight_bound(turn, x, budget, cooldown)
+        dominated = self._dominance_bound(turn, x, budget, cooldown)
+        if dominated is not None:
+            ub = min(ub, dominated)
+        if ub <= alpha:
+            return ub
+        if not self.joint_feasible(turn, x, budget, cooldown, alpha):
+            self._table[key] = (alpha, False)
+            return alpha
+
+        best = DEFEAT_VALUE - 1
+        bound = best
+        best_action = None
+        for child_ub, _, chosen, state, is_terminal in self._ordered_children(turn, x, budget, cooldown):
+            floor = max(alpha, best)
+            if child_ub <= floor:
+                bound = max(bound, child_ub)
+                break  # 后面的后继上界只会更低
+            value = child_ub if is_terminal else self._search(*state, floor)
+            if value > best:
+                best, best_action = value, (chosen, state)
+            bound = max(bound, value)
+            if best >= ub:
+                break
+
+        if best > alpha:
+            self._table[key] = (best, True)
+            self._best_action[key] = best_action
+            self._solved.setdefault((turn, x), []).append((budget, cooldown, best))
+            return best
+        self._table[key] = (bound, False)
+        return bound
+
+    def _beam(self, root, width=BEAM_WIDTH):
+        """集束搜索：每回合保留启发式最好的 width 个状态，得到初始可行方案"""
+        best_schedule, best_value = None, DEFEAT_VALUE - 1
+        beam = [(root, [])]
+        while beam:
+            candidates = []
+            for state, schedule in beam:
+                for terminal, chosen, nxt in self._children(*state):
+                    path = schedule + [list(chosen)]
+                    if terminal is not None:
+                        if terminal > best_value:
+                            best_schedule, best_value = path, terminal
+                    else:
+                        candidates.append(((self.upper_bound(*nxt), self.progress(nxt[1])), nxt, path))
+            candidates.sort(key=lambda c: c[0], reverse=True)
+            seen = set()
+            beam = []
+            for _, nxt, path in candidates:
+                if nxt not in seen:
+                    seen.add(nxt)
+                    beam.append((nxt, path))
+                    if len(beam) >= width:
+                        break
+        return best_schedule, best_value
+
+    def solve(self, time_limit=None):
+        """搜索最优方案；time_limit 秒内未证明最优时返回当前找到的最好方案"""
+        start = time.perf_counter()
+        self._table = {}
+        self._best_action = {}
+        self._solved = {}
+        self.nodes = 0
+        self.deadline = None if time_limit is None else start + time_limit
+
+        root = (1, self.initial, self.initial_budget, (0,) * len(self.policies))
+        beam_schedule, beam_value = self._beam(root)
+        optimal = True
+        try:
+            # 以集束搜索方案的价值作为下界做分支定界，只寻找严格更好的方案
+            self._search(*root, beam_value)
+        except _SearchTimeout:
+            optimal = False
+
+        schedule = self._extract(root)
+        if schedule is None or self.replay(schedule)[0] <= beam_value:
+            schedule = beam_schedule
+        score, final_x = self.replay(schedule)
+        final_data = {k: round(final_x[i] * self.res[i], 6) for i, k in enumerate(self.indicators)}
+        bound = score if optimal else max(score, self.tight_bound(*root))
+        return SolverResult(schedule, score, optimal, self.nodes, time.perf_counter() - start, final_data, bound)
+
+    def _extract(self, root):
+        """沿记录的最优动作重建方案；没有完整的最优路线时返回 None"""
+        schedule = []
+        state = root
+        while True:
+            action = self._best_action.get(state)
+            if action is None:
+                return None
+            chosen, nxt = action
+            schedule.append(list(chosen))
+            if len(nxt) != 4:  # 终局
+                return schedule
+            state = nxt
+
+    def replay(self, schedule):
+        """在期望路径上执行方案，返回 (最终得分, 最终离散化指标)"""
+        state = (1, self.initial, self.initial_budget, (0,) * len(self.policies))
+        for chosen in schedule:
+            for terminal, action, nxt in self._children(*state):
+                if list(action) == sorted(chosen):
+                    break
+            else:
+                raise ValueError(f"第 {state[0]} 回合无法实施政策组合 {chosen}")
+            if terminal is not None:
+                return terminal, nxt
+            state = nxt
+        return self.score(state[1]), state[1]
+
+
+def solve_best_schedule(objective="score", time_limit=10.0, n_games=20000, seed=None, **kwargs):
+    """求最优政策方案
+
+    objective="score"：最大化期望路径上的 calculate_final_score；
+    objective="probability"：在不同安全边际下搜索候选方案，
+    用蒙特卡洛模拟选出完成胜利所需目标数的概率最高的方案。
+    返回 SolverResult；probability 模式下额外带有 completion_rate 属性。
+    """
+    if objective == "score":
+        return ScheduleSolver(**kwargs).solve(time_limit)
+    if objective != "probability":
+        raise ValueError(f"未知的优化目标: {objective}")
+
+    from batch_simulation import BatchSimulation
+
+    solver = ScheduleSolver(**kwargs)
+    base = solver.solve(time_limit)
+
+    def simulation():
+        return BatchSimulation(n_games, solver.policies, solver.events, solver.event_probability,
+                               seed=seed, scenario=solver.scenario)
+
+    # 用基准方案的模拟结果估计各目标指标末期值的标准差，作为安全边际的单位
+    batch = simulation()
+    batch.run(base.schedule)
+    spread = dict(zip(solver.scenario.indicators, batch.data.std(axis=0).tolist()))
+
+    best = None
+    for k in (0.0, 0.5, 1.0, 1.5):
+        margins = {indicator: k * spread[indicator]
+                   for indicator, _, _ in solver.scenario.objective_conditions.values()}
+        result = base if k == 0.0 else ScheduleSolver(margins=margins, **kwargs).solve(time_limit)
+        result.completion_rate = simulation().run(result.schedule).completion_rate(solver.victory_objectives)
+        if best is None or result.completion_rate > best.completion_rate:
+            best = result
+    return best
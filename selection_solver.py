@@ -0,0 +1,144 @@
+"""公共经济学模拟游戏 - 单回合最优政策组合
+
+每回合玩家面对一个背包问题：在 总成本 ≤ 预算、不在冷却中、满足前置条件（requirements 上限）的政策中，
+选出期望目标收益之和最大的组合。政策效果的随机波动期望为 1，实施一组政策的期望指标变化
+等于各政策期望效果之和，因此目标收益按政策可加，单回合问题可以精确求解。
+
+目标收益：各目标和得分条件按有利方向（≥ 取正、≤ 取负）、以指标范围归一化后乘以分值，
+政策的收益是它的期望效果在这些方向上的加权和。也可以传入自定义的收益。
+
+SelectionSolver 按收益/成本比从高到低深度优先枚举可行子集，用分数背包松弛作为上界剪枝；
+前置条件只取决于实施前的指标值，各政策能否实施互不影响，因此局面可以归结为
+(预算, 冷却掩码, 满足前置条件的掩码)，结果按这个键缓存。
+
+    solver = selection_solver(engine.scenario)
+    best = solver.solve_engine(engine)
+    print(best.indices, best.gain, best.cost)
+"""
+from economic_engine import DEFAULT_SCENARIO
+
+# 比较收益时的容差
+EPSILON = 1e-9
+
+
+def objective_gains(scenario=None):
+    """各政策的期望目标收益（按政策顺序的列表）"""
+    scenario = DEFAULT_SCENARIO if scenario is None else scenario
+    index = scenario.indicator_index
+    weights = [0.0] * len(scenario.indicators)
+    conditions = [(*condition, scenario.objective_score) for condition in scenario.objective_conditions.values()]
+    conditions += list(scenario.score_bonuses)
+    for indicator, op, _, score in conditions:
+        k = index[indicator]
+        span = scenario.upper_bounds[k] - scenario.lower_bounds[k]
+        weights[k] += (1 if op == ">=" else -1) * score / span
+    return [sum(effect * weights[index[indicator]] for indicator, effect in items)
+            for items in scenario.policy_effect_items]
+
+
+class SelectionResult:
+    """一次求解的结果"""
+
+    def __init__(self, indices, gain, cost, nodes):
+        self.indices = indices  # 最优组合的政策下标（升序）；没有正收益的政策时为空
+        self.gain = gain        # 期望目标收益之和
+        self.cost = cost
+        self.nodes = nodes      # 枚举的搜索节点数（命中缓存时为求解时的节点数）
+
+    def __repr__(self):
+        return f"SelectionResult(indices={self.indices}, gain={self.gain:.3f}, cost={self.cost}, nodes={self.nodes})"
+
+
+class SelectionSolver:
+    """单回合政策组合的精确求解器，结果按 (预算, 冷却掩码, 满足前置条件的掩码) 缓存"""
+
+    def __init__(self, scenario=None, gains=None):
+        self.scenario = DEFAULT_SCENARIO if scenario is None else scenario
+        self.policies = self.scenario.policies
+        self.costs = [policy['cost'] for policy in self.policies]
+        self.gains = objective_gains(self.scenario) if gains is None else list(gains)
+        self.cache = {}
+        self.hits = 0
+        self.misses = 0
+
+    def masks(self, values, cooldowns):
+        """局面的 (冷却掩码, 满足前置条件的掩码)，第 i 位对应第 i 项政策
+
+        values 为 {指标: 值}，cooldowns 为 {政策名: 剩余冷却回合数}（即引擎的 policy_cooldowns）。
+        """
+        cooldown_mask = 0
+        requirement_mask = 0
+        for i, policy in enumerate(self.policies):
+            if cooldowns.get(policy['name'], 0) > 0:
+                cooldown_mask |= 1 << i
+            if all(values[indicator] <= limit for indicator, limit in policy.get('requirements', {}).items()):
+                requirement_mask |= 1 << i
+        return cooldown_mask, requirement_mask
+
+    def solve_engine(self, engine):
+        """引擎当前回合的最优组合"""
+        cooldown_mask, requirement_mask = self.masks(engine.economic_data, engine.policy_cooldowns)
+        return self.solve(engine.budget, cooldown_mask, requirement_mask)
+
+    def solve(self, budget, cooldown_mask, requirement_mask):
+        """预算 budget 下、冷却掩码之外且满足前置条件的政策中收益之和最大的组合"""
+        key = (budget, cooldown_mask, requirement_mask)
+        result = self.cache.get(key)
+        if result is not None:
+            self.hits += 1
+            return result
+        self.misses += 1
+        available = requirement_mask & ~cooldown_mask
+        items = [i for i in range(len(self.policies))
+                 if available >> i & 1 and self.gains[i] > EPSILON and self.costs[i] <= budget]
+        result = self.cache[key] = self._search(items, budget)
+        return result
+
+    def _search(self, items, budget):
+        """分支定界枚举可行子集"""
+        costs = self.costs
+        gains = self.gains
+        # 按收益/成本比从高到低排列，分数背包松弛即为剩余政策的收益上界
+        items.sort(key=lambda i: gains[i] / costs[i] if costs[i] else float("inf"), reverse=True)
+        n = len(items)
+        best = [0.0, 0, ()]
+        chosen = []
+        nodes = 0
+
+        def bound(j, room, gain):
+            for i in items[j:]:
+                if costs[i] <= room:
+                    room -= costs[i]
+                    gain += gains[i]
+                else:
+                    return gain + gains[i] * room / costs[i]
+            return gain
+
+        def visit(j, room, gain):
+            nonlocal nodes
+            nodes += 1
+            if gain > best[0] + EPSILON:
+                best[:] = gain, budget - room, tuple(chosen)
+            if j == n or bound(j, room, gain) <= best[0] + EPSILON:
+                return
+            i = items[j]
+            if costs[i] <= room:
+                chosen.append(i)
+                visit(j + 1, room - costs[i], gain + gains[i])
+                chosen.pop()
+            visit(j + 1, room, gain)
+
+        visit(0, budget, 0.0)
+        return SelectionResult(sorted(best[2]), best[0], best[1], nodes)
+
+
+_solvers = {}
+
+
+def selection_solver(scenario=None):
+    """场景的 SelectionSolver（按场景缓存，缓存的解在各局之间共享）"""
+    scenario = DEFAULT_SCENARIO if scenario is None else scenario
+    solver = _solvers.get(scenario.key)
+    if solver is None or solver.scenario is not scenario:
+        solver = _solvers[scenario.key] = SelectionSolver(scenario)
+    return solver
@@ -0,0 +1,394 @@
+"""公共经济学模拟游戏 - 指标和得分的敏感性（弹性）分析
+
+对一个固定政策方案，估计结束时各指标和最终得分对模型参数的导数和弹性：
+    政策效果系数          方案中用到的每个 (政策, 指标) 效果项的效果值
+    GDP长期趋势、GDP回归速度  apply_natural_changes 中GDP增长率回归的目标（2.5）和速度（0.1）
+    随机事件概率          每个事件各自的触发概率，以及总的触发概率
+
+一次批量模拟同时得到全部参数的导数，不必为每个参数重新模拟：
+    效果系数和GDP参数沿模型的确定性部分逐回合前向求导（路径导数）：效果项的导数就是它的随机波动，
+    GDP回归和“GDP增长率 → 失业率”的规则逐回合传播，被范围限制截断的指标导数归零；
+    失业率规则和得分条件中的阈值跳变用高斯核平滑（带宽按 Silverman 规则）。
+    事件概率用似然比估计：逐局累加事件抽样的对数概率对参数的导数，它与结果的协方差就是导数。
+路径导数不计参数变化对提前结束的回合和前置条件是否满足的影响。
+
+核平滑会带来偏差：带宽越大偏差越大，而胜利时对局立即结束，结束时的指标值堆积在目标阈值附近，
+得分导数对带宽尤其敏感（标准误不包含这部分误差）。因此同时用一半的带宽再算一次，
+两者之差作为平滑偏差的估计一并报告；平滑偏差明显大于标准误的项应当核对。
+finite_difference 用公共随机数做中心差分（每个参数重新模拟两次），
+validate 用它核对弹性最大的几项。
+
+弹性 = 导数 × 参数值 / 结果的平均值，即参数增加 1% 时结果平均值变化的百分比：
+
+    result = analyze_sensitivity([[1, 5], [3, 9], [7]] * 4, n_games=20000, seed=0)
+    print(result.summary("最终得分"))
+    print(format_validation(validate(result, [[1, 5], [3, 9], [7]] * 4, seed=0)))
+
+    python sensitivity.py [局数] [政策方案JSON] [场景文件]
+"""
+import json
+import sys
+
+import numpy as np
+
+from batch_simulation import BatchSimulation
+from economic_engine import (INDICATOR_INDEX, DEFAULT_SCENARIO, GDP_BOOM, GDP_SLUMP,
+                             UNEMPLOYMENT_BOOM_CHANGE, UNEMPLOYMENT_SLUMP_CHANGE)
+
+# 默认分析的政策方案和局数
+DEFAULT_SCHEDULE = [[1, 5], [3, 9], [7]] * 4
+SENSITIVITY_GAMES = 20000
+# 每块的对局数：块内保存 (对局数 × 参数数) 的导数数组
+BLOCK_SIZE = 2048
+# 核平滑带宽的下限（占指标范围的比例），所有对局取值相同时使用
+BANDWIDTH_FLOOR = 0.01
+# 核带宽的倍数：第一个给出报告的导数，第二个与第一个之差作为平滑偏差的估计
+SMOOTHING_SCALES = (1.0, 0.5)
+# 平滑偏差超过标准误的这一倍数时在摘要中标记
+BIAS_WARNING = 2.0
+# 平均值的绝对值小于它时不计算弹性
+MEAN_EPSILON = 1e-9
+# finite_difference 的默认步长（占参数值的比例）；得分对参数是阈值跳变的平均，步长太大时差分也有偏差
+RELATIVE_STEP = 0.02
+# validate 默认核对的项数
+VALIDATE_TOP = 5
+SCORE_OUTPUT = "最终得分"
+
+# 参数类型
+PARAM_EFFECT = "effect"
+PARAM_TREND = "trend"
+PARAM_REVERSION = "reversion"
+PARAM_EVENT = "event"
+PARAM_EVENT_RATE = "event_rate"
+
+
+def _parameters(sim, schedule):
+    """分析的参数：(名称, 类型, 下标, 当前值) 的列表，路径导数的参数在前
+
+    只包含方案中用到的政策的效果项；总事件概率为 0 或 1 时无法用似然比估计，不包含事件概率。
+    """
+    used = {p for selection in schedule for p in selection}
+    indicators = sim.scenario.indicators
+    parameters = [(f"{sim.policies[p]['name']} → {indicators[k]}", PARAM_EFFECT, j, float(sim.effect_value[j]))
+                  for j, (p, k) in enumerate(zip(sim.effect_policy, sim.effect_indicator)) if p in used]
+    parameters.append(("GDP长期趋势", PARAM_TREND, 0, float(sim.gdp_trend)))
+    parameters.append(("GDP回归速度", PARAM_REVERSION, 0, float(sim.gdp_reversion)))
+    p = sim.event_probability
+    if 0 < p < 1:
+        parameters += [(f"事件概率：{event['name']}", PARAM_EVENT, e, p / len(sim.events))
+                       for e, event in enumerate(sim.events)]
+        parameters.append(("随机事件概率", PARAM_EVENT_RATE, 0, float(p)))
+    return parameters
+
+
+def _kernel(z, h):
+    """带宽为 h 的高斯核，作为阶跃函数导数的平滑近似"""
+    return np.exp(-0.5 * (z / h) ** 2) / (h * np.sqrt(2 * np.pi))
+
+
+def _bandwidth(values, floor):
+    """Silverman 规则的核带宽，不小于 floor"""
+    if len(values) < 2:
+        return floor
+    return max(1.06 * float(np.std(values)) * len(values) ** -0.2, floor)
+
+
+class _TangentSimulation(BatchSimulation):
+    """在批量模拟的同时逐局传播参数导数（随机数与 BatchSimulation 完全相同）
+
+    效果项和GDP参数只直接影响一项指标（“自身指标”），tangent 保存每局自身指标对各参数的导数；
+    影响GDP增长率的参数还会通过自然变化影响失业率，另存于 unemployment_tangent
+    （第一维对应 SMOOTHING_SCALES 中的各个带宽）。
+    score_function 累加事件抽样的对数概率对各事件概率和总概率的导数。
+    """
+
+    def __init__(self, n_games, seed, scenario, schedule):
+        super().__init__(n_games, seed=seed, scenario=scenario)
+        self.parameters = _parameters(self, schedule)
+        gdp = INDICATOR_INDEX["GDP增长率"]
+        effect_items = [index for _, kind, index, _ in self.parameters if kind == PARAM_EFFECT]
+        self.n_effects = len(effect_items)
+        self.item_column = np.full(len(self.effect_value), -1)
+        self.item_column[effect_items] = np.arange(self.n_effects)
+        self.own = np.concatenate([self.effect_indicator[effect_items], [gdp, gdp]]).astype(np.intp)
+        self.gdp_columns = np.flatnonzero(self.own == gdp)
+        self.n_events = sum(kind == PARAM_EVENT for _, kind, _, _ in self.parameters)
+
+        self.tangent = np.zeros((n_games, len(self.own)))
+        self.unemployment_tangent = np.zeros((len(SMOOTHING_SCALES), n_games, len(self.gdp_columns)))
+        self.score_function = np.zeros((n_games, self.n_events + 1 if self.n_events else 0))
+        self.span = self.upper - self.lower
+        self.clamped = np.zeros(self.data.shape, dtype=bool)
+
+    def _apply_effects(self, selected, valid, noise):
+        super()._apply_effects(selected, valid, noise)
+        # 效果值增加 dθ 时，它影响的指标增加 波动 × dθ
+        if selected.ndim == 1:
+            items = np.flatnonzero(selected[self.effect_policy])
+            self.tangent[:, self.item_column[items]] += valid[:, None] * noise[:, items]
+        else:
+            games, items = np.nonzero((selected & valid[:, None])[:, self.effect_policy])
+            self.tangent[games, self.item_column[items]] += noise[games, items]
+
+    def trigger_random_events(self, mask):
+        super().trigger_random_events(mask)
+        if self.n_events:
+            # 每个事件的概率为 p / 事件数：触发事件 e 时对数概率对它的导数为 事件数 / p、对总概率为 1 / p，
+            # 未触发时对每个参数都是 −1 / (1 − p)
+            p = self.event_probability
+            fired = self.last_event >= 0
+            self.score_function -= ((mask & ~fired) / (1 - p))[:, None]
+            games = np.flatnonzero(fired)
+            self.score_function[games, self.last_event[games]] += self.n_events / p
+            self.score_function[games, -1] += 1 / p
+
+    def advance(self, mask):
+        gdp = INDICATOR_INDEX["GDP增长率"]
+        unemployment = INDICATOR_INDEX["失业率"]
+        before = self.data[:, gdp].copy()
+        super().advance(mask)
+        rows = np.flatnonzero(mask)
+        if not len(rows):
+            return
+
+        # GDP增长率 += (趋势 − GDP增长率) × 速度
+        tangent = self.tangent[rows]
+        columns = self.gdp_columns
+        g = before[rows]
+        tangent[:, columns] *= 1 - self.gdp_reversion
+        tangent[:, self.n_effects] += self.gdp_reversion
+        tangent[:, self.n_effects + 1] += self.gdp_trend - g
+
+        # 失业率随回归后的GDP增长率跳变，阈值处的导数用核平滑
+        g = g + (self.gdp_trend - g) * self.gdp_reversion
+        h = _bandwidth(g, BANDWIDTH_FLOOR * self.span[gdp])
+        slope = np.array([UNEMPLOYMENT_BOOM_CHANGE * _kernel(g - GDP_BOOM, scale * h)
+                          - UNEMPLOYMENT_SLUMP_CHANGE * _kernel(g - GDP_SLUMP, scale * h)
+                          for scale in SMOOTHING_SCALES])
+        unemployment_tangent = self.unemployment_tangent[:, rows] + slope[:, :, None] * tangent[:, columns]
+
+        # 被范围限制截断的指标对参数不再敏感
+        clamped = self.clamped[rows]
+        tangent *= ~clamped[:, self.own]
+        unemployment_tangent *= ~clamped[:, [unemployment]]
+        self.tangent[rows] = tangent
+        self.unemployment_tangent[:, rows] = unemployment_tangent
+
+    def clamp_values(self, data):
+        self.clamped = (data < self.lower) | (data > self.upper)
+        return super().clamp_values(data)
+
+    def indicator_tangent(self, k, smoothing=0):
+        """指标 k 对各路径导数参数的导数 (对局数 × 参数数)；smoothing 为 SMOOTHING_SCALES 的下标"""
+        tangent = np.where(self.own == k, self.tangent, 0.0)
+        if k == INDICATOR_INDEX["失业率"]:
+            tangent[:, self.gdp_columns] += self.unemployment_tangent[smoothing]
+        return tangent
+
+    def score_tangent(self, smoothing=0):
+        """最终得分对各路径导数参数的导数：目标和得分条件的阈值跳变用核平滑"""
+        scale = SMOOTHING_SCALES[smoothing]
+        tangent = np.zeros(self.tangent.shape)
+        conditions = [(k, op, threshold, self.scenario.objective_score)
+                      for k, op, threshold in self.objective_conditions] + self.score_bonuses
+        for k, op, threshold, score in conditions:
+            values = self.data[:, k]
+            density = _kernel(values - threshold, scale * _bandwidth(values, BANDWIDTH_FLOOR * self.span[k]))
+            sign = -1 if op == "<=" else 1
+            tangent += (sign * score * density)[:, None] * self.indicator_tangent(k, smoothing)
+        return tangent
+
+    def sample_sums(self, scores):
+        """本块的 (各结果之和, 逐局导数样本之和, 样本平方和, 两个带宽的导数样本之差的和)
+
+        后三项为 (结果数 × 参数数)；似然比估计的参数不用核平滑，差为 0。
+        """
+        outputs = np.column_stack([self.data, scores])
+        n_outputs = outputs.shape[1]
+        n_parameters = len(self.parameters)
+        n_path = self.tangent.shape[1]
+        sums = np.zeros((n_outputs, n_parameters))
+        squares = np.zeros((n_outputs, n_parameters))
+        shifts = np.zeros((n_outputs, n_parameters))
+        for o in range(n_outputs):
+            if o == n_outputs - 1:
+                path, halved = self.score_tangent(0), self.score_tangent(1)
+            else:
+                path, halved = self.indicator_tangent(o, 0), self.indicator_tangent(o, 1)
+            y = outputs[:, o]
+            # 似然比样本减去块内平均值作为基线，降低方差
+            samples = np.concatenate([path, (y - y.mean())[:, None] * self.score_function], axis=1)
+            sums[o] = samples.sum(axis=0)
+            squares[o] = np.square(samples).sum(axis=0)
+            shifts[o, :n_path] = (halved - path).sum(axis=0)
+        return outputs.sum(axis=0), sums, squares, shifts
+
+
+class SensitivityResult:
+    """敏感性分析的结果：各结果（结束时的指标和最终得分）对各参数的导数、标准误、平滑偏差和弹性"""
+
+    def __init__(self, parameters, outputs, means, derivatives, errors, biases, n_games):
+        self.names = [name for name, _, _, _ in parameters]
+        self.kinds = [kind for _, kind, _, _ in parameters]
+        self.values = np.array([value for _, _, _, value in parameters])
+        self.outputs = outputs
+        self.means = means
+        self.derivatives = derivatives   # (结果数 × 参数数)
+        self.errors = errors             # 导数的标准误（只含抽样误差）
+        self.biases = biases             # 带宽减半时导数的变化，估计核平滑的偏差
+        self.n_games = n_games
+
+    def elasticities(self):
+        """(结果数 × 参数数) 的弹性；结果的平均值接近 0 时为 nan"""
+        scale = np.full(len(self.means), np.nan)
+        nonzero = np.abs(self.means) > MEAN_EPSILON
+        scale[nonzero] = 1 / self.means[nonzero]
+        return self.derivatives * self.values * scale[:, None]
+
+    def table(self, output=SCORE_OUTPUT, top=None):
+        """按弹性绝对值从大到小排列的 (参数名, 参数值, 导数, 标准误, 平滑偏差, 弹性)"""
+        o = self.outputs.index(output)
+        elasticity = self.elasticities()[o]
+        order = np.argsort(np.nan_to_num(-np.abs(elasticity), nan=np.inf), kind="stable")
+        return [(self.names[i], float(self.values[i]), float(self.derivatives[o, i]),
+                 float(self.errors[o, i]), float(self.biases[o, i]), float(elasticity[i])) for i in order[:top]]
+
+    def summary(self, output=SCORE_OUTPUT, top=15):
+        # 参数名放在行尾，中文名称不影响各列对齐
+        o = self.outputs.index(output)
+        lines = [f"{output}：平均 {self.means[o]:.3f}（{self.n_games} 局）",
+                 f"{'弹性':>6s} {'导数':>10s} {'标准误':>7s} {'平滑偏差':>6s} {'参数值':>5s}  参数"]
+        flagged = False
+        for name, value, derivative, error, bias, elasticity in self.table(output, top):
+            mark = "*" if abs(bias) > BIAS_WARNING * error else " "
+            flagged = flagged or mark == "*"
+            lines.append(f"{elasticity:+8.3f} {derivative:+12.4f} {error:10.4f} {bias:+10.4f}{mark}"
+                         f"{value:9.3f}  {name}")
+        if flagged:
+            lines.append(f"* 平滑偏差超过标准误的 {BIAS_WARNING:g} 倍，导数受核平滑影响，请用 validate 核对")
+        return "\n".join(lines)
+
+
+def _blocks(n_games, seed, block_size):
+    """(块大小, 块种子) 的列表，与 simulate_schedule 的分块方式相同"""
+    sizes = [min(block_size, n_games - start) for start in range(0, n_games, block_size)]
+    return list(zip(sizes, np.random.SeedSequence(seed).spawn(len(sizes))))
+
+
+def _outputs(scenario):
+    return list(scenario.indicators) + [SCORE_OUTPUT]
+
+
+def analyze_sensitivity(schedule=DEFAULT_SCHEDULE, n_games=SENSITIVITY_GAMES, seed=None, scenario=None,
+                        block_size=BLOCK_SIZE):
+    """按政策方案 schedule 批量模拟 n_games 局，一次估计全部参数的导数，返回 SensitivityResult
+
+    对局分块模拟，每块使用由 (seed, 块号) 派生的随机流，内存占用只取决于块大小。
+    """
+    scenario = DEFAULT_SCENARIO if scenario is None else scenario
+    totals = None
+    for size, block_seed in _blocks(n_games, seed, block_size):
+        sim = _TangentSimulation(size, block_seed, scenario, schedule)
+        sums = sim.sample_sums(sim.play(schedule).scores)
+        totals = sums if totals is None else [a + b for a, b in zip(totals, sums)]
+
+    output_sums, sums, squares, shifts = totals
+    derivatives = sums / n_games
+    variance = np.maximum(squares - n_games * np.square(derivatives), 0) / max(n_games - 1, 1)
+    return SensitivityResult(sim.parameters, _outputs(scenario), output_sums / n_games,
+                             derivatives, np.sqrt(variance / n_games), shifts / n_games, n_games)
+
+
+def _perturb(sim, kind, index, delta):
+    if kind == PARAM_EFFECT:
+        sim.effect_value[index] += delta
+    elif kind == PARAM_TREND:
+        sim.gdp_trend += delta
+    elif kind == PARAM_REVERSION:
+        sim.gdp_reversion += delta
+    else:
+        sim.event_probability += delta
+
+
+def finite_difference(parameter, schedule=DEFAULT_SCHEDULE, step=None, n_games=SENSITIVITY_GAMES, seed=None,
+                      scenario=None, block_size=BLOCK_SIZE):
+    """用公共随机数的中心差分估计各结果对参数 parameter（SensitivityResult.names 中的名称）的导数
+
+    返回 {结果: (导数, 标准误)}；step 默认为参数值的 RELATIVE_STEP 倍。
+    各事件各自的概率无法在公共随机数下单独扰动，只能由 analyze_sensitivity 估计。
+    """
+    scenario = DEFAULT_SCENARIO if scenario is None else scenario
+    parameters = {name: (kind, index, value)
+                  for name, kind, index, value in _parameters(BatchSimulation(1, scenario=scenario), schedule)}
+    if parameter not in parameters:
+        raise ValueError(f"未知的参数：{parameter}")
+    kind, index, value = parameters[parameter]
+    if kind == PARAM_EVENT:
+        raise ValueError(f"{parameter} 只能用似然比估计（analyze_sensitivity）")
+    if step is None:
+        step = RELATIVE_STEP * abs(value) or RELATIVE_STEP
+
+    samples = []
+    for size, block_seed in _blocks(n_games, seed, block_size):
+        ends = []
+        for delta in (step, -step):
+            sim = BatchSimulation(size, seed=block_seed, scenario=scenario)
+            _perturb(sim, kind, index, delta)
+            scores = sim.run(schedule).scores
+            ends.append(np.column_stack([sim.data, scores]))
+        samples.append((ends[0] - ends[1]) / (2 * step))
+    samples = np.concatenate(samples)
+    errors = samples.std(axis=0, ddof=1) / np.sqrt(n_games) if n_games > 1 else np.zeros(samples.shape[1])
+    return {output: (float(mean), float(error))
+            for output, mean, error in zip(_outputs(scenario), samples.mean(axis=0), errors)}
+
+
+def validate(result, schedule=DEFAULT_SCHEDULE, output=SCORE_OUTPUT, top=VALIDATE_TOP,
+             n_games=SENSITIVITY_GAMES, seed=None, scenario=None):
+    """用 finite_difference 核对 result 中 output 弹性最大的 top 个参数（跳过单个事件的概率）
+
+    返回 (参数名, 导数, 标准误, 平滑偏差, 差分导数, 差分标准误) 的列表。
+    """
+    rows = []
+    for name, _, derivative, error, bias, _ in result.table(output):
+        if len(rows) == top:
+            break
+        if result.kinds[result.names.index(name)] == PARAM_EVENT:
+            continue
+        difference, difference_error = finite_difference(name, schedule, n_games=n_games, seed=seed,
+                                                         scenario=scenario)[output]
+        rows.append((name, derivative, error, bias, difference, difference_error))
+    return rows
+
+
+def format_validation(rows):
+    lines = [f"{'导数':>8s} {'标准误':>7s} {'平滑偏差':>6s} {'差分导数':>6s} {'标准误':>6s}  参数"]
+    for name, derivative, error, bias, difference, difference_error in rows:
+        lines.append(f"{derivative:+10.4f} {error:10.4f} {bias:+10.4f} {difference:+10.4f} "
+                     f"{difference_error:9.4f}  {name}")
+    return "\n".join(lines)
+
+
+def main(argv):
+    if len(argv) > 4:
+        print("用法: python sensitivity.py [局数] [政策方案JSON] [场景文件]")
+        return 1
+    n_games = int(argv[1]) if len(argv) > 1 else SENSITIVITY_GAMES
+    schedule = json.loads(argv[2]) if len(argv) > 2 else DEFAULT_SCHEDULE
+    scenario = None
+    if len(argv) > 3:
+        from scenarios import load_scenario
+        scenario = load_scenario(argv[3])
+    result = analyze_sensitivity(schedule, n_games, seed=0, scenario=scenario)
+    print(result.summary())
+    print()
+    print("与公共随机数中心差分的核对：")
+    print(format_validation(validate(result, schedule, n_games=n_games, seed=0, scenario=scenario)))
+    for output in result.outputs[:-1]:
+        print()
+        print(result.summary(output, top=5))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
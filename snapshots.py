@@ -0,0 +1,114 @@
+"""公共经济学模拟游戏 - 不可变的游戏状态快照
+
+GameSnapshot 保存一局游戏在某一时刻的完整状态，用于存档/读档、多级撤销和分支推演。
+历史记录保存为 HistoryNode 链：每回合一个节点指向上一回合，
+从同一快照分出的多个分支共享之前的全部历史节点，创建快照不复制历史。
+
+    snapshot = engine.snapshot()
+    branch = engine.fork(snapshot)        # 从快照分出的独立引擎
+    save_snapshot(snapshot, "save.json")
+    engine.restore_snapshot(load_snapshot("save.json"))
+"""
+import json
+
+SAVE_VERSION = 1
+
+
+class HistoryNode:
+    """历史链中的一个回合：该回合开始时的指标值和预算，以及上一回合的节点"""
+
+    __slots__ = ("parent", "row", "budget", "length")
+
+    def __init__(self, parent, row, budget):
+        self.parent = parent
+        self.row = tuple(row)
+        self.budget = budget
+        self.length = 1 if parent is None else parent.length + 1
+
+    def rows(self):
+        """从第一个节点到本节点的 (指标值, 预算) 列表"""
+        nodes = []
+        node = self
+        while node is not None:
+            nodes.append(node)
+            node = node.parent
+        nodes.reverse()
+        return [(node.row, node.budget) for node in nodes]
+
+
+class GameSnapshot:
+    """一局游戏某一时刻的完整状态（创建后不可修改）"""
+
+    __slots__ = ("seed", "turn", "budget", "values", "cooldowns", "selected", "events",
+                 "game_over", "rng_state", "history", "log", "log_length", "scenario")
+
+    def __init__(self, seed, turn, budget, values, cooldowns, selected, events,
+                 game_over, rng_state, history, log=None, scenario="default", log_length=None):
+        # 通过 object.__setattr__ 赋值，之后的修改会被 __setattr__ 拒绝
+        # scenario 为场景的 key，读档时用于确认存档属于当前场景
+        # 撤销用的快照不复制日志，只记录日志长度 log_length，恢复时截断记录器
+        fields = dict(seed=seed, turn=turn, budget=budget, values=tuple(values),
+                      cooldowns=tuple(cooldowns), selected=tuple(selected), events=tuple(events),
+                      game_over=game_over, rng_state=rng_state, history=history, log=log,
+                      log_length=log_length, scenario=scenario)
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("GameSnapshot 不可修改")
+
+    def to_dict(self):
+        """转换为可写入 JSON 的字典（展开历史链）"""
+        return {
+            "version": SAVE_VERSION,
+            "seed": self.seed,
+            "turn": self.turn,
+            "budget": self.budget,
+            "values": list(self.values),
+            "cooldowns": [list(item) for item in self.cooldowns],
+            "selected": list(self.selected),
+            "events": list(self.events),
+            "game_over": self.game_over,
+            "rng_state": _state_to_json(self.rng_state),
+            "history": [[list(row), budget] for row, budget in self.history.rows()],
+            "log": self.log.hex() if self.log is not None else None,
+            "scenario": self.scenario,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("version") != SAVE_VERSION:
+            raise ValueError("无法识别的存档版本")
+        history = None
+        for row, budget in data["history"]:
+            history = HistoryNode(history, row, budget)
+        return cls(data["seed"], data["turn"], data["budget"], data["values"],
+                   [tuple(item) for item in data["cooldowns"]], data["selected"], data["events"],
+                   data["game_over"], _state_from_json(data["rng_state"]), history,
+                   bytes.fromhex(data["log"]) if data["log"] is not None else None,
+                   data.get("scenario", "default"))
+
+
+def _state_to_json(state):
+    """random.Random.getstate() 的嵌套元组转换为列表"""
+    if isinstance(state, tuple):
+        return [_state_to_json(item) for item in state]
+    return state
+
+
+def _state_from_json(state):
+    if isinstance(state, list):
+        return tuple(_state_from_json(item) for item in state)
+    return state
+
+
+def save_snapshot(snapshot, path):
+    """把快照存档到 JSON 文件"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(snapshot.to_dict(), f, ensure_ascii=False)
+
+
+def load_snapshot(path):
+    """读取 save_snapshot 写入的存档"""
+    with open(path, encoding="utf-8") as f:
+        return GameSnapshot.from_dict(json.load(f))
@@ -0,0 +1,139 @@
+"""公共经济学模拟游戏 - 启动时间预算检查
+
+在全新的子进程中启动游戏界面，测量：
+    import      导入游戏模块（不应加载 matplotlib 和 NumPy）
+    dialog      从进程启动到游戏说明窗口显示
+    charts      从进程启动到趋势图构建完成
+超出预算时以非零状态退出，可放入 CI 防止启动路径变慢。
+第一次启动受磁盘缓存影响很大（冷启动可比之后慢数倍），因此先预热一次，
+再取 RUNS 次启动的中位数与预算比较。
+
+命令行用法：
+    python startup_budget.py            # 使用默认预算
+    python startup_budget.py 1.5        # 自定义说明窗口的预算（秒）
+
+没有图形显示环境时只检查导入部分。
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# 预算（秒）
+IMPORT_BUDGET = 0.3
+DIALOG_BUDGET = 1.0
+CHARTS_BUDGET = 3.0
+
+# 预热次数和计入中位数的启动次数
+WARMUP_RUNS = 1
+RUNS = 5
+
+GAME_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "economic game.py")
+
+# 子进程中执行的测量代码；时间戳用 time.time()，以便和父进程的启动时刻比较
+CHILD_CODE = r"""
+import importlib.util, json, sys, time
+result = {}
+start = time.time()
+spec = importlib.util.spec_from_file_location("economic_game", sys.argv[1])
+game_module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(game_module)
+result["import_done"] = time.time()
+result["import_elapsed"] = result["import_done"] - start
+result["matplotlib_loaded"] = "matplotlib" in sys.modules
+result["numpy_loaded"] = "numpy" in sys.modules
+try:
+    root = game_module.tk.Tk()
+except game_module.tk.TclError as e:
+    result["gui_error"] = str(e)
+else:
+    game = game_module.EconomicSimulationGame(root)
+    root.update()
+    result["dialog_done"] = time.time()
+    while game.canvas is None:
+        root.update()
+    root.update()
+    result["charts_done"] = time.time()
+    result["pyplot_loaded"] = "matplotlib.pyplot" in sys.modules
+    root.destroy()
+print(json.dumps(result))
+"""
+
+
+def measure_once():
+    """启动一次游戏界面，返回各阶段耗时（秒）"""
+    launched = time.time()
+    output = subprocess.run([sys.executable, "-c", CHILD_CODE, GAME_PATH],
+                            capture_output=True, text=True, check=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    timings = {
+        "import": result["import_elapsed"],
+        "matplotlib_at_import": result["matplotlib_loaded"],
+        "numpy_at_import": result["numpy_loaded"],
+    }
+    if "gui_error" in result:
+        timings["gui_error"] = result["gui_error"]
+    else:
+        timings["dialog"] = result["dialog_done"] - launched
+        timings["charts"] = result["charts_done"] - launched
+        timings["pyplot_loaded"] = result["pyplot_loaded"]
+    return timings
+
+
+def measure(runs=RUNS, warmup=WARMUP_RUNS):
+    """预热后启动 runs 次，各阶段耗时取中位数，模块是否加载取任意一次的结果"""
+    for _ in range(warmup):
+        measure_once()
+    samples = [measure_once() for _ in range(runs)]
+    timings = {}
+    for key, value in samples[0].items():
+        if isinstance(value, bool):
+            timings[key] = any(sample[key] for sample in samples)
+        elif isinstance(value, float):
+            timings[key] = statistics.median(sample[key] for sample in samples)
+        else:
+            timings[key] = value
+    return timings
+
+
+def check(timings, dialog_budget=DIALOG_BUDGET):
+    """对照预算检查测量结果，返回超出预算的说明列表"""
+    problems = []
+    if timings["matplotlib_at_import"]:
+        problems.append("导入游戏模块时加载了 matplotlib")
+    if timings["numpy_at_import"]:
+        problems.append("导入游戏模块时加载了 NumPy")
+    if timings["import"] > IMPORT_BUDGET:
+        problems.append(f"导入耗时 {timings['import']:.3f}s，超出预算 {IMPORT_BUDGET}s")
+    if "dialog" in timings:
+        if timings["dialog"] > dialog_budget:
+            problems.append(f"说明窗口 {timings['dialog']:.3f}s 后才显示，超出预算 {dialog_budget}s")
+        if timings["charts"] > CHARTS_BUDGET:
+            problems.append(f"趋势图 {timings['charts']:.3f}s 后才构建完成，超出预算 {CHARTS_BUDGET}s")
+        if timings["pyplot_loaded"]:
+            problems.append("启动过程中加载了 matplotlib.pyplot")
+    return problems
+
+
+def main(argv):
+    dialog_budget = float(argv[1]) if len(argv) > 1 else DIALOG_BUDGET
+    timings = measure()
+    print(f"导入游戏模块: {timings['import']:.3f}s")
+    if "gui_error" in timings:
+        print(f"无法创建窗口，跳过界面测量: {timings['gui_error']}")
+    else:
+        print(f"说明窗口显示: {timings['dialog']:.3f}s")
+        print(f"趋势图构建完成: {timings['charts']:.3f}s")
+
+    problems = check(timings, dialog_budget)
+    for problem in problems:
+        print(f"❌ {problem}")
+    if not problems:
+        print("✅ 启动时间在预算之内")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,594 @@
+"""公共经济学模拟游戏 - AI 策略与锦标赛
+
+策略根据当前局面（回合开始、本回合尚未实施政策的 EconomicEngine）返回本回合要实施的政策下标列表，
+空列表表示本回合不实施政策。choose 只读取引擎状态，不修改引擎：
+
+    class FixedStrategy(Strategy):
+        name = "固定方案"
+
+        def choose(self, engine):
+            return [1, 5]
+
+内置策略：
+    GreedyStrategy     逐项加入使期望局面价值增加最多的政策，直到再加入任何政策都不能提高价值
+    KnapsackStrategy   按每项政策对局面价值的线性收益，在预算内做 0/1 背包
+    RolloutStrategy    对若干候选组合各推演一批对局（之后的回合用向量化的启发式选择），选平均价值最高的
+    MCTSStrategy       在之后几回合的候选组合序列上做开环 UCT 搜索，叶节点用一小批推演评估
+    RandomStrategy     随机选择可以实施的政策（对照组）
+
+局面价值 = 按 calculate_final_score 规则的得分 − 离未满足的目标和得分条件的距离 − 接近失败条件的惩罚，
+在指标数组上向量化计算。它不等于 calculate_final_score：得分只在条件满足时跳变，
+未满足时对政策的小幅改善没有反应，因此局面价值加上与差距成正比的引导项（shaping），
+并对接近失败条件的局面扣分（得分本身不考虑倒台风险）。各策略优化的都是局面价值，
+贪心和背包每回合比较的是期望局面价值的变化，而不是最终得分的变化；锦标赛仍按最终得分评比。同一次决策中各候选的推演使用相同的随机数（公共随机数）。
+标准场景下 RolloutStrategy 和 MCTSStrategy 的默认参数使单次决策在 200 毫秒以内；
+政策和指标很多的场景可以设置 time_limit 限制单次决策的时间。advisor_strategy() 即界面中的 AI 顾问。
+
+run_tournament 在同一批种子上让各策略分别下完每一局（多进程并行），
+报告胜率和平均得分的 95% 置信区间，以及两两配对比较的得分差：
+
+    python strategies.py [局数] [场景文件]
+"""
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from batch_simulation import BatchSimulation
+from economic_engine import EconomicEngine, PolicyError
+from rng_streams import game_seed
+
+# 界面中 AI 顾问单次决策的时间上限（秒）
+ADVISOR_TIME_LIMIT = 0.15
+# 锦标赛默认局数
+TOURNAMENT_GAMES = 200
+# 95% 置信区间的正态分位数
+Z_95 = 1.96
+
+
+class _ExpectedRandom:
+    """总是返回期望值的“随机数发生器”，用于按期望路径推进自然变化"""
+
+    def uniform(self, low, high, size=None):
+        mean = (low + high) / 2
+        return mean if size is None else np.full(size, mean)
+
+
+_EXPECTED = _ExpectedRandom()
+
+
+class StateValue:
+    """局面价值（向量化）：得分 − 离未满足条件的距离 − 接近失败条件的惩罚
+
+    shaping=0 且远离失败条件时与 calculate_final_score 相同；
+    否则是为搜索设计的连续目标，不是得分的估计。
+    """
+
+    def __init__(self, sim, shaping=1.0, danger_margin=0.15):
+        scenario = sim.scenario
+        self.span = sim.upper - sim.lower
+        self.shaping = shaping
+        # 得分条件：(指标下标, 方向, 阈值, 分值)，方向 +1 表示指标越大越好
+        self.conditions = [(k, 1 if op == ">=" else -1, threshold, scenario.objective_score)
+                           for k, op, threshold in sim.objective_conditions]
+        self.conditions += [(k, 1 if op == ">=" else -1, threshold, bonus)
+                            for k, op, threshold, bonus in sim.score_bonuses]
+        # 失败条件：(指标下标, 方向, 阈值, 警戒距离)，方向 +1 表示指标越大越危险
+        self.failures = [(k, 1 if op == ">=" else -1, threshold, danger_margin * self.span[k])
+                         for k, op, threshold in sim.failure_conditions]
+        # 政府倒台按失去一局可能得到的全部分数计
+        self.failure_penalty = sum(weight for _, _, _, weight in self.conditions)
+
+    def __call__(self, data):
+        """各局面 (M × 指标数) 的价值 (M,)"""
+        data = np.atleast_2d(data)
+        value = np.zeros(len(data))
+        for k, direction, threshold, weight in self.conditions:
+            gap = (threshold - data[:, k]) * direction
+            value += np.where(gap <= 0, weight, -self.shaping * weight * gap / self.span[k])
+        for k, direction, threshold, margin in self.failures:
+            distance = (threshold - data[:, k]) * direction
+            value -= self.failure_penalty * np.clip(1 - distance / margin, 0, 1) ** 2
+        return value
+
+    def gradient(self, data):
+        """价值对各指标的梯度 (M × 指标数)，用于线性估计政策的收益"""
+        data = np.atleast_2d(data)
+        grad = np.zeros(data.shape)
+        for k, direction, threshold, weight in self.conditions:
+            unmet = (threshold - data[:, k]) * direction > 0
+            grad[:, k] += unmet * (direction * self.shaping * weight / self.span[k])
+        for k, direction, threshold, margin in self.failures:
+            closeness = np.clip(1 - (threshold - data[:, k]) * direction / margin, 0, 1)
+            grad[:, k] -= direction * self.failure_penalty * 2 * closeness / margin
+        return grad
+
+
+class PolicyModel:
+    """各策略共用的场景数据：政策表、期望效果、局面价值、候选组合和批量推演"""
+
+    def __init__(self, scenario):
+        self.scenario = scenario
+        self.sim = sim = BatchSimulation(1, scenario=scenario)
+        self.n_policies = len(sim.policies)
+        self.costs = sim.costs
+        self.cooldowns = sim.cooldowns.astype(np.int64)
+        self.effects = sim.effect_matrix
+        # 实施政策后随机事件的期望效果
+        self.event_mean = sim.event_probability * sim.event_effects.mean(axis=0)
+        self.value = StateValue(sim)
+
+    def state(self, engine):
+        """引擎当前的 (指标值, 预算, 各政策剩余冷却回合数)"""
+        cooldowns = engine.policy_cooldowns
+        return (np.array(engine.indicator_vector()), engine.budget,
+                np.array([cooldowns.get(policy['name'], 0) for policy in engine.policies]))
+
+    def eligible(self, values, budget, cooldown_left):
+        """每项政策单独能否实施：已过冷却、预算足够、满足前置条件"""
+        ok = (cooldown_left <= 0) & (self.costs <= budget)
+        for p, columns, limits in self.sim.requirements:
+            if ok[p] and (values[columns] > limits).any():
+                ok[p] = False
+        return ok
+
+    def expected_after(self, values, masks):
+        """按期望路径实施各政策组合 (M × 政策数) 并进入下一回合后的指标值 (M × 指标数)"""
+        masks = np.atleast_2d(masks)
+        data = values + masks @ self.effects + masks.any(axis=1)[:, None] * self.event_mean
+        return self.sim.apply_natural_changes(data, _EXPECTED)
+
+    def linear_gains(self, values):
+        """各政策对当前局面价值的线性收益估计 (政策数,)"""
+        return self.effects @ self.value.gradient(values)[0]
+
+    def greedy(self, values, budget, cooldown_left):
+        """逐项加入使期望局面价值增加最多的政策，返回政策掩码"""
+        chosen = np.zeros(self.n_policies, dtype=bool)
+        eligible = self.eligible(values, budget, cooldown_left)
+        current = self.value(self.expected_after(values, chosen))[0]
+        while True:
+            options = np.flatnonzero(eligible & ~chosen & (self.costs <= budget - self.costs @ chosen))
+            if len(options) == 0:
+                break
+            trials = np.repeat(chosen[None], len(options), axis=0)
+            trials[np.arange(len(options)), options] = True
+            trial_values = self.value(self.expected_after(values, trials))
+            best = int(np.argmax(trial_values))
+            if trial_values[best] <= current + 1e-9:
+                break
+            chosen[options[best]] = True
+            current = trial_values[best]
+        return chosen
+
+    def knapsack(self, gains, budget, eligible):
+        """0/1 背包：在预算内使收益之和最大，返回政策掩码"""
+        items = np.flatnonzero(eligible & (gains > 0))
+        budget = int(budget)
+        best = np.zeros(budget + 1)
+        keep = np.zeros((len(items), budget + 1), dtype=bool)
+        for j, p in enumerate(items):
+            cost = int(self.costs[p])
+            candidate = np.full(budget + 1, -np.inf)
+            candidate[cost:] = best[:budget + 1 - cost] + gains[p]
+            keep[j] = candidate > best
+            best = np.maximum(best, candidate)
+        chosen = np.zeros(self.n_policies, dtype=bool)
+        for j in range(len(items) - 1, -1, -1):
+            if keep[j, budget]:
+                chosen[items[j]] = True
+                budget -= int(self.costs[items[j]])
+        return chosen
+
+    def candidates(self, values, budget, cooldown_left, limit, allow_pass=True):
+        """供前瞻搜索比较的若干政策组合（去重，最多 limit 个）"""
+        eligible = self.eligible(values, budget, cooldown_left)
+        gains = self.linear_gains(values)
+        best = self.knapsack(gains, budget, eligible)
+        masks = [self.greedy(values, budget, cooldown_left), best]
+        if allow_pass:
+            masks.append(np.zeros(self.n_policies, dtype=bool))
+        # 背包解各去掉一项重新求解，再加上单独实施收益最高的几项
+        for p in np.flatnonzero(best):
+            without = eligible.copy()
+            without[p] = False
+            masks.append(self.knapsack(gains, budget, without))
+        for p in np.argsort(-gains):
+            if eligible[p]:
+                single = np.zeros(self.n_policies, dtype=bool)
+                single[p] = True
+                masks.append(single)
+
+        unique = {}
+        for mask in masks:
+            if mask.any() or allow_pass:
+                unique.setdefault(mask.tobytes(), mask)
+        return list(unique.values())[:limit]
+
+    def heuristic_selection(self, sim):
+        """推演中各局的政策选择 (N × 政策数)：按线性收益与成本之比从高到低选取，直到预算不够"""
+        gains = self.value.gradient(sim.data) @ self.effects.T
+        eligible = (sim.cooldown_left <= 0) & (gains > 0) & sim.active[:, None]
+        for p, columns, limits in sim.requirements:
+            eligible[:, p] &= ~(sim.data[:, columns] > limits).any(axis=1)
+        order = np.argsort(np.where(eligible, -gains / np.maximum(self.costs, 1), np.inf), axis=1)
+        ordered = np.take_along_axis(eligible, order, axis=1)
+        spent = np.cumsum(self.costs[order] * ordered, axis=1)
+        selected = np.zeros_like(eligible)
+        np.put_along_axis(selected, order, ordered & (spent <= sim.budget[:, None]), axis=1)
+        return selected
+
+    def rollout_values(self, snapshot, plans, n_samples, horizon, seed, deadline=None):
+        """从快照起按每个方案（之后若干回合的政策掩码列表）各推演 n_samples 局，返回各方案的平均局面价值
+
+        方案之后的回合用 heuristic_selection，推演 horizon 回合（不超过最后一回合）。
+        各方案使用同一种子（公共随机数）；超过 deadline（perf_counter 时刻）后未评估的方案价值为 -inf。
+        """
+        sim = BatchSimulation(n_samples, seed=seed, scenario=self.scenario)
+        last = min(self.scenario.max_turns, snapshot.turn + horizon - 1)
+        results = np.full(len(plans), -np.inf)
+        for k, plan in enumerate(plans):
+            if deadline is not None and k > 0 and time.perf_counter() > deadline:
+                break
+            sim.start_from(snapshot)
+            while sim.turn <= last and sim.active.any():
+                step = sim.turn - snapshot.turn
+                selected = plan[step] if step < len(plan) else self.heuristic_selection(sim)
+                if selected.any():
+                    sim.apply_policies(selected)
+                sim.next_turn()
+            results[k] = self.value(sim.data).mean()
+        return results
+
+    def next_state(self, values, budget, cooldown_left, mask):
+        """按期望路径实施 mask 并进入下一回合后的 (指标值, 预算, 剩余冷却)；预算和冷却是确定的"""
+        scenario = self.scenario
+        values = self.expected_after(values, mask)[0]
+        budget = min(scenario.max_budget, budget - int(self.costs @ mask) + scenario.budget_per_turn)
+        cooldown_left = np.maximum(np.where(mask, self.cooldowns, cooldown_left) - 1, 0)
+        return values, budget, cooldown_left
+
+
+_models = {}
+
+
+def policy_model(scenario):
+    """场景的 PolicyModel（按场景缓存）"""
+    model = _models.get(scenario.key)
+    if model is None or model.scenario is not scenario:
+        model = _models[scenario.key] = PolicyModel(scenario)
+    return model
+
+
+def _decision_seed(seed, engine):
+    """一次决策的推演种子：由策略种子、对局种子和回合派生，同一局面的决策可以复现"""
+    return [seed, engine.seed % 2 ** 64, engine.turn]
+
+
+def _indices(mask):
+    return np.flatnonzero(mask).tolist()
+
+
+class Strategy:
+    """策略基类：choose(engine) 返回本回合要实施的政策下标列表"""
+
+    name = "策略"
+
+    def __init__(self, allow_pass=True):
+        # 图形界面中每回合必须至少实施一项政策；allow_pass=False 时只要有可实施的政策就不返回空列表
+        self.allow_pass = allow_pass
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.name!r})"
+
+    def choose(self, engine):
+        raise NotImplementedError
+
+    def _finish(self, model, mask, values, budget, cooldown_left):
+        """把政策掩码转换为下标列表；不允许跳过时补上收益最高的一项可实施政策"""
+        if not mask.any() and not self.allow_pass:
+            eligible = model.eligible(values, budget, cooldown_left)
+            if eligible.any():
+                gains = np.where(eligible, model.linear_gains(values), -np.inf)
+                return [int(np.argmax(gains))]
+        return _indices(mask)
+
+
+class RandomStrategy(Strategy):
+    """随机选择可以实施的政策"""
+
+    name = "随机"
+
+    def __init__(self, rate=0.3, seed=0, allow_pass=True):
+        super().__init__(allow_pass)
+        self.rate = rate
+        self.seed = seed
+
+    def choose(self, engine):
+        model = policy_model(engine.scenario)
+        values, budget, cooldown_left = model.state(engine)
+        rng = np.random.default_rng(_decision_seed(self.seed, engine))
+        eligible = model.eligible(values, budget, cooldown_left)
+        chosen = np.zeros(model.n_policies, dtype=bool)
+        for p in rng.permutation(np.flatnonzero(eligible & (rng.random(model.n_policies) < self.rate))):
+            if model.costs @ chosen + model.costs[p] <= budget:
+                chosen[p] = True
+        return self._finish(model, chosen, values, budget, cooldown_left)
+
+
+class GreedyStrategy(Strategy):
+    """贪心：逐项加入使期望局面价值增加最多的政策
+
+    排序依据是期望路径上 StateValue 的增量，而不是 calculate_final_score 的增量：
+    得分只在条件满足时变化，按得分比较时大多数回合各政策都没有差别。
+    """
+
+    name = "贪心"
+
+    def choose(self, engine):
+        model = policy_model(engine.scenario)
+        values, budget, cooldown_left = model.state(engine)
+        return self._finish(model, model.greedy(values, budget, cooldown_left), values, budget, cooldown_left)
+
+
+class KnapsackStrategy(Strategy):
+    """背包：按线性收益在预算内选取收益之和最大的政策组合"""
+
+    name = "背包"
+
+    def choose(self, engine):
+        model = policy_model(engine.scenario)
+        values, budget, cooldown_left = model.state(engine)
+        eligible = model.eligible(values, budget, cooldown_left)
+        mask = model.knapsack(model.linear_gains(values), budget, eligible)
+        return self._finish(model, mask, values, budget, cooldown_left)
+
+
+class RolloutStrategy(Strategy):
+    """蒙特卡洛前瞻：每个候选组合推演 n_samples 局、horizon 回合，选平均价值最高的"""
+
+    name = "蒙特卡洛前瞻"
+
+    def __init__(self, n_candidates=8, n_samples=256, horizon=6, seed=0, time_limit=None, allow_pass=True):
+        super().__init__(allow_pass)
+        self.n_candidates = n_candidates
+        self.n_samples = n_samples
+        self.horizon = horizon
+        self.seed = seed
+        # 秒；超时后只在已评估的候选中选择（候选按启发式的好坏排列）
+        self.time_limit = time_limit
+
+    def choose(self, engine):
+        start = time.perf_counter()
+        model = policy_model(engine.scenario)
+        values, budget, cooldown_left = model.state(engine)
+        candidates = model.candidates(values, budget, cooldown_left, self.n_candidates, self.allow_pass)
+        if len(candidates) <= 1:
+            mask = candidates[0] if candidates else np.zeros(model.n_policies, dtype=bool)
+            return self._finish(model, mask, values, budget, cooldown_left)
+        deadline = None if self.time_limit is None else start + self.time_limit
+        scores = model.rollout_values(engine.snapshot(), [[mask] for mask in candidates], self.n_samples,
+                                      self.horizon, _decision_seed(self.seed, engine), deadline)
+        return _indices(candidates[int(np.argmax(scores))])
+
+
+class _Node:
+    """开环 UCT 的节点：之后一回合的候选组合及其统计"""
+
+    __slots__ = ("state", "actions", "children", "visits", "totals")
+
+    def __init__(self, model, state, n_candidates, allow_pass):
+        self.state = state
+        self.actions = model.candidates(*state, n_candidates, allow_pass)
+        self.children = [None] * len(self.actions)
+        self.visits = np.zeros(len(self.actions))
+        self.totals = np.zeros(len(self.actions))
+
+    def select(self, exploration):
+        """未试过的候选优先，之后按 UCB1 选择"""
+        untried = np.flatnonzero(self.visits == 0)
+        if len(untried):
+            return int(untried[0])
+        means = self.totals / self.visits
+        bonus = exploration * np.sqrt(math.log(self.visits.sum()) / self.visits)
+        return int(np.argmax(means + bonus))
+
+
+class MCTSStrategy(Strategy):
+    """开环 UCT：搜索之后 depth 回合的候选组合序列，叶节点推演 n_samples 局评估"""
+
+    name = "蒙特卡洛树搜索"
+
+    def __init__(self, iterations=30, n_samples=32, depth=2, horizon=6, n_candidates=6, exploration=10.0,
+                 seed=0, time_limit=None, allow_pass=True):
+        super().__init__(allow_pass)
+        self.iterations = iterations
+        self.n_samples = n_samples
+        self.depth = depth
+        self.horizon = horizon
+        self.n_candidates = n_candidates
+        self.exploration = exploration    # 探索系数，单位为得分
+        self.seed = seed
+        self.time_limit = time_limit
+
+    def choose(self, engine):
+        start = time.perf_counter()
+        model = policy_model(engine.scenario)
+        state = model.state(engine)
+        root = _Node(model, state, self.n_candidates, self.allow_pass)
+        if len(root.actions) <= 1:
+            mask = root.actions[0] if root.actions else np.zeros(model.n_policies, dtype=bool)
+            return self._finish(model, mask, *state)
+
+        snapshot = engine.snapshot()
+        seed = _decision_seed(self.seed, engine)
+        last_turn = engine.max_turns
+        for iteration in range(self.iterations):
+            if self.time_limit is not None and iteration > 0 and time.perf_counter() - start > self.time_limit:
+                break
+            # 选择并扩展：沿 UCB 下降，遇到未试过的候选或到达深度时停止
+            path = []
+            node = root
+            while True:
+                a = node.select(self.exploration)
+                path.append((node, a))
+                if (node.visits[a] == 0 or len(path) >= self.depth
+                        or engine.turn + len(path) > last_turn):
+                    break
+                if node.children[a] is None:
+                    node.children[a] = _Node(model, model.next_state(*node.state, node.actions[a]),
+                                             self.n_candidates, self.allow_pass)
+                if not node.children[a].actions:
+                    break
+                node = node.children[a]
+
+            # 评估：按路径实施，之后用启发式推演；每次迭代抽取不同的随机数
+            plan = [n.actions[a] for n, a in path]
+            value = model.rollout_values(snapshot, [plan], self.n_samples, self.horizon, seed + [iteration])[0]
+            for n, a in path:
+                n.visits[a] += 1
+                n.totals[a] += value
+
+        return _indices(root.actions[int(np.argmax(root.visits))])
+
+
+def advisor_strategy():
+    """界面中的 AI 顾问：限时的蒙特卡洛前瞻，总是建议至少一项政策"""
+    return RolloutStrategy(time_limit=ADVISOR_TIME_LIMIT, allow_pass=False)
+
+
+def default_strategies():
+    """锦标赛默认参赛的内置策略"""
+    return [RandomStrategy(), GreedyStrategy(), KnapsackStrategy(), RolloutStrategy(), MCTSStrategy()]
+
+
+def play_game(strategy, seed, scenario=None):
+    """用策略下完一局，规则与图形界面相同：引擎拒绝的选择（冷却中、重复、预算不足、
+    条件不满足）按不实施政策处理
+
+    返回 (最终得分, 结果 "victory"/"defeat"/"finished", 完成目标数, 无效选择次数, 最长决策秒数)
+    """
+    engine = EconomicEngine(seed, scenario=scenario)
+    invalid = 0
+    slowest = 0.0
+    while True:
+        start = time.perf_counter()
+        selection = sorted(strategy.choose(engine))
+        slowest = max(slowest, time.perf_counter() - start)
+        try:
+            result = engine.step(selection)["result"]
+        except PolicyError:
+            # 校验在修改引擎之前完成，被拒绝的选择不会留下任何影响
+            invalid += 1
+            result = engine.step([])["result"]
+        if result is not None:
+            return engine.calculate_final_score(), result[0], engine.completed_objectives(), invalid, slowest
+
+
+def _play_games(strategy, seeds, scenario):
+    return [play_game(strategy, seed, scenario) for seed in seeds]
+
+
+def wilson_interval(successes, n, z=Z_95):
+    """二项比例的 Wilson 置信区间"""
+    if n == 0:
+        return 0.0, 1.0
+    p = successes / n
+    center = (p + z * z / (2 * n)) / (1 + z * z / n)
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+    return max(0.0, center - half), min(1.0, center + half)
+
+
+def mean_interval(values, z=Z_95):
+    """均值及其正态近似置信区间：(均值, 下限, 上限)"""
+    values = np.asarray(values, dtype=np.float64)
+    mean = float(values.mean())
+    half = z * float(values.std(ddof=1)) / math.sqrt(len(values)) if len(values) > 1 else 0.0
+    return mean, mean - half, mean + half
+
+
+class TournamentResult:
+    """锦标赛结果：每个策略在同一批种子上的逐局记录"""
+
+    def __init__(self, names, records, seeds):
+        self.names = names
+        self.seeds = seeds
+        self.scores = np.array([[r[0] for r in games] for games in records], dtype=np.float64)
+        self.outcomes = np.array([[r[1] for r in games] for games in records])
+        self.objectives = np.array([[r[2] for r in games] for games in records])
+        self.invalid = np.array([[r[3] for r in games] for games in records])
+        self.decision_time = np.array([[r[4] for r in games] for games in records])
+
+    def standings(self):
+        """每个策略一行：(名称, 胜率, 胜率区间, 平均得分, 得分区间, 倒台率, 最长决策毫秒)"""
+        rows = []
+        n = len(self.seeds)
+        for k, name in enumerate(self.names):
+            wins = int(np.sum(self.outcomes[k] == "victory"))
+            mean, low, high = mean_interval(self.scores[k])
+            rows.append((name, wins / n, wilson_interval(wins, n), mean, (low, high),
+                         float(np.mean(self.outcomes[k] == "defeat")), float(self.decision_time[k].max() * 1e3)))
+        return rows
+
+    def pairwise(self):
+        """两两配对比较（同一种子逐局配对）：(策略 a, 策略 b, 平均得分差 a−b, 区间下限, 区间上限, a 得分更高的局数比例)"""
+        rows = []
+        for a in range(len(self.names)):
+            for b in range(a + 1, len(self.names)):
+                diff = self.scores[a] - self.scores[b]
+                mean, low, high = mean_interval(diff)
+                rows.append((self.names[a], self.names[b], mean, low, high, float(np.mean(diff > 0))))
+        return rows
+
+    def summary(self):
+        # 策略名放在行尾，中文名称不影响各列对齐
+        lines = [f"{len(self.seeds)} 局，95% 置信区间",
+                 f"{'胜率':>22s} {'平均得分':>21s} {'倒台率':>4s} {'最长决策':>6s}  策略"]
+        for name, win_rate, (w_low, w_high), mean, (low, high), defeat_rate, slowest in self.standings():
+            lines.append(f"{win_rate:7.1%} [{w_low:6.1%}, {w_high:6.1%}] "
+                         f"{mean:8.1f} [{low:6.1f}, {high:6.1f}] {defeat_rate:7.1%} {slowest:8.1f}ms  {name}")
+        lines.append("")
+        lines.append("配对比较（得分差 a − b，a 更高的局数比例）")
+        for a, b, mean, low, high, better in self.pairwise():
+            lines.append(f"{a} − {b}: {mean:+.1f} [{low:+.1f}, {high:+.1f}]，{better:.0%}")
+        return "\n".join(lines)
+
+
+def run_tournament(strategies=None, n_games=TOURNAMENT_GAMES, seed=0, processes=None, scenario=None):
+    """让各策略在同一批 n_games 个种子上分别对局，返回 TournamentResult
+
+    对局按 (策略, 一组种子) 分发到进程池；每局的种子由 (seed, 局号) 派生，结果与进程数无关。
+    """
+    strategies = default_strategies() if strategies is None else strategies
+    seeds = [game_seed(seed, i) for i in range(n_games)]
+    processes = processes or os.cpu_count() or 1
+    chunk = max(1, math.ceil(n_games / (processes * 4)))
+    chunks = [seeds[i:i + chunk] for i in range(0, n_games, chunk)]
+    tasks = [(strategy, part, scenario) for strategy in strategies for part in chunks]
+    if processes > 1:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            results = list(pool.map(_play_games, *zip(*tasks)))
+    else:
+        results = [_play_games(*task) for task in tasks]
+    records = [sum(results[k * len(chunks):(k + 1) * len(chunks)], []) for k in range(len(strategies))]
+    return TournamentResult([strategy.name for strategy in strategies], records, seeds)
+
+
+def main(argv):
+    if len(argv) > 3:
+        print("用法: python strategies.py [局数] [场景文件]")
+        return 1
+    n_games = int(argv[1]) if len(argv) > 1 else TOURNAMENT_GAMES
+    scenario = None
+    if len(argv) > 2:
+        from scenarios import load_scenario
+        scenario = load_scenario(argv[2])
+    print(run_tournament(n_games=n_games, scenario=scenario).summary())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
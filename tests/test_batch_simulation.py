@@ -0,0 +1,71 @@
+"""批量模拟的测试：胜率和平均得分与逐局运行 EconomicEngine 的结果在统计误差内一致"""
+import math
+import unittest
+
+import numpy as np
+
+from batch_simulation import BatchSimulation, simulate_schedule
+from economic_engine import EconomicEngine, PolicyError
+
+SCHEDULE = [[1, 5], [3, 9], [7]] * 4
+ENGINE_GAMES = 2000
+BATCH_GAMES = 20000
+
+
+def play(seed, schedule):
+    """用引擎下完一局；无法实施的政策组合跳过，与批量模拟相同。返回 (结果, 得分)"""
+    engine = EconomicEngine(seed=seed)
+    turn = 0
+    while not engine.game_over:
+        selection = schedule[turn] if turn < len(schedule) else []
+        turn += 1
+        try:
+            step = engine.step(selection)
+        except PolicyError:
+            step = engine.step([])
+    return step["result"][0], engine.calculate_final_score()
+
+
+class BatchSimulationTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        games = [play(seed, SCHEDULE) for seed in range(ENGINE_GAMES)]
+        cls.results = [result for result, _ in games]
+        cls.scores = np.array([score for _, score in games], dtype=float)
+        cls.batch = simulate_schedule(SCHEDULE, BATCH_GAMES, seed=1)
+
+    def assertClose(self, engine_values, batch_values):
+        """两组样本的均值之差不超过 4 个标准误"""
+        engine_values = np.asarray(engine_values, dtype=float)
+        batch_values = np.asarray(batch_values, dtype=float)
+        error = math.sqrt(engine_values.var() / len(engine_values) + batch_values.var() / len(batch_values))
+        self.assertLessEqual(abs(engine_values.mean() - batch_values.mean()), 4 * max(error, 1e-3))
+
+    def test_win_rate_matches_engine(self):
+        wins = [result == "victory" for result in self.results]
+        self.assertClose(wins, self.batch.outcomes == 1)
+
+    def test_defeat_rate_matches_engine(self):
+        defeats = [result == "defeat" for result in self.results]
+        self.assertClose(defeats, self.batch.outcomes >= 2)
+
+    def test_mean_score_matches_engine(self):
+        self.assertClose(self.scores, self.batch.scores)
+
+    def test_independent_of_processes(self):
+        single = simulate_schedule(SCHEDULE, 3000, seed=4, block_size=1000)
+        pooled = simulate_schedule(SCHEDULE, 3000, seed=4, processes=2, block_size=1000)
+        self.assertEqual(single.scores.tolist(), pooled.scores.tolist())
+        self.assertEqual(single.outcomes.tolist(), pooled.outcomes.tolist())
+
+    def test_unaffordable_selection_skipped(self):
+        batch = BatchSimulation(100, seed=0)
+        budget = batch.budget.copy()
+        expensive = np.ones(len(batch.policies), dtype=bool)
+        self.assertGreater(expensive @ batch.costs, budget.max())
+        self.assertFalse(batch.apply_policies(expensive).any())
+        self.assertEqual(batch.budget.tolist(), budget.tolist())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,192 @@
+"""游戏服务器的测试：用本地客户端通过 HTTP 和 WebSocket 下完一局，以及各种错误输入"""
+import asyncio
+import base64
+import json
+import os
+import struct
+import unittest
+
+from game_server import GameServer, OPCODE_CLOSE, OPCODE_TEXT
+
+
+class Client:
+    """最简单的 HTTP/1.1 和 WebSocket 客户端"""
+
+    def __init__(self, port):
+        self.port = port
+
+    async def request(self, method, path, body=None, headers=None):
+        """发送一个请求，返回 (状态码, 响应数据)"""
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode()
+        body = body or b""
+        lines = [f"{method} {path} HTTP/1.1", "Host: localhost", "Connection: close"]
+        if headers is None:
+            headers = {"Content-Length": str(len(body))}
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        return await self.send(("\r\n".join(lines) + "\r\n\r\n").encode() + body)
+
+    async def send(self, data):
+        """发送原始请求数据，返回 (状态码, 响应数据)"""
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        writer.write(data)
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        head, _, payload = response.partition(b"\r\n\r\n")
+        return int(head.split()[1]), json.loads(payload)
+
+    async def websocket(self, session_id):
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        key = base64.b64encode(os.urandom(16)).decode()
+        writer.write((f"GET /sessions/{session_id}/ws HTTP/1.1\r\nHost: localhost\r\n"
+                      "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode())
+        head = await reader.readuntil(b"\r\n\r\n")
+        assert head.startswith(b"HTTP/1.1 101"), head
+        return WebSocket(reader, writer)
+
+
+class WebSocket:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    def send(self, message, opcode=OPCODE_TEXT):
+        payload = message if isinstance(message, bytes) else json.dumps(message).encode()
+        mask = os.urandom(4)
+        masked = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        if len(payload) < 126:
+            header = struct.pack("!BB", 0x80 | opcode, 0x80 | len(payload))
+        else:
+            header = struct.pack("!BBH", 0x80 | opcode, 0x80 | 126, len(payload))
+        self.writer.write(header + mask + masked)
+
+    async def receive(self):
+        first, second = await asyncio.wait_for(self.reader.readexactly(2), 5)
+        length = second & 0x7F
+        if length == 126:
+            length, = struct.unpack("!H", await self.reader.readexactly(2))
+        elif length == 127:
+            length, = struct.unpack("!Q", await self.reader.readexactly(8))
+        return json.loads(await self.reader.readexactly(length))
+
+    async def close(self):
+        self.send(b"\x03\xe8", OPCODE_CLOSE)
+        await self.reader.read()
+        self.writer.close()
+
+
+class GameServerTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = GameServer()
+        await self.server.start(port=0)
+        self.client = Client(self.server.port)
+        status, state = await self.client.request("POST", "/sessions", {"seed": 3})
+        self.assertEqual(status, 201)
+        self.session = state["session"]
+
+    async def asyncTearDown(self):
+        await self.server.stop()
+
+    async def play_turn(self, apply):
+        """实施一项可行的政策；apply(下标列表) 返回 (状态码, 状态)"""
+        status, state = await self.client.request("GET", f"/sessions/{self.session}/state")
+        for i in state["available"]:
+            status, state = await apply([i])
+            if status == 200:
+                return state
+        self.fail("本回合没有可实施的政策")
+
+    async def test_http_game_with_websocket_updates(self):
+        ws = await self.client.websocket(self.session)
+        self.assertEqual((await ws.receive())["state"]["turn"], 1)
+
+        def apply(indices):
+            return self.client.request("POST", f"/sessions/{self.session}/apply", {"policies": indices})
+
+        state = {"game_over": False}
+        while not state["game_over"]:
+            state = await self.play_turn(apply)
+            self.assertEqual((await ws.receive())["state"], state)
+            if state["game_over"]:
+                break
+            status, state = await self.client.request("POST", f"/sessions/{self.session}/next")
+            self.assertEqual(status, 200)
+            self.assertEqual((await ws.receive())["state"], state)
+        self.assertIn("score", state)
+        self.assertIsNotNone(state["result"])
+
+        status, history = await self.client.request("GET", f"/sessions/{self.session}/history")
+        self.assertEqual(status, 200)
+        self.assertGreater(history["turns"], 1)
+        self.assertEqual(len(history["budget"]), history["turns"])
+        status, _ = await self.client.request("POST", f"/sessions/{self.session}/next")
+        self.assertEqual(status, 409)
+        await ws.close()
+
+    async def test_websocket_game(self):
+        ws = await self.client.websocket(self.session)
+        await ws.receive()
+
+        async def apply(indices):
+            ws.send({"action": "apply", "policies": indices})
+            message = await ws.receive()
+            return (200, message["state"]) if message["type"] == "update" else (409, message)
+
+        state = {"game_over": False}
+        while not state["game_over"]:
+            state = await self.play_turn(apply)
+            if not state["game_over"]:
+                ws.send({"action": "next"})
+                state = (await ws.receive())["state"]
+        self.assertIn("score", state)
+        await ws.close()
+
+    async def test_malformed_http(self):
+        path = f"/sessions/{self.session}/apply"
+        for body in ({"policies": "1"}, {"policies": 1}, {"policies": {"0": 1}},
+                     {"policies": [True]}, {"policies": [False]}, {"policies": [1.0]},
+                     {"policies": [-1]}, {"policies": [99]}, {"policies": [1, 1]},
+                     [1], b"not json"):
+            status, payload = await self.client.request("POST", path, body)
+            self.assertEqual(status, 400, body)
+            self.assertIn("error", payload)
+        for length in ("abc", "-5", "1.5", "", "²"):
+            status, _ = await self.client.request("POST", path, b"{}", {"Content-Length": length})
+            self.assertEqual(status, 400, length)
+        status, _ = await self.client.request("POST", path, b"{}", {"Content-Length": str(1 << 20)})
+        self.assertEqual(status, 413)
+        for line in (b"GARBAGE", b"GET /policies", b"GET /policies FOO", b" /policies HTTP/1.1", b""):
+            status, payload = await self.client.send(line + b"\r\nHost: localhost\r\n\r\n")
+            self.assertEqual(status, 400, line)
+            self.assertIn("error", payload)
+        status, _ = await self.client.request("POST", "/sessions", {"seed": "x"})
+        self.assertEqual(status, 400)
+        status, _ = await self.client.request("GET", "/sessions/missing/state")
+        self.assertEqual(status, 404)
+        status, _ = await self.client.request("POST", f"/sessions/{self.session}/next")
+        self.assertEqual(status, 409)
+        # 错误输入不影响会话
+        status, state = await self.client.request("GET", f"/sessions/{self.session}/state")
+        self.assertEqual((status, state["turn"], state["applied"]), (200, 1, False))
+
+    async def test_malformed_websocket(self):
+        ws = await self.client.websocket(self.session)
+        await ws.receive()
+        for message in ({"action": "apply", "policies": "12"}, {"action": "apply", "policies": 5},
+                        {"action": "apply", "policies": {"a": 1}}, {"action": "apply", "policies": [True]},
+                        {"action": "apply", "policies": [1, 1]}, {"action": "fly"}, [1], b"\xff{",
+                        b"not json"):
+            ws.send(message)
+            reply = await ws.receive()
+            self.assertEqual(reply["type"], "error", message)
+        # 连接仍然可用
+        ws.send({"action": "state"})
+        reply = await ws.receive()
+        self.assertEqual((reply["type"], reply["state"]["turn"]), ("update", 1))
+        await ws.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
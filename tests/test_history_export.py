@@ -0,0 +1,84 @@
+"""对局历史导出的测试：export_schedule 与 simulate_schedule 逐局相同，add_engine 与 add_log 写出相同的数据"""
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from batch_simulation import simulate_schedule
+from economic_engine import EconomicEngine, PolicyError
+from history_export import COLUMNS, HistoryWriter, export_schedule, load_histories
+from replay_log import ReplayRecorder
+
+SCHEDULE = [[1, 5], [3, 9], [7]] * 4
+
+
+def play(seed):
+    """带记录器下完一局，无法实施的政策组合跳过"""
+    engine = EconomicEngine(seed=seed, recorder=ReplayRecorder())
+    turn = 0
+    while not engine.game_over:
+        selection = SCHEDULE[turn] if turn < len(SCHEDULE) else []
+        turn += 1
+        try:
+            engine.step(selection)
+        except PolicyError:
+            engine.step([])
+    return engine
+
+
+class HistoryExportTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def test_export_schedule_matches_simulate_schedule(self):
+        written = export_schedule(self.path("schedule"), SCHEDULE, 2500, seed=5, block_size=1000)
+        histories = load_histories(self.path("schedule"))
+        result = simulate_schedule(SCHEDULE, 2500, seed=5, block_size=1000)
+        self.assertEqual(written, len(histories))
+        self.assertEqual(histories.scores.tolist(), result.scores.tolist())
+        self.assertEqual(histories.outcomes.tolist(), result.outcomes.tolist())
+        # 第一行是初始状态，记录到的最后一行之后都是空行
+        initial = EconomicEngine(seed=0).indicator_vector()
+        self.assertTrue((histories.values[:, 0] == initial).all())
+        for game in range(0, len(histories), 97):
+            turns = histories.turns[game]
+            self.assertFalse(np.isnan(histories.values[game, :turns]).any())
+            self.assertTrue(np.isnan(histories.values[game, turns:]).all())
+            self.assertTrue((histories.budget[game, turns:] == -1).all())
+
+    def test_add_engine_matches_add_log(self):
+        engines = [play(seed) for seed in range(40)]
+        # 既有下完全部回合的对局，也有提前结束的对局
+        self.assertGreater(len({engine.turn > engine.max_turns for engine in engines}), 1)
+        with HistoryWriter(self.path("engine"), buffer_games=7) as writer:
+            for engine in engines:
+                writer.add_engine(engine)
+        with HistoryWriter(self.path("log")) as writer:
+            for engine in engines:
+                writer.add_log(engine.recorder.getvalue())
+        from_engine = load_histories(self.path("engine"))
+        from_log = load_histories(self.path("log"))
+        self.assertEqual(len(from_engine), len(engines))
+        for name in COLUMNS:
+            np.testing.assert_array_equal(getattr(from_engine, name), getattr(from_log, name), name)
+
+        for game, engine in enumerate(engines):
+            turns = from_engine.turns[game]
+            self.assertEqual(from_engine.values[game, :turns].tolist(), engine.data_history.rows().tolist())
+            self.assertEqual(from_engine.scores[game], engine.calculate_final_score())
+
+    def test_add_engine_requires_log(self):
+        with HistoryWriter(self.path("none")) as writer:
+            with self.assertRaises(ValueError):
+                writer.add_engine(EconomicEngine(seed=0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+"""参数扫描的测试：每个组合写一行结果，同一种子的结果可重复，排队的组合数有上限"""
+import json
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import parameter_sweep
+from parameter_sweep import grid, run_sweep
+
+SCHEDULE = [[1, 5], [3, 9], [7]]
+CONFIGURATIONS = grid({"event_probability": [0.2, 0.4], "policies.9.cost": [8, 10, 12]})
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    """记录同时未完成的任务数的执行器"""
+
+    def __init__(self, max_workers):
+        super().__init__(max_workers=max_workers)
+        self.futures = []
+        self.peak = 0
+        CountingExecutor.last = self
+
+    def submit(self, *args, **kwargs):
+        self.futures = [f for f in self.futures if not f.done()]
+        self.futures.append(super().submit(*args, **kwargs))
+        self.peak = max(self.peak, len(self.futures))
+        return self.futures[-1]
+
+
+class ParameterSweepTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "results.jsonl")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def sweep(self, processes, seed=5):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        written = run_sweep(CONFIGURATIONS, SCHEDULE, 300, self.path, processes=processes, seed=seed)
+        with open(self.path, encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual(written, len(lines))
+        return sorted(lines, key=lambda line: line["id"])
+
+    def test_one_line_per_configuration(self):
+        lines = self.sweep(processes=2)
+        self.assertEqual([line["id"] for line in lines], list(range(len(CONFIGURATIONS))))
+        self.assertEqual([line["overrides"] for line in lines], CONFIGURATIONS)
+
+    def test_reproducible_for_seed(self):
+        first = self.sweep(processes=2)
+        self.assertEqual(self.sweep(processes=1), first)
+        self.assertNotEqual(self.sweep(processes=2, seed=6), first)
+
+    def test_bounded_in_flight(self):
+        with mock.patch.object(parameter_sweep, "ProcessPoolExecutor", CountingExecutor):
+            lines = self.sweep(processes=1)
+        self.assertEqual(len(lines), len(CONFIGURATIONS))
+        self.assertLessEqual(CountingExecutor.last.peak, parameter_sweep.IN_FLIGHT_PER_PROCESS)
+
+
+if __name__ == "__main__":
+    unittest.main()
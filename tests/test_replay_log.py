@@ -0,0 +1,71 @@
+"""回放日志的测试：重放结果与原局一致，事件记录与每回合实际触发的事件逐一核对"""
+import unittest
+from unittest import mock
+
+from economic_engine import EconomicEngine
+from replay_log import ReplayError, ReplayRecorder, replay
+
+
+class SilentRecorder(ReplayRecorder):
+    """不记录随机事件的记录器"""
+
+    def record_event(self, index):
+        pass
+
+
+def record(recorder, turns, seed=0):
+    """seed=0 时第1回合触发随机事件，第2回合没有"""
+    engine = EconomicEngine(seed=seed, recorder=recorder)
+    for _ in range(turns):
+        engine.apply_policies([8])
+        engine.next_turn()
+    return engine
+
+
+class ReplayTest(unittest.TestCase):
+    def test_round_trip(self):
+        recorder = ReplayRecorder()
+        engine = record(recorder, 9)
+        for seek in (True, False):
+            replayed = replay(recorder.getvalue(), seek=seek)
+            self.assertEqual(replayed.turn, engine.turn)
+            self.assertEqual(replayed.indicator_vector(), engine.indicator_vector())
+            self.assertEqual(replayed.budget, engine.budget)
+
+    def test_event_on_turn_without_event(self):
+        # 第2回合没有触发事件，日志却记录了第1回合的事件
+        recorder = ReplayRecorder()
+        engine = record(recorder, 1)
+        self.assertEqual(len(engine.event_indices), 1)
+        self.assertIsNone(engine.apply_policies([1]))
+        recorder.record_event(engine.event_indices[0])
+        engine.next_turn()
+        with self.assertRaises(ReplayError):
+            replay(recorder.getvalue(), seek=False)
+
+    def test_missing_event(self):
+        recorder = SilentRecorder()
+        record(recorder, 3)
+        with self.assertRaises(ReplayError):
+            replay(recorder.getvalue(), seek=False)
+
+    def test_undo_truncates_log(self):
+        recorder = ReplayRecorder()
+        engine = EconomicEngine(seed=0, recorder=recorder, undo_depth=3)
+        for _ in range(5):
+            engine.apply_policies([8])
+            engine.next_turn()
+        before = recorder.getvalue()
+        # 撤销快照不复制日志
+        with mock.patch.object(ReplayRecorder, "getvalue", side_effect=AssertionError("复制了日志")):
+            engine.apply_policies([1])
+        self.assertGreater(len(recorder.buffer), len(before))
+        self.assertTrue(engine.undo())
+        self.assertEqual(recorder.getvalue(), before)
+        engine.apply_policies([8])
+        engine.next_turn()
+        self.assertEqual(replay(recorder.getvalue()).indicator_vector(), engine.indicator_vector())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+"""最优方案搜索的测试：标准场景在默认时间限制内证明最优，方案能在引擎中逐回合执行"""
+import unittest
+
+from economic_engine import EconomicEngine, Scenario
+from schedule_solver import ScheduleSolver, solve_best_schedule
+
+
+def brute_force(solver, state):
+    """穷举期望路径上的全部方案，返回最优得分"""
+    best = None
+    for terminal, _, nxt in solver._children(*state):
+        value = terminal if terminal is not None else brute_force(solver, nxt)
+        best = value if best is None else max(best, value)
+    return best
+
+
+class ScheduleSolverTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.result = solve_best_schedule()
+
+    def test_standard_game_proven_optimal(self):
+        self.assertTrue(self.result.optimal)
+        self.assertEqual(self.result.bound, self.result.score)
+        self.assertEqual(ScheduleSolver().replay(self.result.schedule)[0], self.result.score)
+
+    def test_schedule_valid_in_engine(self):
+        for seed in range(20):
+            engine = EconomicEngine(seed=seed)
+            for turn, selection in enumerate(self.result.schedule, 1):
+                self.assertEqual(engine.turn, turn)
+                engine.step(selection)  # 预算、冷却或前置条件不满足时抛出 PolicyError
+                if engine.game_over:
+                    break
+
+    def test_matches_brute_force(self):
+        scenario = Scenario(max_turns=2)
+        solver = ScheduleSolver(scenario=scenario)
+        result = solver.solve(30)
+        self.assertTrue(result.optimal)
+        root = (1, solver.initial, scenario.initial_budget, (0,) * len(solver.policies))
+        self.assertEqual(result.score, brute_force(solver, root))
+
+    def test_reads_scenario_rules(self):
+        scenario = Scenario(max_turns=4, victory_objectives=4)
+        solver = ScheduleSolver(scenario=scenario)
+        result = solver.solve(30)
+        self.assertLessEqual(len(result.schedule), 4)
+        _, final = solver.replay(result.schedule)
+        if len(result.schedule) < scenario.max_turns:
+            # 提前结束只能是完成了全部 4 个目标
+            self.assertEqual(solver._completed(final), 4)
+        engine = EconomicEngine(seed=0, scenario=scenario)
+        for selection in result.schedule:
+            engine.step(selection)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+"""单回合最优组合的测试：随机预算和掩码下与穷举全部子集的结果一致"""
+import itertools
+import random
+import unittest
+
+from economic_engine import EconomicEngine
+from selection_solver import SelectionSolver, objective_gains
+
+CASES = 300
+
+
+def brute_force(costs, gains, budget, available):
+    """穷举可用政策的全部子集，返回最大收益之和（空组合为 0）"""
+    best = 0.0
+    for size in range(1, len(available) + 1):
+        for subset in itertools.combinations(available, size):
+            if sum(costs[i] for i in subset) <= budget:
+                best = max(best, sum(gains[i] for i in subset))
+    return best
+
+
+class SelectionSolverTest(unittest.TestCase):
+    def check(self, solver, rng):
+        n = len(solver.policies)
+        for _ in range(CASES):
+            budget = rng.randint(0, 120)
+            cooldown_mask = rng.getrandbits(n) & rng.getrandbits(n)
+            requirement_mask = rng.getrandbits(n) | rng.getrandbits(n)
+            result = solver.solve(budget, cooldown_mask, requirement_mask)
+            available = [i for i in range(n) if requirement_mask >> i & 1 and not cooldown_mask >> i & 1]
+            case = (budget, cooldown_mask, requirement_mask)
+            self.assertAlmostEqual(result.gain, brute_force(solver.costs, solver.gains, budget, available),
+                                   places=9, msg=case)
+            # 返回的组合本身可行，成本和收益与之相符
+            self.assertLessEqual(set(result.indices), set(available), case)
+            self.assertEqual(result.cost, sum(solver.costs[i] for i in result.indices), case)
+            self.assertLessEqual(result.cost, budget, case)
+            self.assertAlmostEqual(result.gain, sum(solver.gains[i] for i in result.indices), places=9)
+
+    def test_objective_gains_match_brute_force(self):
+        self.check(SelectionSolver(), random.Random(0))
+
+    def test_random_gains_match_brute_force(self):
+        rng = random.Random(1)
+        for _ in range(5):
+            gains = [rng.uniform(-1, 3) for _ in objective_gains()]
+            self.check(SelectionSolver(gains=gains), rng)
+
+    def test_cache(self):
+        solver = SelectionSolver()
+        first = solver.solve(60, 0b11, 0b1111111111)
+        self.assertIs(solver.solve(60, 0b11, 0b1111111111), first)
+        self.assertEqual((solver.hits, solver.misses), (1, 1))
+
+    def test_solve_engine(self):
+        engine = EconomicEngine(seed=2)
+        solver = SelectionSolver(engine.scenario)
+        for _ in range(6):
+            best = solver.solve_engine(engine)
+            if best.indices:
+                engine.validate_policies(best.indices)  # 不可行时抛出 PolicyError
+            engine.step(best.indices)
+            if engine.game_over:
+                break
+
+
+if __name__ == "__main__":
+    unittest.main()
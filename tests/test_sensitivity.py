@@ -0,0 +1,39 @@
+"""敏感性分析的测试：路径导数与公共随机数差分一致，平滑偏差只出现在核平滑的项上"""
+import unittest
+
+from sensitivity import PARAM_EVENT, analyze_sensitivity, finite_difference, validate
+
+N_GAMES = 4000
+
+
+class SensitivityTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.result = analyze_sensitivity(n_games=N_GAMES, seed=1)
+
+    def test_own_indicator_matches_finite_difference(self):
+        # 效果项对它自身指标的导数没有阈值跳变，两种估计应当在抽样误差内一致
+        name = "🌱 绿色能源补贴 → 碳排放指数"
+        o = self.result.outputs.index("碳排放指数")
+        i = self.result.names.index(name)
+        difference, error = finite_difference(name, n_games=N_GAMES, seed=1)["碳排放指数"]
+        self.assertAlmostEqual(self.result.derivatives[o, i], difference,
+                               delta=4 * (error + self.result.errors[o, i]))
+        self.assertEqual(self.result.biases[o, i], 0)
+
+    def test_score_reports_smoothing_bias(self):
+        o = self.result.outputs.index("最终得分")
+        for i, kind in enumerate(self.result.kinds):
+            if kind == PARAM_EVENT:
+                self.assertEqual(self.result.biases[o, i], 0)
+        name, _, derivative, error, bias, _ = self.result.table()[0]
+        self.assertGreater(abs(bias), 2 * error)
+        self.assertIn("*", self.result.summary())
+
+    def test_validate(self):
+        rows = validate(self.result, top=2, n_games=1000, seed=1)
+        self.assertEqual([row[0] for row in rows], [row[0] for row in self.result.table()[:2]])
+
+
+if __name__ == "__main__":
+    unittest.main()
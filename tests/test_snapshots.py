@@ -0,0 +1,66 @@
+"""快照、撤销和分支的测试：分支共享历史链而不复制之前的回合"""
+import unittest
+from unittest import mock
+
+from economic_engine import EconomicEngine
+from snapshots import GameSnapshot, HistoryNode
+
+
+def play(engine, turns):
+    for _ in range(turns):
+        engine.apply_policies([8])
+        engine.next_turn()
+
+
+class ForkTest(unittest.TestCase):
+    def setUp(self):
+        self.engine = EconomicEngine(seed=7, undo_depth=5)
+        play(self.engine, 10)
+        self.snapshot = self.engine.snapshot()
+
+    def test_fork_shares_history(self):
+        with mock.patch.object(HistoryNode, "rows", side_effect=AssertionError("复制了历史")), \
+                mock.patch.object(HistoryNode, "__init__", side_effect=AssertionError("新建了节点")):
+            branch = self.engine.fork(self.snapshot)
+        self.assertIs(branch.history_node, self.snapshot.history)
+
+        play(branch, 1)
+        self.assertIs(branch.history_node.parent, self.snapshot.history)
+        # 原来的引擎不受分支影响
+        self.assertIs(self.engine.history_node, self.snapshot.history)
+
+    def test_branches_keep_separate_histories(self):
+        first = self.engine.fork(self.snapshot)
+        second = self.engine.fork(self.snapshot)
+        play(first, 3)
+        second.apply_policies([1])
+        second.next_turn()
+        self.assertEqual(first.data_history.size, 14)
+        self.assertEqual(second.data_history.size, 12)
+        self.assertEqual(first.data_history.rows()[:11].tolist(),
+                         second.data_history.rows()[:11].tolist())
+        for engine in (first, second, self.engine):
+            rows = engine.history_node.rows()
+            self.assertEqual(engine.data_history.rows().tolist(), [list(row) for row, _ in rows])
+            self.assertEqual(engine.budget_history.tolist(), [budget for _, budget in rows])
+
+    def test_undo_restores_history(self):
+        before = self.engine.data_history.rows().tolist()
+        self.engine.apply_policies([1])
+        self.assertTrue(self.engine.undo())
+        self.assertIs(self.engine.history_node, self.snapshot.history)
+        self.assertEqual(self.engine.data_history.rows().tolist(), before)
+
+    def test_save_round_trip(self):
+        loaded = GameSnapshot.from_dict(self.snapshot.to_dict())
+        engine = EconomicEngine(seed=1)
+        engine.restore_snapshot(loaded)
+        self.assertEqual(engine.data_history.rows().tolist(),
+                         self.engine.data_history.rows().tolist())
+        play(engine, 1)
+        play(self.engine, 1)
+        self.assertEqual(engine.indicator_vector(), self.engine.indicator_vector())
+
+
+if __name__ == "__main__":
+    unittest.main()